@@ -31,6 +31,7 @@ from sentry.models import (
 )
 from sentry.plugins import IssueTrackingPlugin2, plugins
 from sentry.signals import issue_deleted
+from sentry.utils import grouphash_cache
 from sentry.utils.safe import safe_execute
 from sentry.utils.apidocs import scenario, attach_scenarios
 
@@ -409,6 +410,7 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
                 project_id=group.project_id,
                 group__id=group.id,
             ).delete()
+            grouphash_cache.invalidate(group.project_id)
 
             delete_groups.apply_async(
                 kwargs={
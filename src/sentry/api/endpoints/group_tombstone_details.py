@@ -9,6 +9,7 @@ from sentry.models import (
     GroupHash,
     GroupTombstone,
 )
+from sentry.utils import grouphash_cache
 
 
 class GroupTombstoneDetailsEndpoint(ProjectEndpoint):
@@ -38,6 +39,7 @@ class GroupTombstoneDetailsEndpoint(ProjectEndpoint):
             # will allow new events to be captured
             group_tombstone_id=None,
         )
+        grouphash_cache.invalidate(project.id)
 
         tombstone.delete()
 
@@ -40,7 +40,7 @@ from sentry.signals import (
 from sentry.tasks.deletion import delete_groups as delete_groups_task
 from sentry.tasks.integrations import kick_off_status_syncs
 from sentry.tasks.merge import merge_groups
-from sentry.utils import metrics
+from sentry.utils import grouphash_cache, metrics
 from sentry.utils.audit import create_audit_entry
 from sentry.utils.cursors import Cursor
 from sentry.utils.functional import extract_lazy_object
@@ -317,6 +317,7 @@ def handle_discard(request, group_list, projects, user):
                     group=None,
                     group_tombstone_id=tombstone.id,
                 )
+                grouphash_cache.invalidate(group.project_id)
 
     for project in projects:
         _delete_groups(request, project, groups_to_delete.get(project.id), delete_type='discard')
@@ -347,6 +348,7 @@ def _delete_groups(request, project, group_list, delete_type):
         project_id=project.id,
         group__id__in=group_ids,
     ).delete()
+    grouphash_cache.invalidate(project.id)
 
     delete_groups_task.apply_async(
         kwargs={
@@ -22,6 +22,7 @@ from sentry.models import (
     GroupSubscriptionReason, Integration, User, UserOption, UserOptionValue
 )
 from sentry.tagstore.snuba.backend import SnubaTagStorage
+from sentry.tsdb.base import SeriesMatrix
 from sentry.tsdb.snuba import SnubaTSDB
 from sentry.utils.db import attach_foreignkey
 from sentry.utils.safe import safe_execute
@@ -499,9 +500,10 @@ class StreamGroupSerializer(GroupSerializer, GroupStatsMixin):
         try:
             environment = self.environment_func()
         except Environment.DoesNotExist:
-            stats = {key: tsdb.make_series(0, **query_params) for key in group_ids}
+            _, series = tsdb.get_optimal_rollup_series(**query_params)
+            stats = SeriesMatrix(series, group_ids)
         else:
-            stats = tsdb.get_range(
+            stats = tsdb.get_range_matrix(
                 model=tsdb.models.group,
                 keys=group_ids,
                 environment_ids=environment and [environment.id],
@@ -517,7 +519,7 @@ class StreamGroupSerializer(GroupSerializer, GroupStatsMixin):
             stats = self.get_stats(item_list, user)
             for item in item_list:
                 attrs[item].update({
-                    'stats': stats[item.id],
+                    'stats': stats.series(item.id),
                 })
 
         return attrs
@@ -3,6 +3,8 @@ from __future__ import absolute_import
 import logging
 import six
 
+from collections import defaultdict
+from django.db import connections, router, transaction
 from django.db.models import F
 
 from sentry.signals import buffer_incr_complete
@@ -31,7 +33,7 @@ class Buffer(Service):
     This is useful in situations where a single event might be happening so fast that the queue cant
     keep up with the updates.
     """
-    __all__ = ('incr', 'process', 'process_pending', 'validate')
+    __all__ = ('incr', 'process', 'process_batch', 'process_pending', 'validate')
 
     def incr(self, model, columns, filters, extra=None):
         """
@@ -76,3 +78,122 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, updates):
+        """
+        Applies many buffered updates, given as ``(model, columns, filters,
+        extra)`` tuples.
+
+        Updates of groups by primary key are coalesced into one
+        ``UPDATE ... FROM (VALUES ...)`` statement per set of updated
+        columns, everything else goes through ``process``. A failing update
+        is logged and does not affect the others; if a coalesced statement
+        fails its groups are updated one by one.
+        """
+        from sentry.models import Group
+        from sentry.utils.db import is_postgres
+
+        can_coalesce = is_postgres(router.db_for_write(Group))
+
+        group_updates = defaultdict(list)
+        for model, columns, filters, extra in updates:
+            if can_coalesce and model is Group and list(filters) in (['id'], ['pk']):
+                group_id = list(filters.values())[0]
+                # the score is always recomputed from times_seen and last_seen
+                extra = {k: v for k, v in six.iteritems(extra or {}) if k != 'score'}
+                signature = (tuple(sorted(columns)), tuple(sorted(extra)))
+                group_updates[signature].append((group_id, columns, extra))
+            else:
+                self._process_logged(model, columns, filters, extra)
+
+        for (column_names, extra_names), rows in six.iteritems(group_updates):
+            try:
+                updated = _bulk_update_groups(column_names, extra_names, rows)
+            except Exception:
+                self.logger.exception('buffer.bulk-update-failed')
+                updated = set()
+
+            for group_id, columns, extra in rows:
+                if group_id not in updated:
+                    # The row is missing (or the statement failed), let
+                    # ``create_or_update`` deal with it.
+                    self._process_logged(Group, columns, {'id': group_id}, extra)
+                    continue
+
+                buffer_incr_complete.send_robust(
+                    model=Group,
+                    columns=columns,
+                    filters={'id': group_id},
+                    extra=extra,
+                    created=False,
+                    sender=Group,
+                )
+
+    def _process_logged(self, model, columns, filters, extra):
+        try:
+            self.process(model, columns, filters, extra)
+        except Exception:
+            self.logger.exception('buffer.process-failed', extra={
+                'model': model.__name__,
+                'filters': filters,
+            })
+
+
+def _bulk_update_groups(column_names, extra_names, rows):
+    """
+    Increments ``column_names`` and sets ``extra_names`` of many groups with
+    a single statement. ``rows`` is a list of ``(group_id, columns, extra)``.
+    Returns the set of group ids that were updated.
+    """
+    from sentry.models import Group
+
+    using = router.db_for_write(Group)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+
+    increment_fields = [Group._meta.get_field(name) for name in column_names]
+    extra_fields = [Group._meta.get_field(name) for name in extra_names]
+    fields = increment_fields + extra_fields
+
+    placeholder = u'(%s::bigint{})'.format(''.join(
+        u', %s::{}'.format(field.db_type(connection)) for field in fields
+    ))
+
+    params = []
+    # Keep a stable lock order to avoid deadlocks between workers.
+    for group_id, columns, extra in sorted(rows, key=lambda row: row[0]):
+        params.append(group_id)
+        for field in increment_fields:
+            params.append(columns[field.name])
+        for field in extra_fields:
+            params.append(field.get_db_prep_save(extra[field.name], connection))
+
+    assignments = [
+        u'{0} = g.{0} + v.{0}'.format(qn(field.column)) for field in increment_fields
+    ] + [
+        u'{0} = v.{0}'.format(qn(field.column)) for field in extra_fields
+    ]
+    # See ``ScoreClause``.
+    if 'times_seen' in column_names and 'last_seen' in extra_names:
+        assignments.append(
+            u'{score} = log(g.{times_seen} + v.{times_seen}) * 600 + '
+            u'extract(epoch from v.{last_seen})::int'.format(
+                score=qn('score'),
+                times_seen=qn('times_seen'),
+                last_seen=qn('last_seen'),
+            )
+        )
+
+    sql = u'UPDATE {table} AS g SET {assignments} ' \
+        u'FROM (VALUES {values}) AS v (id{columns}) ' \
+        u'WHERE g.id = v.id RETURNING g.id'.format(
+            table=qn(Group._meta.db_table),
+            assignments=u', '.join(assignments),
+            values=u', '.join([placeholder] * len(rows)),
+            columns=u''.join(u', {}'.format(qn(field.column)) for field in fields),
+        )
+
+    with transaction.atomic(using=using):
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        return set(row[0] for row in cursor.fetchall())
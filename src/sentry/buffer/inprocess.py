@@ -1,6 +1,20 @@
 from __future__ import absolute_import
 
+import atexit
+import logging
+import os
+import six
+import threading
+
+from time import sleep, time
+
+from django.db import models
+
 from sentry.buffer import Buffer
+from sentry.utils import metrics
+from sentry.utils.imports import import_string
+
+logger = logging.getLogger(__name__)
 
 
 class InProcessBuffer(Buffer):
@@ -13,3 +27,129 @@ class InProcessBuffer(Buffer):
 
     def incr(self, model, columns, filters, extra=None):
         self.process(model, columns, filters, extra)
+
+
+class AggregatingBuffer(Buffer):
+    """
+    Pre-aggregates increments in process before handing them to another
+    buffer backend (usually ``RedisBuffer``).
+
+    Increments for the same ``(model, filters)`` are summed up and ``extra``
+    values are merged (last write wins). The aggregated increments are
+    forwarded every ``flush_interval`` seconds, or as soon as more than
+    ``max_pending`` distinct keys are pending. Frequently updated rows (like
+    hot groups) thus cost one backend write per interval rather than one per
+    event.
+
+    Pending increments only live in memory: if the process dies, at most
+    ``flush_interval`` seconds (or ``max_pending`` keys) of increments are
+    lost.
+
+    >>> SENTRY_BUFFER = 'sentry.buffer.inprocess.AggregatingBuffer'
+    >>> SENTRY_BUFFER_OPTIONS = {
+    >>>     'backend': 'sentry.buffer.redis.RedisBuffer',
+    >>>     'backend_options': {'cluster': 'default'},
+    >>> }
+    """
+
+    def __init__(self, backend='sentry.buffer.redis.RedisBuffer', backend_options=None,
+                 flush_interval=1.0, max_pending=1000, **options):
+        self.backend = import_string(backend)(**(backend_options or {}))
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        assert self.flush_interval > 0
+        assert self.max_pending > 0
+
+        self.__lock = threading.Lock()
+        self.__pending = {}
+        self.__flusher_pid = None
+
+        atexit.register(self.flush)
+
+    def validate(self):
+        self.backend.validate()
+
+    def _coerce_val(self, value):
+        if isinstance(value, models.Model):
+            value = value.pk
+        return value
+
+    def _make_key(self, model, filters):
+        return (model, tuple(sorted(
+            (k, self._coerce_val(v)) for k, v in six.iteritems(filters)
+        )))
+
+    def _ensure_flusher(self):
+        # The flusher thread does not survive a fork (as done by the Celery
+        # prefork pool) so it is (re)started lazily in every process.
+        pid = os.getpid()
+        if self.__flusher_pid == pid:
+            return
+
+        with self.__lock:
+            if self.__flusher_pid == pid:
+                return
+            # Increments inherited from the parent process are flushed there.
+            self.__pending = {}
+            t = threading.Thread(target=self.__run_flusher)
+            t.daemon = True
+            t.start()
+            self.__flusher_pid = pid
+
+    def __run_flusher(self):
+        while True:
+            sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('buffer.aggregate.flush-failed')
+
+    def incr(self, model, columns, filters, extra=None):
+        self._ensure_flusher()
+
+        key = self._make_key(model, filters)
+        with self.__lock:
+            pending = self.__pending.get(key)
+            if pending is None:
+                self.__pending[key] = (model, dict(columns), filters, dict(extra or {}))
+            else:
+                pending_columns, pending_extra = pending[1], pending[3]
+                for column, amount in six.iteritems(columns):
+                    pending_columns[column] = pending_columns.get(column, 0) + amount
+                if extra:
+                    pending_extra.update(extra)
+            is_full = len(self.__pending) >= self.max_pending
+
+        if is_full:
+            self.flush()
+
+    def flush(self):
+        """
+        Forwards all pending increments to the backend.
+        """
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+
+        if not pending:
+            return
+
+        start = time()
+        for model, columns, filters, extra in six.itervalues(pending):
+            try:
+                self.backend.incr(model, columns, filters, extra or None)
+            except Exception:
+                logger.exception('buffer.aggregate.incr-failed', extra={
+                    'model': model.__name__,
+                })
+
+        metrics.timing('buffer.aggregate.flush-size', len(pending))
+        metrics.timing('buffer.aggregate.flush-duration', time() - start)
+
+    def process_pending(self, partition=None):
+        return self.backend.process_pending(partition=partition)
+
+    def process(self, *args, **kwargs):
+        return self.backend.process(*args, **kwargs)
+
+    def process_batch(self, updates):
+        return self.backend.process_batch(updates)
@@ -4,9 +4,11 @@ import six
 
 from time import time
 from binascii import crc32
+from collections import defaultdict
 
 from datetime import datetime
 from django.db import models
+from django.db.models.expressions import BaseExpression
 from django.utils import timezone
 from django.utils.encoding import force_bytes
 
@@ -51,7 +53,7 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = 'b:p'
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(self, pending_partitions=1, incr_batch_size=1000, **options):
         self.cluster, options = get_cluster_from_options('SENTRY_BUFFER_OPTIONS', options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
@@ -112,15 +114,26 @@ class RedisBuffer(Buffer):
         return result
 
     def _dump_value(self, value):
-        if isinstance(value, six.string_types):
+        if isinstance(value, models.Model):
+            value = value.pk
+        if value is None:
+            type_ = 'n'
+            value = ''
+        elif isinstance(value, six.string_types):
             type_ = 's'
         elif isinstance(value, datetime):
             type_ = 'd'
             value = value.strftime('%s.%f')
-        elif isinstance(value, int):
+        elif isinstance(value, bool):
+            type_ = 'b'
+            value = int(value)
+        elif isinstance(value, six.integer_types):
             type_ = 'i'
         elif isinstance(value, float):
             type_ = 'f'
+        elif isinstance(value, (dict, list, tuple)):
+            type_ = 'j'
+            value = json.dumps(value)
         else:
             raise TypeError(type(value))
         return (type_, six.text_type(value))
@@ -143,6 +156,12 @@ class RedisBuffer(Buffer):
             return int(value)
         elif type_ == 'f':
             return float(value)
+        elif type_ == 'b':
+            return bool(int(value))
+        elif type_ == 'n':
+            return None
+        elif type_ == 'j':
+            return json.loads(value)
         else:
             raise TypeError('invalid type: {}'.format(type_))
 
@@ -155,8 +174,6 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
         - Add hashmap key to pending flushes
         """
-        # TODO(dcramer): longer term we'd rather not have to serialize values
-        # here (unless it's to JSON)
         key = self._make_key(model, filters)
         pending_key = self._make_pending_key_from_key(key)
         # We can't use conn.map() due to wanting to support multiple pending
@@ -165,22 +182,18 @@ class RedisBuffer(Buffer):
 
         pipe = conn.pipeline()
         pipe.hsetnx(key, 'm', '%s.%s' % (model.__module__, model.__name__))
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        pipe.hsetnx(key, 'f', pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
         for column, amount in six.iteritems(columns):
             pipe.hincrby(key, 'i+' + column, amount)
 
         if extra:
-            # Group tries to serialize 'score', so we'd need some kind of processing
-            # hook here
-            # e.g. "update score if last_seen or times_seen is changed"
             for column, value in six.iteritems(extra):
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, 'e+' + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
+                # Expressions (such as the ``ScoreClause`` of groups) cannot
+                # be serialized, they are recomputed when the buffer is
+                # processed.
+                if isinstance(value, BaseExpression):
+                    continue
+                pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
         pipe.expire(key, self.key_expire)
         pipe.zadd(pending_key, time(), key)
         pipe.execute()
@@ -244,10 +257,72 @@ class RedisBuffer(Buffer):
         assert not (key is not None and batch_keys is not None)
 
         if key is not None:
-            batch_keys = [key]
-
-        for key in batch_keys:
             self._process_single_incr(key)
+        else:
+            self._process_batch(batch_keys)
+
+    def _load_update(self, values):
+        """
+        Decodes the hash of a buffered key into the arguments of
+        ``Buffer.process``: ``(model, columns, filters, extra)``.
+        """
+        model = import_string(values.pop('m'))
+        if values['f'].startswith('{'):
+            filters = self._load_values(json.loads(values.pop('f')))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(values.pop('f'))
+
+        incr_values = {}
+        extra_values = {}
+        for k, v in six.iteritems(values):
+            if k.startswith('i+'):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith('e+'):
+                if v.startswith('['):
+                    extra_values[k[2:]] = self._load_value(json.loads(v))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(v)
+
+        return model, incr_values, filters, extra_values
+
+    def _process_batch(self, keys):
+        """
+        Drains many buffered keys at once: the keys are read and deleted
+        with one transactional pipeline per Redis host and the resulting
+        updates are applied through ``Buffer.process_batch``.
+
+        As reading and deleting a key happens atomically, a key that is
+        processed concurrently by another task is simply seen as empty, so
+        no per-key locks are required.
+        """
+        router = self.cluster.get_router()
+        keys_by_host = defaultdict(list)
+        for key in keys:
+            keys_by_host[router.get_host_for_key(key)].append(key)
+
+        updates = []
+        for host_id, host_keys in six.iteritems(keys_by_host):
+            pipe = self.cluster.get_local_client(host_id).pipeline()
+            for key in host_keys:
+                pipe.hgetall(key)
+                pipe.zrem(self._make_pending_key_from_key(key), key)
+                pipe.delete(key)
+            results = pipe.execute()
+
+            for key, values in zip(host_keys, results[::3]):
+                if not values:
+                    metrics.incr('buffer.revoked', tags={'reason': 'empty'}, skip_internal=False)
+                    self.logger.debug('buffer.revoked.empty', extra={'redis_key': key})
+                    continue
+                try:
+                    updates.append(self._load_update(values))
+                except Exception:
+                    self.logger.exception('buffer.load-failed', extra={'redis_key': key})
+
+        metrics.timing('buffer.batch-size', len(updates))
+        super(RedisBuffer, self).process_batch(updates)
 
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
@@ -274,25 +349,6 @@ class RedisBuffer(Buffer):
                 self.logger.debug('buffer.revoked.empty', extra={'redis_key': key})
                 return
 
-            model = import_string(values.pop('m'))
-            if values['f'].startswith('{'):
-                filters = self._load_values(json.loads(values.pop('f')))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop('f'))
-
-            incr_values = {}
-            extra_values = {}
-            for k, v in six.iteritems(values):
-                if k.startswith('i+'):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith('e+'):
-                    if v.startswith('['):
-                        extra_values[k[2:]] = self._load_value(json.loads(v))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-
-            super(RedisBuffer, self).process(model, incr_values, filters, extra_values)
+            super(RedisBuffer, self).process(*self._load_update(values))
         finally:
             client.delete(lock_key)
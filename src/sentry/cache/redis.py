@@ -48,6 +48,18 @@ class RbCache(CommonRedisCache):
         client = cluster.get_routing_client()
         CommonRedisCache.__init__(self, client, **options)
 
+    def get_many(self, keys, version=None, raw=False):
+        with self.client.map() as client:
+            promises = [
+                (key, client.get(self.make_key(key, version=version))) for key in keys
+            ]
+
+        rv = {}
+        for key, promise in promises:
+            if promise.value is not None:
+                rv[key] = promise.value if raw else json.loads(promise.value)
+        return rv
+
 
 # Confusing legacy name for RbCache.  We don't actually have a pure redis cache
 RedisCache = RbCache
@@ -58,3 +70,16 @@ class RedisClusterCache(CommonRedisCache):
     def __init__(self, cluster_id, **options):
         client = redis_clusters.get(cluster_id)
         CommonRedisCache.__init__(self, client=client, **options)
+
+    def get_many(self, keys, version=None, raw=False):
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        values = self.client.mget([self.make_key(key, version=version) for key in keys])
+
+        rv = {}
+        for key, value in zip(keys, values):
+            if value is not None:
+                rv[key] = value if raw else json.loads(value)
+        return rv
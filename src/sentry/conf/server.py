@@ -1057,6 +1057,11 @@ SENTRY_CACHE_OPTIONS = {}
 SENTRY_ATTACHMENTS = 'sentry.attachments.default.DefaultAttachmentCache'
 SENTRY_ATTACHMENTS_OPTIONS = {}
 
+# Cache backend for the payloads of events that are being processed. Set
+# ``compression_level`` in the options to store them compressed.
+SENTRY_PROCESSING_CACHE = 'sentry.processingcache.default.DefaultProcessingCache'
+SENTRY_PROCESSING_CACHE_OPTIONS = {}
+
 # The internal Django cache is still used in many places
 # TODO(dcramer): convert uses over to Sentry's backend
 CACHES = {
@@ -1092,6 +1097,11 @@ SENTRY_SNUBA = os.environ.get('SNUBA', 'http://localhost:1218')
 SENTRY_NODESTORE = 'sentry.nodestore.django.DjangoNodeStorage'
 SENTRY_NODESTORE_OPTIONS = {}
 
+# Redis cluster in which a partitioned NodeStore cleanup (``sentry cleanup
+# --partition-nodestore``) checkpoints its progress, so that an interrupted
+# cleanup resumes where it stopped.
+SENTRY_NODESTORE_CLEANUP_REDIS_CLUSTER = 'default'
+
 # Tag storage backend
 _SENTRY_TAGSTORE_DEFAULT_MULTI_OPTIONS = {
     'backends': [
@@ -1179,6 +1189,29 @@ SENTRY_SOURCE_FETCH_SOCKET_TIMEOUT = 2
 # Maximum content length for source files before we abort fetching
 SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 
+# Maximum size (in bytes of the original files) of parsed sources and
+# sourcemaps that every worker process keeps between events.  The parsed
+# symbolic objects take several times the size of the original files, and
+# every (prefork) worker process has its own cache, so budget a multiple of
+# this value times the worker concurrency.  0 disables the cache.
+SENTRY_SOURCE_PARSED_CACHE_SIZE = 0
+
+# Number of threads per worker process that fetch the sources and sourcemaps
+# referenced by the frames of a JavaScript event concurrently.  With 1 they
+# are fetched one after another by the processing task itself.
+SENTRY_SOURCE_FETCH_WORKERS = 1
+
+# Interval (in seconds) in which outcomes (TSDB counters, metrics and Kafka
+# messages for everything but accepted events) aggregated in process are
+# written out. Outcomes are tracked individually if this is not set. Note
+# that aggregated Kafka messages carry the number of events as ``quantity``.
+SENTRY_OUTCOMES_FLUSH_INTERVAL = None
+
+# Interval (in seconds) in which events are recorded in the similarity index
+# in batches from a background thread. Every event is recorded while it is
+# post processed if this is not set.
+SENTRY_SIMILARITY_INDEX_FLUSH_INTERVAL = None
+
 # Fields which managed users cannot change via Sentry UI. Username and password
 # cannot be changed by managed users. Optionally include 'email' and
 # 'name' in SENTRY_MANAGED_USER_FIELDS.
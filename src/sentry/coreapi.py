@@ -17,8 +17,8 @@ from six import BytesIO
 from time import time
 
 from sentry.attachments import attachment_cache
-from sentry.cache import default_cache
 from sentry.models import ProjectKey
+from sentry.processingcache import processing_cache
 from sentry.tasks.store import preprocess_event, \
     preprocess_event_from_reprocessing
 from sentry.utils import json
@@ -143,30 +143,43 @@ class ClientApiHelper(object):
         return self.project_key_from_auth(auth).project_id
 
     def ensure_does_not_have_ip(self, data):
+        """Removes IP addresses from the data, returns whether there were
+        any."""
+        removed = False
+
         env = get_path(data, 'request', 'env')
-        if env:
-            env.pop('REMOTE_ADDR', None)
+        if env and env.pop('REMOTE_ADDR', None) is not None:
+            removed = True
 
         user = get_path(data, 'user')
-        if user:
-            user.pop('ip_address', None)
+        if user and user.pop('ip_address', None) is not None:
+            removed = True
 
         sdk = get_path(data, 'sdk')
-        if sdk:
-            sdk.pop('client_ip', None)
+        if sdk and sdk.pop('client_ip', None) is not None:
+            removed = True
+
+        return removed
 
     def insert_data_to_database(self, data, start_time=None,
-                                from_reprocessing=False, attachments=None):
+                                from_reprocessing=False, attachments=None,
+                                encoded_data=None):
+        """Puts the event into the processing cache and queues it.  If the
+        caller already has ``data`` encoded as JSON it can be passed as
+        ``encoded_data`` to store it as is.
+        """
         if start_time is None:
             start_time = time()
 
-        # we might be passed some subclasses of dict that fail dumping
-        if isinstance(data, CANONICAL_TYPES):
-            data = dict(data.items())
-
         cache_timeout = 3600
         cache_key = cache_key_for_event(data)
-        default_cache.set(cache_key, data, cache_timeout)
+        if encoded_data is not None:
+            processing_cache.set_encoded(cache_key, encoded_data, cache_timeout, stage='store')
+        else:
+            # we might be passed some subclasses of dict that fail dumping
+            if isinstance(data, CANONICAL_TYPES):
+                data = dict(data.items())
+            processing_cache.set(cache_key, data, cache_timeout, stage='store')
 
         # Attachments will be empty or None if the "event-attachments" feature
         # is turned off. For native crash reports it will still contain the
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+import copy
 import functools
 import itertools
 import logging
@@ -79,6 +80,104 @@ def fetch_state(project, records):
     }
 
 
+def fetch_states(digests):
+    """
+    Like ``fetch_state``, but for a sequence of ``(project, records)`` pairs
+    of many timelines. Groups and rules of all of them are loaded with one
+    query each. Event counts are read once per rollup over the union of the
+    time ranges of all digests using it and summed up per digest. Distinct
+    user counts cannot be combined like that, TSDB is queried for them once
+    per distinct time range. Returns the states in the same order, ``None``
+    for digests without records.
+    """
+    digests = [(project, list(records)) for project, records in digests]
+
+    group_ids = set()
+    rule_ids = set()
+    for project, records in digests:
+        for record in records:
+            group_ids.add(record.value.event.group_id)
+            rule_ids.update(record.value.rules)
+
+    groups = Group.objects.in_bulk(group_ids) if group_ids else {}
+    rules = Rule.objects.in_bulk(rule_ids) if rule_ids else {}
+
+    # NOTE: See ``fetch_state`` on the order of records.
+    ranges = defaultdict(set)
+    for project, records in digests:
+        if records:
+            ranges[(records[-1].datetime, records[0].datetime)].update(
+                record.value.event.group_id for record in records
+                if record.value.event.group_id in groups
+            )
+
+    # rollup -> [start, end, keys] of the union of all ranges using it
+    unions = {}
+    for (start, end), keys in six.iteritems(ranges):
+        if not keys:
+            continue
+        rollup = tsdb.get_optimal_rollup(start, end)
+        union = unions.setdefault(rollup, [start, end, set()])
+        union[0] = min(union[0], start)
+        union[1] = max(union[1], end)
+        union[2].update(keys)
+
+    series_by_rollup = {
+        rollup: tsdb.get_range(tsdb.models.group, list(keys), start, end, rollup)
+        for rollup, (start, end, keys) in six.iteritems(unions)
+    }
+
+    counts = {}
+    for (start, end), keys in six.iteritems(ranges):
+        if not keys:
+            continue
+        keys = list(keys)
+        # The same points ``get_sums`` would add up for this range.
+        rollup, timestamps = tsdb.get_optimal_rollup_series(start, end)
+        timestamps = set(timestamps)
+        series = series_by_rollup[rollup]
+        counts[(start, end)] = (
+            {
+                key: sum(count for timestamp, count in series.get(key, ())
+                         if timestamp in timestamps)
+                for key in keys
+            },
+            tsdb.get_distinct_counts_totals(
+                tsdb.models.users_affected_by_group, keys, start, end
+            ),
+        )
+
+    states = []
+    for project, records in digests:
+        if not records:
+            states.append(None)
+            continue
+
+        # Every digest gets its own copies of the groups, as their counts
+        # are attached to them (see ``attach_state``.)
+        digest_groups = {}
+        for record in records:
+            group_id = record.value.event.group_id
+            if group_id in groups and group_id not in digest_groups:
+                digest_groups[group_id] = copy.copy(groups[group_id])
+
+        event_counts, user_counts = counts.get(
+            (records[-1].datetime, records[0].datetime), ({}, {}))
+        states.append({
+            'project': project,
+            'groups': digest_groups,
+            'rules': {
+                id: rules[id] for id in set(
+                    itertools.chain.from_iterable(record.value.rules for record in records)
+                ) if id in rules
+            },
+            'event_counts': {id: event_counts[id] for id in digest_groups if id in event_counts},
+            'user_counts': {id: user_counts[id] for id in digest_groups if id in user_counts},
+        })
+
+    return states
+
+
 def attach_state(project, groups, rules, event_counts, user_counts):
     for id, group in six.iteritems(groups):
         assert group.project_id == project.id, 'Group must belong to Project'
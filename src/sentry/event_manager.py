@@ -44,7 +44,7 @@ from sentry.models import (
 from sentry.plugins import plugins
 from sentry.signals import event_discarded, event_saved, first_event_received
 from sentry.tasks.integrations import kick_off_status_syncs
-from sentry.utils import metrics
+from sentry.utils import grouphash_cache, metrics
 from sentry.utils.canonical import CanonicalKeyDict
 from sentry.utils.data_filters import (
     is_valid_ip,
@@ -185,6 +185,57 @@ class HashDiscarded(Exception):
     pass
 
 
+class SaveBatchCache(object):
+    """
+    Memoizes the lookups and upserts that are shared between all events saved
+    in one batch (see ``sentry.tasks.store.save_event_batch``), so that an
+    event only pays for them if no other event of the batch did before.
+    """
+
+    def __init__(self):
+        self._projects = {}
+        self._releases = {}
+        self._dists = {}
+        self._environments = {}
+
+    def get_project(self, project_id):
+        project = self._projects.get(project_id)
+        if project is None:
+            project = Project.objects.get_from_cache(id=project_id)
+            project._organization_cache = Organization.objects.get_from_cache(
+                id=project.organization_id)
+            self._projects[project_id] = project
+        return project
+
+    def get_release(self, project, version, date_added):
+        key = (project.id, version)
+        release = self._releases.get(key)
+        if release is None:
+            release = self._releases[key] = Release.get_or_create(
+                project=project,
+                version=version,
+                date_added=date_added,
+            )
+        return release
+
+    def get_dist(self, release, name, date_added):
+        key = (release.id, name)
+        dist = self._dists.get(key)
+        if dist is None:
+            dist = self._dists[key] = release.add_dist(name, date_added)
+        return dist
+
+    def get_environment(self, project, name):
+        key = (project.id, name)
+        environment = self._environments.get(key)
+        if environment is None:
+            environment = self._environments[key] = Environment.get_or_create(
+                project=project,
+                name=name,
+            )
+        return environment
+
+
 class ScoreClause(Func):
     def __init__(self, group=None, last_seen=None, times_seen=None, *args, **kwargs):
         self.group = group
@@ -485,7 +536,7 @@ class EventManager(object):
 
         return trim(message.strip(), settings.SENTRY_MAX_MESSAGE_LENGTH)
 
-    def save(self, project_id, raw=False, assume_normalized=False):
+    def save(self, project_id, raw=False, assume_normalized=False, batch_cache=None):
         # Normalize if needed
         if not self._normalized:
             if not assume_normalized:
@@ -494,9 +545,10 @@ class EventManager(object):
 
         data = self._data
 
-        project = Project.objects.get_from_cache(id=project_id)
-        project._organization_cache = Organization.objects.get_from_cache(
-            id=project.organization_id)
+        if batch_cache is None:
+            batch_cache = SaveBatchCache()
+
+        project = batch_cache.get_project(project_id)
 
         # Check to make sure we're not about to do a bunch of work that's
         # already been done if we've processed an event with this ID. (This
@@ -581,15 +633,11 @@ class EventManager(object):
         if release:
             # dont allow a conflicting 'release' tag
             pop_tag(data, 'release')
-            release = Release.get_or_create(
-                project=project,
-                version=release,
-                date_added=date,
-            )
+            release = batch_cache.get_release(project, release, date)
             set_tag(data, 'sentry:release', release.version)
 
         if dist and release:
-            dist = release.add_dist(dist, date)
+            dist = batch_cache.get_dist(release, dist, date)
             # dont allow a conflicting 'dist' tag
             pop_tag(data, 'dist')
             set_tag(data, 'sentry:dist', dist.name)
@@ -719,10 +767,7 @@ class EventManager(object):
         # store a reference to the group id to guarantee validation of isolation
         event.data.bind_ref(event)
 
-        environment = Environment.get_or_create(
-            project=project,
-            name=environment,
-        )
+        environment = batch_cache.get_environment(project, environment)
 
         if group:
             group_environment, is_new_group_environment = GroupEnvironment.get_or_create(
@@ -768,8 +813,6 @@ class EventManager(object):
         if release:
             counters.append((tsdb.models.release, release.id))
 
-        tsdb.incr_multi(counters, timestamp=event.datetime, environment_id=environment.id)
-
         frequencies = [
             # (tsdb.models.frequent_projects_by_organization, {
             #     project.organization_id: {
@@ -800,8 +843,24 @@ class EventManager(object):
                         },
                     })
                 )
-        if frequencies:
-            tsdb.record_frequency_multi(frequencies, timestamp=event.datetime)
+
+        distinct_counts = []
+        if event_user:
+            distinct_counts.append(
+                (tsdb.models.users_affected_by_project, project.id, (event_user.tag_value, )),
+            )
+
+            if group:
+                distinct_counts.append((tsdb.models.users_affected_by_group,
+                                        group.id, (event_user.tag_value, )))
+
+        tsdb.write_multi(
+            counters=counters,
+            distinct_counts=distinct_counts,
+            frequencies=frequencies,
+            timestamp=event.datetime,
+            environment_id=environment.id,
+        )
 
         if group:
             UserReport.objects.filter(
@@ -840,21 +899,6 @@ class EventManager(object):
                 date_added=event.datetime,
             )
 
-        if event_user:
-            counters = [
-                (tsdb.models.users_affected_by_project, project.id, (event_user.tag_value, )),
-            ]
-
-            if group:
-                counters.append((tsdb.models.users_affected_by_group,
-                                 group.id, (event_user.tag_value, )))
-
-            tsdb.record_multi(
-                counters,
-                timestamp=event.datetime,
-                environment_id=environment.id,
-            )
-
         if release:
             if is_new:
                 buffer.incr(
@@ -963,15 +1007,64 @@ class EventManager(object):
         return euser
 
     def _find_hashes(self, project, hash_list):
-        return map(
-            lambda hash: GroupHash.objects.get_or_create(
+        """
+        Resolves all hashes of an event to ``GroupHash`` instances (in the
+        order given), creating the missing ones.
+
+        Recently seen hashes are served from ``grouphash_cache``. Otherwise
+        the existing rows are fetched with a single query and the missing
+        rows are inserted with a single statement.
+        """
+        hash_list = list(hash_list)
+
+        cached, generation = grouphash_cache.get_many(project.id, hash_list)
+        if len(cached) == len(set(hash_list)):
+            return [
+                GroupHash(
+                    id=cached[hash][0],
+                    project=project,
+                    hash=hash,
+                    group_id=cached[hash][1],
+                ) for hash in hash_list
+            ]
+
+        grouphashes = {
+            h.hash: h for h in GroupHash.objects.filter(
                 project=project,
-                hash=hash,
-            )[0],
-            hash_list,
-        )
+                hash__in=hash_list,
+            )
+        }
+
+        missing = [hash for hash in set(hash_list) if hash not in grouphashes]
+        if missing:
+            try:
+                with transaction.atomic(using=router.db_for_write(GroupHash)):
+                    GroupHash.objects.bulk_create([
+                        GroupHash(project=project, hash=hash) for hash in missing
+                    ])
+            except IntegrityError:
+                # Another event created some of these hashes concurrently,
+                # fall back to creating them one by one.
+                for hash in missing:
+                    grouphashes[hash] = GroupHash.objects.get_or_create(
+                        project=project,
+                        hash=hash,
+                    )[0]
+            else:
+                # ``bulk_create`` does not return primary keys, so the new
+                # rows need to be fetched again.
+                grouphashes.update(
+                    (h.hash, h) for h in GroupHash.objects.filter(
+                        project=project,
+                        hash__in=missing,
+                    )
+                )
 
-    def _save_aggregate(self, event, hashes, release, **kwargs):
+        grouphash_cache.set_many(project.id, grouphashes.values(), generation)
+
+        return [grouphashes[hash] for hash in hash_list]
+
+    def _save_aggregate(self, event, hashes, release, _allow_retry=True, **kwargs):
         project = event.project
 
         # attempt to find a matching hash
@@ -1012,7 +1105,17 @@ class EventManager(object):
             )
 
         else:
-            group = Group.objects.get(id=existing_group_id)
+            try:
+                group = Group.objects.get(id=existing_group_id)
+            except Group.DoesNotExist:
+                # The cached group binding of a hash went stale (for instance
+                # because the group was merged away), resolve it again from
+                # the database.
+                grouphash_cache.invalidate(project.id)
+                if not _allow_retry:
+                    raise
+                return self._save_aggregate(
+                    event, hashes, release, _allow_retry=False, **kwargs)
 
             group_is_new = False
 
@@ -1,22 +1,27 @@
 from __future__ import absolute_import
 
 import os
+import re
 import six
 import base64
 import msgpack
 import inspect
+from collections import defaultdict
 from itertools import izip
 
+from functools32 import lru_cache
+
 from parsimonious.grammar import Grammar, NodeVisitor
 from parsimonious.exceptions import ParseError
 
 from sentry import projectoptions
+from sentry.stacktraces.frame_info import FrameInfo
 from sentry.stacktraces.functions import set_in_app
 from sentry.stacktraces.platform import get_behavior_family_for_platform
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.utils import get_rule_bool
 from sentry.utils.compat import implements_to_string
-from sentry.utils.glob import glob_match
+from sentry.utils.glob import translate
 from sentry.utils.safe import get_path
 
 
@@ -89,10 +94,54 @@ ACTION_FLAGS = {
 REVERSE_ACTION_FLAGS = dict((v, k) for k, v in six.iteritems(ACTION_FLAGS))
 
 
+# Match keys that are matched with glob patterns.  Path-like values are
+# matched case insensitive and with normalized slashes.
+GLOB_MATCH_KEYS = frozenset(['path', 'package', 'function', 'module'])
+PATH_MATCH_KEYS = frozenset(['path', 'package'])
+
+
 class InvalidEnhancerConfig(Exception):
     pass
 
 
+def _normalize_path(value):
+    return value.lower().replace('\\', '/')
+
+
+def _normalize_glob_pattern(key, pattern):
+    if key in PATH_MATCH_KEYS:
+        return _normalize_path(pattern)
+    return pattern
+
+
+@lru_cache(maxsize=1000)
+def _compile_glob(key, pattern):
+    return re.compile('(?ms)' + translate(pattern, doublestar=key in PATH_MATCH_KEYS))
+
+
+def _get_glob_values(key, frame_info):
+    """Returns the (normalized) values of a frame that the glob patterns of
+    the given match key are matched against."""
+    frame_data = frame_info.frame
+    if key in PATH_MATCH_KEYS:
+        if key == 'package':
+            value = frame_data.get('package') or ''
+        else:
+            value = frame_data.get('abs_path') or frame_data.get('filename') or ''
+        if not value.startswith('/'):
+            return (_normalize_path(value), _normalize_path('/' + value))
+        return (_normalize_path(value), )
+
+    if key == 'function':
+        value = frame_info.function_name or '<unknown>'
+    elif key == 'module':
+        value = frame_data.get('module') or '<unknown>'
+    else:
+        # should not happen :)
+        value = '<unknown>'
+    return (value, )
+
+
 class Match(object):
 
     def __init__(self, key, pattern):
@@ -107,21 +156,7 @@ class Match(object):
         )
 
     def matches_frame(self, frame_data, platform):
-        # Path matches are always case insensitive
-        if self.key in ('path', 'package'):
-            if self.key == 'package':
-                value = frame_data.get('package') or ''
-            else:
-                value = frame_data.get('abs_path') or frame_data.get('filename') or ''
-            if glob_match(value, self.pattern, ignorecase=True,
-                          doublestar=True, path_normalize=True):
-                return True
-            if not value.startswith('/') and glob_match('/' + value, self.pattern,
-                                                        ignorecase=True, doublestar=True, path_normalize=True):
-                return True
-            return False
-
-        # families need custom handling as well
+        # families need custom handling
         if self.key == 'family':
             flags = self.pattern.split(',')
             if 'all' in flags:
@@ -134,16 +169,11 @@ class Match(object):
             ref_val = get_rule_bool(self.pattern)
             return ref_val is not None and ref_val == frame_data.get('in_app')
 
-        # all other matches are case sensitive
-        if self.key == 'function':
-            from sentry.stacktraces.functions import get_function_name_for_frame
-            value = get_function_name_for_frame(frame_data, platform) or '<unknown>'
-        elif self.key == 'module':
-            value = frame_data.get('module') or '<unknown>'
-        else:
-            # should not happen :)
-            value = '<unknown>'
-        return glob_match(value, self.pattern)
+        # Path matches are always case insensitive, all other matches are
+        # case sensitive
+        regex = _compile_glob(self.key, _normalize_glob_pattern(self.key, self.pattern))
+        return any(regex.match(value) is not None
+                   for value in _get_glob_values(self.key, FrameInfo(frame_data, platform)))
 
     def _to_config_structure(self):
         if self.key == 'family':
@@ -298,7 +328,130 @@ class StacktraceState(object):
         return '%s by grouping enhancement rule (%s)' % (hint, description)
 
 
+class GlobIndex(object):
+    """All patterns of one glob match key merged into a single expression.
+
+    Most values do not match any pattern of a key, which the merged
+    expression rejects in one go.  Otherwise the individual patterns are
+    tried and the result is remembered per value, since the same function
+    names and paths show up in many events.
+    """
+
+    def __init__(self, key, patterns):
+        self.key = key
+        self.patterns = sorted(set(patterns))
+        self.regexes = [(p, _compile_glob(key, p)) for p in self.patterns]
+        self.combined = re.compile('(?ms)(?:%s)' % '|'.join(
+            '(?:%s)' % translate(p, doublestar=key in PATH_MATCH_KEYS) for p in self.patterns))
+        self.get_matching_patterns = lru_cache(maxsize=5000)(self._get_matching_patterns)
+
+    def _get_matching_patterns(self, value):
+        if self.combined.match(value) is None:
+            return frozenset()
+        return frozenset(p for p, regex in self.regexes if regex.match(value) is not None)
+
+
+class CompiledRule(object):
+    """A rule with its matchers grouped by kind."""
+    __slots__ = ('rule', 'actions', 'globs', 'families', 'app', 'never')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.actions = rule.actions
+        self.globs = []
+        self.families = []
+        self.app = []
+        self.never = not rule.matchers
+        for matcher in rule.matchers:
+            if matcher.key in GLOB_MATCH_KEYS:
+                self.globs.append((matcher.key, _normalize_glob_pattern(
+                    matcher.key, matcher.pattern)))
+            elif matcher.key == 'family':
+                flags = frozenset(matcher.pattern.split(','))
+                if 'all' not in flags:
+                    self.families.append(flags)
+            elif matcher.key == 'app':
+                ref_val = get_rule_bool(matcher.pattern)
+                if ref_val is None:
+                    self.never = True
+                self.app.append(ref_val)
+
+
+class FrameMatcher(object):
+    """Matches one frame against the rules of a compiled enhancement config.
+    The attributes of the frame are extracted at most once per frame info,
+    the in-app flag is looked up every time as earlier rules might have
+    changed it."""
+    __slots__ = ('compiled', 'info')
+
+    def __init__(self, compiled, info):
+        self.compiled = compiled
+        self.info = info
+
+    @property
+    def frame(self):
+        return self.info.frame
+
+    def get_matching_patterns(self, key):
+        index = self.compiled.indexes[key]
+        rv = self.info.glob_matches.get(index)
+        if rv is None:
+            rv = frozenset()
+            for value in _get_glob_values(key, self.info):
+                rv = rv | index.get_matching_patterns(value)
+            self.info.glob_matches[index] = rv
+        return rv
+
+    def matches(self, rule):
+        if rule.never:
+            return False
+        if rule.app:
+            in_app = self.frame.get('in_app')
+            if any(ref_val != in_app for ref_val in rule.app):
+                return False
+        for flags in rule.families:
+            if self.info.behavior_family not in flags:
+                return False
+        for key, pattern in rule.globs:
+            if pattern not in self.get_matching_patterns(key):
+                return False
+        return True
+
+
+class CompiledEnhancements(object):
+    """The rules of an enhancement config (including its bases) prepared
+    for matching many frames."""
+
+    def __init__(self, rules):
+        self.rules = [CompiledRule(rule) for rule in rules]
+        patterns = defaultdict(set)
+        for rule in self.rules:
+            for key, pattern in rule.globs:
+                patterns[key].add(pattern)
+        self.indexes = {
+            key: GlobIndex(key, key_patterns) for key, key_patterns in six.iteritems(patterns)
+        }
+
+    def get_frame_matchers(self, frames, platform, frame_infos=None):
+        if frame_infos is None:
+            return [FrameMatcher(self, FrameInfo(frame, platform)) for frame in frames]
+        return [FrameMatcher(self, frame_infos.get(frame, platform)) for frame in frames]
+
+
+@lru_cache(maxsize=100)
+def _load_enhancements(data):
+    if six.PY2 and isinstance(data, six.text_type):
+        data = data.encode('ascii', 'ignore')
+    padded = data + b'=' * (4 - (len(data) % 4))
+    try:
+        return Enhancements._from_config_structure(msgpack.loads(
+            base64.urlsafe_b64decode(padded).decode('zlib')))
+    except (LookupError, AttributeError, TypeError, ValueError) as e:
+        raise ValueError('invalid grouping enhancement config: %s' % e)
+
+
 class Enhancements(object):
+    _compiled = None
 
     def __init__(self, rules, changelog=None, version=None, bases=None, id=None):
         self.id = id
@@ -311,27 +464,42 @@ class Enhancements(object):
             bases = []
         self.bases = bases
 
-    def apply_modifications_to_frame(self, frames, platform):
-        """This applies the frame modifications to the frames itself.  This
-        does not affect grouping.
+    def get_compiled(self):
+        """Returns the rules of this config and its bases compiled for
+        matching.  The result is kept on the instance which is why loaded
+        configs are shared and must not be modified.
         """
-        for rule in self.iter_rules():
-            for idx, frame in enumerate(frames):
-                actions = rule.get_matching_frame_actions(frame, platform)
-                for action in actions or ():
-                    action.apply_modifications_to_frame(frames, idx)
+        if self._compiled is None:
+            self._compiled = CompiledEnhancements(self.iter_rules())
+        return self._compiled
 
-    def update_frame_components_contributions(self, components, frames, platform):
+    def apply_modifications_to_frame(self, frames, platform, frame_infos=None):
+        """This applies the frame modifications to the frames itself.  This
+        does not affect grouping.  `frame_infos` is an optional
+        `FrameInfoCache` shared with the grouping strategies.
+        """
+        compiled = self.get_compiled()
+        matchers = compiled.get_frame_matchers(frames, platform, frame_infos)
+        for rule in compiled.rules:
+            for idx, matcher in enumerate(matchers):
+                if matcher.matches(rule):
+                    for action in rule.actions:
+                        action.apply_modifications_to_frame(frames, idx)
+
+    def update_frame_components_contributions(self, components, frames, platform,
+                                              frame_infos=None):
         stacktrace_state = StacktraceState()
 
         # Apply direct frame actions and update the stack state alongside
-        for rule in self.iter_rules():
-            for idx, (component, frame) in enumerate(izip(components, frames)):
-                actions = rule.get_matching_frame_actions(frame, platform)
-                for action in actions or ():
-                    action.update_frame_components_contributions(
-                        components, frames, idx, rule=rule)
-                    action.modify_stacktrace_state(stacktrace_state, rule)
+        compiled = self.get_compiled()
+        matchers = compiled.get_frame_matchers(frames[:len(components)], platform, frame_infos)
+        for rule in compiled.rules:
+            for idx, matcher in enumerate(matchers):
+                if matcher.matches(rule):
+                    for action in rule.actions:
+                        action.update_frame_components_contributions(
+                            components, frames, idx, rule=rule.rule)
+                        action.modify_stacktrace_state(stacktrace_state, rule.rule)
 
         # Use the stack state to update frame contributions again to trim
         # down to max-frames.  min-frames is handled on the other hand for
@@ -354,7 +522,7 @@ class Enhancements(object):
 
         return stacktrace_state
 
-    def assemble_stacktrace_component(self, components, frames, platform):
+    def assemble_stacktrace_component(self, components, frames, platform, frame_infos=None):
         """This assembles a stacktrace grouping component out of the given
         frame components and source frames.  Internally this invokes the
         `update_frame_components_contributions` method but also handles cases
@@ -363,7 +531,7 @@ class Enhancements(object):
         hint = None
         contributes = None
         stacktrace_state = self.update_frame_components_contributions(
-            components, frames, platform)
+            components, frames, platform, frame_infos)
 
         min_frames = stacktrace_state.get('min-frames')
         if min_frames > 0:
@@ -425,14 +593,9 @@ class Enhancements(object):
 
     @classmethod
     def loads(cls, data):
-        if six.PY2 and isinstance(data, six.text_type):
-            data = data.encode('ascii', 'ignore')
-        padded = data + b'=' * (4 - (len(data) % 4))
-        try:
-            return cls._from_config_structure(msgpack.loads(
-                base64.urlsafe_b64decode(padded).decode('zlib')))
-        except (LookupError, AttributeError, TypeError, ValueError) as e:
-            raise ValueError('invalid grouping enhancement config: %s' % e)
+        # Configs are loaded for every event, so the loaded (and compiled)
+        # instances are shared.
+        return _load_enhancements(data)
 
     @classmethod
     def from_config_string(self, s, bases=None, id=None):
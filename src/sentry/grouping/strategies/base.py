@@ -5,6 +5,7 @@ import inspect
 from sentry import projectoptions
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.enhancer import Enhancements
+from sentry.stacktraces.frame_info import FrameInfoCache
 
 
 STRATEGIES = {}
@@ -171,6 +172,10 @@ class StrategyConfiguration(object):
         else:
             enhancements = Enhancements.loads(enhancements)
         self.enhancements = enhancements
+        # Configurations are loaded per event, which makes this the place
+        # to share derived frame attributes between all strategies and
+        # variants of an event (including their enhancer calls).
+        self.frame_infos = FrameInfoCache()
 
     def __repr__(self):
         return '<%s %r>' % (
@@ -178,6 +183,12 @@ class StrategyConfiguration(object):
             self.id,
         )
 
+    def get_frame_info(self, frame, platform=None):
+        """Returns the `FrameInfo` of a frame interface or raw frame."""
+        if hasattr(frame, 'get_raw_data'):
+            frame = frame.get_raw_data()
+        return self.frame_infos.get(frame, platform)
+
     def iter_strategies(self):
         """Iterates over all strategies by highest score to lowest."""
         return iter(sorted(self.strategies.values(), key=lambda x: -x.score))
@@ -474,7 +474,8 @@ def stacktrace_legacy(stacktrace, config, variant, **meta):
         prev_frame = frame
 
     rv = config.enhancements.assemble_stacktrace_component(
-        values, frames_for_filtering, meta['event'].platform)
+        values, frames_for_filtering, meta['event'].platform,
+        frame_infos=config.frame_infos)
     rv.update(contributes=contributes, hint=hint)
     return rv
 
@@ -152,7 +152,8 @@ def get_module_component_v1(abs_path, module, platform):
 
 def get_function_component(function, platform, legacy_function_logic,
                            sourcemap_used=False, context_line_available=False,
-                           raw_function=None, javascript_fuzzing=False):
+                           raw_function=None, javascript_fuzzing=False,
+                           frame_info=None):
     """
     Attempt to normalize functions by removing common platform outliers.
 
@@ -164,16 +165,26 @@ def get_function_component(function, platform, legacy_function_logic,
     use the frame v1 function name logic or the frame v2 logic.  The difference
     is that v2 uses the function name consistently and v1 prefers raw function
     or a trimmed version (of the truncated one) for native.
+
+    If the `frame_info` of the frame is given, trimmed function names are
+    reused from there.
     """
-    from sentry.stacktraces.functions import trim_function_name
-    behavior_family = get_behavior_family_for_platform(platform)
+    from sentry.stacktraces.functions import trim_function_name as _trim_function_name
+    if frame_info is not None:
+        behavior_family = frame_info.behavior_family
+        trim_function_name = frame_info.trim_function_name
+    else:
+        behavior_family = get_behavior_family_for_platform(platform)
+
+        def trim_function_name(func, normalize_lambdas=True):
+            return _trim_function_name(func, platform, normalize_lambdas=normalize_lambdas)
 
     if legacy_function_logic:
         func = raw_function or function
     else:
         func = function or raw_function
         if not raw_function and function:
-            func = trim_function_name(func, platform)
+            func = trim_function_name(func)
 
     if not func:
         return GroupingComponent(id='function')
@@ -218,8 +229,7 @@ def get_function_component(function, platform, legacy_function_logic,
                 hint='ignored unknown function'
             )
         elif legacy_function_logic:
-            new_function = trim_function_name(func, platform,
-                                              normalize_lambdas=False)
+            new_function = trim_function_name(func, normalize_lambdas=False)
             if new_function != func:
                 function_component.update(
                     values=[new_function],
@@ -315,6 +325,7 @@ def get_frame_component(frame, event, meta, legacy_function_logic=False,
                         use_contextline=False,
                         javascript_fuzzing=False):
     platform = frame.platform or event.platform
+    frame_info = meta['config'].get_frame_info(frame, event.platform)
 
     # Safari throws [native code] frames in for calls like ``forEach``
     # whereas Chrome ignores these. Let's remove it from the hashing algo
@@ -347,6 +358,7 @@ def get_frame_component(frame, event, meta, legacy_function_logic=False,
         context_line_available=context_line_component and context_line_component.contributes,
         legacy_function_logic=legacy_function_logic,
         javascript_fuzzing=javascript_fuzzing,
+        frame_info=frame_info,
     )
 
     values = [
@@ -366,8 +378,7 @@ def get_frame_component(frame, event, meta, legacy_function_logic=False,
     # frames consistently.  These force common bad stacktraces together
     # to have a common hash at the cost of maybe skipping over frames that
     # would otherwise be useful.
-    if javascript_fuzzing \
-       and get_behavior_family_for_platform(platform) == 'javascript':
+    if javascript_fuzzing and frame_info.behavior_family == 'javascript':
         func = frame.raw_function or frame.function
         if func:
             func = func.rsplit('.', 1)[-1]
@@ -442,7 +453,8 @@ def get_stacktrace_component(stacktrace, config, variant, meta):
         )
 
     return config.enhancements.assemble_stacktrace_component(
-        values, frames_for_filtering, meta['event'].platform)
+        values, frames_for_filtering, meta['event'].platform,
+        frame_infos=config.frame_infos)
 
 
 def single_exception_common(exception, config, meta, with_value):
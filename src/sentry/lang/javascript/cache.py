@@ -1,10 +1,13 @@
 from __future__ import absolute_import, print_function
 
+import threading
+from collections import OrderedDict
+
 from six import text_type
 from symbolic import SourceView
 from sentry.utils.strings import codec_lookup
 
-__all__ = ['SourceCache', 'SourceMapCache']
+__all__ = ['SourceCache', 'SourceMapCache', 'ParsedFileCache']
 
 
 def is_utf8(codec):
@@ -12,6 +15,22 @@ def is_utf8(codec):
     return name in ('utf-8', 'ascii')
 
 
+def make_source_view(source, encoding=None):
+    if isinstance(source, SourceView):
+        return source
+    if isinstance(source, text_type):
+        source = source.encode('utf-8')
+    # If an encoding is provided and it's not utf-8 compatible
+    # we try to re-encoding the source and create a source view
+    # from it.
+    elif encoding is not None and not is_utf8(encoding):
+        try:
+            source = source.decode(encoding).encode('utf-8')
+        except UnicodeError:
+            pass
+    return SourceView.from_bytes(source)
+
+
 class SourceCache(object):
     def __init__(self):
         self._cache = {}
@@ -40,20 +59,7 @@ class SourceCache(object):
 
     def add(self, url, source, encoding=None):
         url = self._get_canonical_url(url)
-
-        if not isinstance(source, SourceView):
-            if isinstance(source, text_type):
-                source = source.encode('utf-8')
-            # If an encoding is provided and it's not utf-8 compatible
-            # we try to re-encoding the source and create a source view
-            # from it.
-            elif encoding is not None and not is_utf8(encoding):
-                try:
-                    source = source.decode(encoding).encode('utf-8')
-                except UnicodeError:
-                    pass
-            source = SourceView.from_bytes(source)
-        self._cache[url] = source
+        self._cache[url] = make_source_view(source, encoding)
 
     def add_error(self, url, error):
         url = self._get_canonical_url(url)
@@ -84,3 +90,48 @@ class SourceMapCache(object):
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class ParsedFileCache(object):
+    """A thread safe LRU of parsed source and sourcemap views that is shared
+    by all events processed in a worker.  It is bounded by the size of the
+    original files, which is a rough estimate of the memory the views use.
+
+    Keys must include a checksum of the file contents, so that entries for
+    changed files are never returned and simply age out.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return None
+            self._items[key] = item
+            return item[0]
+
+    def add(self, key, value, size):
+        if size > self.max_size:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
@@ -3,13 +3,19 @@ from __future__ import absolute_import, print_function
 __all__ = ['JavaScriptStacktraceProcessor']
 
 import logging
+import os
 import re
 import sys
 import base64
+import hashlib
 import six
+import threading
 import zlib
 
+from collections import OrderedDict
 from django.conf import settings
+from django.db import connections
+from functools import partial
 from os.path import splitext
 from requests.utils import get_encoding_from_headers
 from six.moves.urllib.parse import urljoin, urlsplit
@@ -28,6 +34,7 @@ from sentry import http
 from sentry.interfaces.stacktrace import Stacktrace
 from sentry.models import EventError, ReleaseFile, Organization
 from sentry.utils.cache import cache
+from sentry.utils.concurrent import SynchronousExecutor, ThreadedExecutor
 from sentry.utils.files import compress_file
 from sentry.utils.hashlib import md5_text
 from sentry.utils.http import is_valid_origin
@@ -35,7 +42,7 @@ from sentry.utils.safe import get_path
 from sentry.utils import metrics
 from sentry.stacktraces.processing import StacktraceProcessor
 
-from .cache import SourceCache, SourceMapCache
+from .cache import ParsedFileCache, SourceCache, SourceMapCache, make_source_view
 
 # number of surrounding lines (on each side) to fetch
 LINES_OF_CONTEXT = 5
@@ -64,6 +71,11 @@ CACHE_CONTROL_MIN = 60
 # the maximum number of remote resources (i.e. source files) that should be
 # fetched
 MAX_RESOURCE_FETCHES = 100
+# how long (in seconds) the contents and the absence of release files are
+# cached.  Cache keys change when files of the release are uploaded, so
+# these only bound how long entries of an idle release linger.
+RELEASE_FILE_CACHE_TTL = 3600
+RELEASE_FILE_NEGATIVE_CACHE_TTL = 600
 
 logger = logging.getLogger(__name__)
 
@@ -199,35 +211,87 @@ def discover_sourcemap(result):
     return sourcemap
 
 
-def fetch_release_file(filename, release, dist=None):
-    cache_key = 'releasefile:v1:%s:%s' % (release.id, md5_text(filename).hexdigest(), )
+def get_release_file_cache_key(filename, release, version):
+    return 'releasefile:v2:%s:%s:%s' % (release.id, version, md5_text(filename).hexdigest(), )
 
-    logger.debug('Checking cache for release artifact %r (release_id=%s)', filename, release.id)
-    result = cache.get(cache_key)
 
+def get_release_file_idents(filename, dist=None):
     dist_name = dist and dist.name or None
+    return [ReleaseFile.get_ident(f, dist_name) for f in ReleaseFile.normalize(filename)]
+
+
+def get_release_file_candidates(filenames, release, dist=None):
+    """
+    Looks up the release artifacts of several files with a single query.
+
+    Returns the artifacts that might match each file, in the order in which
+    ``fetch_release_file`` picks them.  Files whose contents (or absence) are
+    already cached are left out.
+    """
+    version = ReleaseFile.get_cache_version(release.id)
+    idents = {}
+    cache_keys = {}
+    for filename in filenames:
+        idents[filename] = get_release_file_idents(filename, dist)
+        cache_keys[get_release_file_cache_key(filename, release, version)] = filename
+
+    for cache_key in cache.get_many(list(cache_keys)):
+        del idents[cache_keys[cache_key]]
+
+    if not idents:
+        return {}
+
+    releasefiles = {}
+    for releasefile in ReleaseFile.objects.filter(
+        release=release,
+        dist=dist,
+        ident__in=set(ident for file_idents in six.itervalues(idents) for ident in file_idents),
+    ).select_related('file'):
+        releasefiles[releasefile.ident] = releasefile
+
+    return {
+        filename: [releasefiles[ident] for ident in file_idents if ident in releasefiles]
+        for filename, file_idents in six.iteritems(idents)
+    }
+
+
+def fetch_release_file(filename, release, dist=None, candidates=None):
+    """
+    Returns the contents of a release artifact or `None` if the release has
+    no artifact for the file.  If the artifacts that might match the file
+    were looked up already (see `get_release_file_candidates`), they can be
+    passed as ``candidates`` to skip the database query.
+    """
+    cache_key = get_release_file_cache_key(
+        filename, release, ReleaseFile.get_cache_version(release.id))
+
+    logger.debug('Checking cache for release artifact %r (release_id=%s)', filename, release.id)
+    result = cache.get(cache_key)
 
     if result is None:
-        filename_choices = ReleaseFile.normalize(filename)
-        filename_idents = [ReleaseFile.get_ident(f, dist_name) for f in filename_choices]
+        metrics.incr('sourcemaps.release_file.cache', tags={'result': 'miss'}, skip_internal=True)
+        filename_idents = get_release_file_idents(filename, dist)
 
-        logger.debug(
-            'Checking database for release artifact %r (release_id=%s)', filename, release.id
-        )
+        if candidates is not None:
+            possible_files = candidates
+        else:
+            logger.debug(
+                'Checking database for release artifact %r (release_id=%s)', filename, release.id
+            )
 
-        possible_files = list(
-            ReleaseFile.objects.filter(
-                release=release,
-                dist=dist,
-                ident__in=filename_idents,
-            ).select_related('file')
-        )
+            possible_files = list(
+                ReleaseFile.objects.filter(
+                    release=release,
+                    dist=dist,
+                    ident__in=filename_idents,
+                ).select_related('file')
+            )
 
         if len(possible_files) == 0:
             logger.debug(
                 'Release artifact %r not found in database (release_id=%s)', filename, release.id
             )
-            cache.set(cache_key, -1, 60)
+            cache.set(cache_key, -1, RELEASE_FILE_NEGATIVE_CACHE_TTL)
             return None
         elif len(possible_files) == 1:
             releasefile = possible_files[0]
@@ -256,13 +320,16 @@ def fetch_release_file(filename, release, dist=None):
             headers = {k.lower(): v for k, v in releasefile.file.headers.items()}
             encoding = get_encoding_from_headers(headers)
             result = http.UrlResult(filename, headers, body, 200, encoding)
-            cache.set(cache_key, (headers, z_body, 200, encoding), 3600)
+            cache.set(cache_key, (headers, z_body, 200, encoding), RELEASE_FILE_CACHE_TTL)
 
     elif result == -1:
+        metrics.incr('sourcemaps.release_file.cache', tags={'result': 'negative'},
+                     skip_internal=True)
         # We cached an error, so normalize
         # it down to None
         result = None
     else:
+        metrics.incr('sourcemaps.release_file.cache', tags={'result': 'hit'}, skip_internal=True)
         # Previous caches would be a 3-tuple instead of a 4-tuple,
         # so this is being maintained for backwards compatibility
         try:
@@ -276,7 +343,8 @@ def fetch_release_file(filename, release, dist=None):
     return result
 
 
-def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
+def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True,
+               releasefile_candidates=None):
     """
     Pull down a URL, returning a UrlResult object.
 
@@ -293,7 +361,7 @@ def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
         )
     if release:
         with metrics.timer('sourcemaps.release_file'):
-            result = fetch_release_file(url, release, dist)
+            result = fetch_release_file(url, release, dist, candidates=releasefile_candidates)
     else:
         result = None
 
@@ -403,7 +471,51 @@ def get_max_age(headers):
     return min(max_age, CACHE_CONTROL_MAX)
 
 
-def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True):
+_parsed_file_cache = None
+
+
+def get_parsed_file_cache():
+    """Returns the worker wide cache of parsed files, or `None` if it is
+    disabled."""
+    global _parsed_file_cache
+    max_size = getattr(settings, 'SENTRY_SOURCE_PARSED_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+    if _parsed_file_cache is None or _parsed_file_cache.max_size != max_size:
+        _parsed_file_cache = ParsedFileCache(max_size)
+    return _parsed_file_cache
+
+
+def get_parsed_file_key(kind, url, body, release=None, dist=None):
+    return (
+        kind,
+        release.id if release else None,
+        dist.name if dist else None,
+        url,
+        hashlib.sha1(body).hexdigest(),
+    )
+
+
+def get_source_view(result, release=None, dist=None):
+    """Returns the `SourceView` of a fetched file, reusing views of files
+    with the same contents that were parsed for earlier events."""
+    parsed_cache = get_parsed_file_cache()
+    if parsed_cache is None:
+        return make_source_view(result.body, result.encoding)
+
+    key = get_parsed_file_key('source', result.url, result.body, release, dist)
+    source_view = parsed_cache.get(key)
+    if source_view is not None:
+        metrics.incr('sourcemaps.parsed_cache.hit', tags={'type': 'source'}, skip_internal=True)
+        return source_view
+
+    source_view = make_source_view(result.body, result.encoding)
+    parsed_cache.add(key, source_view, len(result.body))
+    return source_view
+
+
+def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True,
+                    releasefile_candidates=None):
     if is_data_uri(url):
         try:
             body = base64.b64decode(
@@ -416,11 +528,23 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             })
     else:
         result = fetch_file(
-            url, project=project, release=release, dist=dist, allow_scraping=allow_scraping
+            url, project=project, release=release, dist=dist, allow_scraping=allow_scraping,
+            releasefile_candidates=releasefile_candidates,
         )
         body = result.body
+
+    parsed_cache = get_parsed_file_cache()
+    if parsed_cache is not None:
+        key = get_parsed_file_key(
+            'sourcemap', '<base64>' if is_data_uri(url) else url, body, release, dist)
+        sourcemap_view = parsed_cache.get(key)
+        if sourcemap_view is not None:
+            metrics.incr('sourcemaps.parsed_cache.hit', tags={'type': 'sourcemap'},
+                         skip_internal=True)
+            return sourcemap_view
+
     try:
-        return SourceMapView.from_json_bytes(body)
+        sourcemap_view = SourceMapView.from_json_bytes(body)
     except Exception as exc:
         # This is in debug because the product shows an error already.
         logger.debug(six.text_type(exc), exc_info=True)
@@ -428,6 +552,46 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             'url': http.expose_url(url),
         })
 
+    if parsed_cache is not None:
+        parsed_cache.add(key, sourcemap_view, len(body))
+    return sourcemap_view
+
+
+class SourceFetchExecutor(ThreadedExecutor):
+    """A thread pool for fetching sources.  Database connections opened by a
+    task are closed once it is done, like Django does at the end of a
+    request, as the threads outlive the events they fetch files for."""
+
+    def submit(self, callable, *args, **kwargs):
+        def run():
+            try:
+                return callable()
+            finally:
+                connections.close_all()
+        return super(SourceFetchExecutor, self).submit(run, *args, **kwargs)
+
+
+_fetch_executor = None
+_fetch_executor_pid = None
+_fetch_executor_lock = threading.Lock()
+
+
+def get_fetch_executor():
+    """Returns the executor that fetches the files of an event.  Its threads
+    are shared by all events of a worker process."""
+    global _fetch_executor, _fetch_executor_pid
+    worker_count = getattr(settings, 'SENTRY_SOURCE_FETCH_WORKERS', 1)
+    if worker_count <= 1:
+        return SynchronousExecutor()
+
+    # Threads do not survive a fork, so forked processes need their own.
+    pid = os.getpid()
+    with _fetch_executor_lock:
+        if _fetch_executor is None or _fetch_executor_pid != pid:
+            _fetch_executor = SourceFetchExecutor(worker_count=worker_count)
+            _fetch_executor_pid = pid
+        return _fetch_executor
+
 
 def is_data_uri(url):
     return url[:BASE64_PREAMBLE_LENGTH] == BASE64_SOURCEMAP_PREAMBLE
@@ -766,17 +930,21 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         return self.cache.get(filename)
 
     def cache_source(self, filename):
-        sourcemaps = self.sourcemaps
-        cache = self.cache
-
         self.fetch_count += 1
 
         if self.fetch_count > self.max_fetches:
-            cache.add_error(filename, {
+            self.cache.add_error(filename, {
                 'type': EventError.JS_TOO_MANY_REMOTE_SOURCES,
             })
             return
 
+        sourcemap_url = self._add_source(filename, *self._fetch_source(filename))
+        if sourcemap_url is not None:
+            self._add_sourcemap([filename], sourcemap_url, *self._fetch_sourcemap(sourcemap_url))
+
+    def _fetch_source(self, filename, releasefile_candidates=None):
+        """Fetches and parses a file.  This might run in a thread of the fetch
+        executor, so it must not touch the state of the processor."""
         # TODO: respect cache-control/max-age headers to some extent
         logger.debug('Fetching remote source %r', filename)
         try:
@@ -785,25 +953,36 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 project=self.project,
                 release=self.release,
                 dist=self.dist,
-                allow_scraping=self.allow_scraping
+                allow_scraping=self.allow_scraping,
+                releasefile_candidates=releasefile_candidates,
             )
         except http.BadSource as exc:
-            cache.add_error(filename, exc.data)
-            return
+            return None, None, exc.data
 
-        cache.add(filename, result.body, result.encoding)
-        cache.alias(result.url, filename)
+        return result, get_source_view(result, self.release, self.dist), None
+
+    def _add_source(self, filename, result, source_view, error):
+        """Adds a fetched file to the cache and returns the URL of its
+        sourcemap if that still needs to be fetched."""
+        if error is not None:
+            self.cache.add_error(filename, error)
+            return None
+
+        self.cache.add(filename, source_view)
+        self.cache.alias(result.url, filename)
 
         sourcemap_url = discover_sourcemap(result)
         if not sourcemap_url:
-            return
+            return None
 
         logger.debug('Found sourcemap %r for minified script %r', sourcemap_url[:256], result.url)
-        sourcemaps.link(filename, sourcemap_url)
-        if sourcemap_url in sourcemaps:
-            return
+        self.sourcemaps.link(filename, sourcemap_url)
+        if sourcemap_url in self.sourcemaps:
+            return None
+        return sourcemap_url
 
-        # pull down sourcemap
+    def _fetch_sourcemap(self, sourcemap_url, releasefile_candidates=None):
+        """Fetches and parses a sourcemap, see `_fetch_source`."""
         try:
             sourcemap_view = fetch_sourcemap(
                 sourcemap_url,
@@ -811,12 +990,19 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 release=self.release,
                 dist=self.dist,
                 allow_scraping=self.allow_scraping,
+                releasefile_candidates=releasefile_candidates,
             )
         except http.BadSource as exc:
-            cache.add_error(filename, exc.data)
+            return None, exc.data
+        return sourcemap_view, None
+
+    def _add_sourcemap(self, filenames, sourcemap_url, sourcemap_view, error):
+        if error is not None:
+            for filename in filenames:
+                self.cache.add_error(filename, error)
             return
 
-        sourcemaps.add(sourcemap_url, sourcemap_view)
+        self.sourcemaps.add(sourcemap_url, sourcemap_view)
 
         # cache any inlined sources
         for src_id, source_name in sourcemap_view.iter_sources():
@@ -827,10 +1013,20 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                     source_view
                 )
 
+    def _get_releasefile_candidates(self, filenames):
+        if self.release is None:
+            return {}
+        return get_release_file_candidates(
+            [f for f in filenames if not is_data_uri(f)], self.release, self.dist)
+
     def populate_source_cache(self, frames):
         """
         Fetch all sources that we know are required (being referenced directly
         in frames).
+
+        Files are fetched concurrently by the fetch executor, first all
+        sources and then all of their sourcemaps.  The release artifacts of
+        each batch are looked up with a single query.
         """
         pending_file_list = set()
         for f in frames:
@@ -849,10 +1045,44 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 continue
             pending_file_list.add(f['abs_path'])
 
-        for idx, filename in enumerate(pending_file_list):
-            self.cache_source(
-                filename=filename,
-            )
+        filenames = []
+        for filename in pending_file_list:
+            self.fetch_count += 1
+            if self.fetch_count > self.max_fetches:
+                self.cache.add_error(filename, {
+                    'type': EventError.JS_TOO_MANY_REMOTE_SOURCES,
+                })
+            else:
+                filenames.append(filename)
+
+        if not filenames:
+            return
+
+        executor = get_fetch_executor()
+
+        candidates = self._get_releasefile_candidates(filenames)
+        futures = [
+            (filename, executor.submit(
+                partial(self._fetch_source, filename, candidates.get(filename))))
+            for filename in filenames
+        ]
+
+        # The same sourcemap might be referenced by several files.
+        pending_sourcemaps = OrderedDict()
+        for filename, future in futures:
+            sourcemap_url = self._add_source(filename, *future.result())
+            if sourcemap_url is not None:
+                pending_sourcemaps.setdefault(sourcemap_url, []).append(filename)
+
+        candidates = self._get_releasefile_candidates(pending_sourcemaps)
+        futures = [
+            (sourcemap_url, executor.submit(
+                partial(self._fetch_sourcemap, sourcemap_url, candidates.get(sourcemap_url))))
+            for sourcemap_url in pending_sourcemaps
+        ]
+
+        for sourcemap_url, future in futures:
+            self._add_sourcemap(pending_sourcemaps[sourcemap_url], sourcemap_url, *future.result())
 
     def close(self):
         StacktraceProcessor.close(self)
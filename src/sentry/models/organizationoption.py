@@ -50,7 +50,7 @@ class OrganizationOptionManager(BaseManager):
         except self.model.DoesNotExist:
             return
         inst.delete()
-        self.reload_cache(organization.id)
+        self._options_changed(organization.id)
 
     def set_value(self, organization, key, value):
         self.create_or_update(
@@ -60,7 +60,7 @@ class OrganizationOptionManager(BaseManager):
                 'value': value,
             },
         )
-        self.reload_cache(organization.id)
+        self._options_changed(organization.id)
 
     def get_all_values(self, organization):
         if isinstance(organization, models.Model):
@@ -87,11 +87,17 @@ class OrganizationOptionManager(BaseManager):
         self.__cache[organization_id] = result
         return result
 
+    def _options_changed(self, organization_id):
+        from sentry.relay import projectconfig_cache
+
+        self.reload_cache(organization_id)
+        projectconfig_cache.invalidate(organization_id=organization_id)
+
     def post_save(self, instance, **kwargs):
-        self.reload_cache(instance.organization_id)
+        self._options_changed(instance.organization_id)
 
     def post_delete(self, instance, **kwargs):
-        self.reload_cache(instance.organization_id)
+        self._options_changed(instance.organization_id)
 
     def contribute_to_class(self, model, name):
         super(OrganizationOptionManager, self).contribute_to_class(model, name)
@@ -1,9 +1,13 @@
 from __future__ import absolute_import
 
+from uuid import uuid4
+
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from six.moves.urllib.parse import urlsplit, urlunsplit
 
 from sentry.db.models import BoundedPositiveIntegerField, FlexibleForeignKey, Model, sane_repr
+from sentry.utils.cache import cache
 from sentry.utils.hashlib import sha1_text
 
 
@@ -48,6 +52,29 @@ class ReleaseFile(Model):
             )
         return super(ReleaseFile, self).update(*args, **kwargs)
 
+    @classmethod
+    def get_cache_version_key(cls, release_id):
+        return 'releasefile:version:%s' % (release_id, )
+
+    @classmethod
+    def get_cache_version(cls, release_id):
+        """
+        Returns the version that cached lookups of the release's files must
+        be keyed by.  It changes whenever a file of the release is added,
+        changed or removed.
+        """
+        cache_key = cls.get_cache_version_key(release_id)
+        version = cache.get(cache_key)
+        if version is None:
+            version = uuid4().hex
+            if not cache.add(cache_key, version, 86400):
+                version = cache.get(cache_key) or version
+        return version
+
+    @classmethod
+    def bump_cache_version(cls, release_id):
+        cache.set(cls.get_cache_version_key(release_id), uuid4().hex, 86400)
+
     @classmethod
     def get_ident(cls, name, dist=None):
         if dist is not None:
@@ -77,3 +104,11 @@ class ReleaseFile(Model):
         if query:
             urls.append('~' + urlunsplit(uri_relative_without_query))
         return urls
+
+
+def _bump_cache_version(instance, **kwargs):
+    ReleaseFile.bump_cache_version(instance.release_id)
+
+
+post_save.connect(_bump_cache_version, sender=ReleaseFile, weak=False)
+post_delete.connect(_bump_cache_version, sender=ReleaseFile, weak=False)
@@ -12,7 +12,7 @@ from sentry.utils.services import Service
 class NodeStorage(local, Service):
     __all__ = (
         'create', 'delete', 'delete_multi', 'get', 'get_multi', 'set', 'set_multi', 'generate_id',
-        'cleanup', 'validate'
+        'cleanup', 'get_cleanup_partitions', 'cleanup_partition', 'validate'
     )
 
     def create(self, data):
@@ -77,3 +77,17 @@ class NodeStorage(local, Service):
 
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
+
+    def get_cleanup_partitions(self, cutoff_timestamp):
+        """
+        Returns partitions of the nodes older than ``cutoff_timestamp`` which
+        can be deleted independently of each other (e.g. by multiple
+        processes) with ``cleanup_partition``.
+
+        >>> for partition in nodestore.get_cleanup_partitions(cutoff):
+        >>>     nodestore.cleanup_partition(partition)
+        """
+        raise NotImplementedError
+
+    def cleanup_partition(self, partition):
+        raise NotImplementedError
@@ -2,13 +2,24 @@ from __future__ import absolute_import
 
 import math
 
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Min
 from django.utils import timezone
+from six.moves import xrange
 
 from sentry.db.models import create_or_update
 from sentry.nodestore.base import NodeStorage
+from sentry.utils.dates import to_datetime, to_timestamp
+from sentry.utils.db import is_postgres
+from sentry.utils.redis import clusters
 
 from .models import Node
 
+# Checkpoints of a partitioned cleanup are kept this long (in seconds). A
+# partition whose checkpoint expired is scanned from its start again.
+CLEANUP_CHECKPOINT_TTL = 7 * 24 * 60 * 60
+
 
 class DjangoNodeStorage(NodeStorage):
     def delete(self, id):
@@ -47,3 +58,69 @@ class DjangoNodeStorage(NodeStorage):
             dtfield='timestamp',
             days=days,
         ).execute()
+
+    # Size (in seconds) of the partitions returned by
+    # ``get_cleanup_partitions``. They are aligned to multiples of it, so the
+    # partitions (and their checkpoints) of consecutive cleanups line up.
+    cleanup_partition_size = 3600
+
+    def get_cleanup_partitions(self, cutoff_timestamp):
+        if not is_postgres(router.db_for_write(Node)):
+            raise NotImplementedError
+
+        oldest = Node.objects.filter(
+            timestamp__lt=cutoff_timestamp,
+        ).aggregate(Min('timestamp'))['timestamp__min']
+        if oldest is None:
+            return []
+
+        size = self.cleanup_partition_size
+        cutoff = int(to_timestamp(cutoff_timestamp))
+        start = int(to_timestamp(oldest)) // size * size
+        return [(ts, min(ts + size, cutoff)) for ts in xrange(start, cutoff, size)]
+
+    def cleanup_partition(self, partition, chunk_size=10000):
+        """
+        Deletes the nodes of a partition (a ``(start, end)`` range of POSIX
+        timestamps) oldest first in chunks of ``chunk_size``. After every chunk
+        the timestamp up to which the partition has been deleted is stored in
+        Redis, and a later cleanup of the same partition continues from there
+        instead of scanning the index entries of the deleted rows again.
+        """
+        start, end = partition
+
+        cluster_key = getattr(settings, 'SENTRY_NODESTORE_CLEANUP_REDIS_CLUSTER', 'default')
+        checkpoint_key = u'nodestore:cleanup:{}'.format(start)
+        client = clusters.get(cluster_key).get_local_client_for_key(checkpoint_key)
+
+        checkpoint = client.get(checkpoint_key)
+        position = max(start, int(checkpoint)) if checkpoint is not None else start
+
+        using = router.db_for_write(Node)
+        quote_name = connections[using].ops.quote_name
+        query = u"""
+            delete from {table}
+            where id = any(array(
+                select id
+                from {table}
+                where {dtfield} >= %s and {dtfield} < %s
+                order by {dtfield}
+                limit %s
+            ))
+            returning {dtfield}
+        """.format(
+            table=quote_name(Node._meta.db_table),
+            dtfield=quote_name('timestamp'),
+        )
+
+        cursor = connections[using].cursor()
+        while position < end:
+            cursor.execute(query, [to_datetime(position), to_datetime(end), chunk_size])
+            timestamps = [ts for ts, in cursor.fetchall()]
+            if not timestamps:
+                position = end
+            else:
+                # Rows with the same (whole) second as the newest deleted one
+                # might be left, they are picked up by the next chunk.
+                position = max(position, int(to_timestamp(max(timestamps))))
+            client.setex(checkpoint_key, CLEANUP_CHECKPOINT_TTL, position)
@@ -167,6 +167,21 @@ register('store.projects-normalize-in-rust-percent-opt-in', default=0.0)  # unus
 # From 0.0 to 1.0: Randomly disable normalization code in interfaces when loading from db
 register('store.empty-interface-sample-rate', default=0.0)
 
+# Number of events saved per ``save_event_batch`` task. Values below 2
+# disable batching and save every event in its own task.
+register('store.save-event-batch-size', default=0)
+# Seconds to wait for more events before saving an incomplete batch.
+register('store.save-event-batch-delay', default=1)
+# Platforms of events that are saved right away by ``preprocess_event`` if
+# they need no processing, instead of in a separate task. ``*`` enables
+# this for all platforms.
+register('store.inline-save-platforms', type=Sequence, default=[])
+
+# Digests
+# Number of ready timelines delivered per ``deliver_digests`` task. Values
+# below 2 deliver every timeline in its own ``deliver_digest`` task.
+register('digests.delivery-batch-size', default=0)
+
 # Symbolicator refactors
 # - Disabling minidump stackwalking in endpoints
 register('symbolicator.minidump-refactor-projects-opt-in', type=Sequence, default=[])  # unused
@@ -186,3 +201,9 @@ register('post-process.error-hook-sample-rate', default=0.0)  # unused
 # Transaction events
 # True => kill switch to disable ingestion of transaction events for internal project.
 register('transaction-events.force-disable-internal-project', default=False)
+
+# Similarity indexing
+# Events of a group are always indexed until the group has been seen this
+# many times, after that only the given fraction (0.0 to 1.0) of them is.
+register('similarity.index-sample-after', default=100)
+register('similarity.index-sample-rate', default=1.0)
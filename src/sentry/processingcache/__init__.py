@@ -0,0 +1,11 @@
+from __future__ import absolute_import
+
+__all__ = ['processing_cache']
+
+from django.conf import settings
+
+from sentry.utils.imports import import_string
+
+
+processing_cache = import_string(settings.SENTRY_PROCESSING_CACHE)(
+    **settings.SENTRY_PROCESSING_CACHE_OPTIONS)
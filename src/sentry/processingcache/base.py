@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+
+import zlib
+
+from sentry.utils import json, metrics
+
+
+class BaseProcessingCache(object):
+    """
+    Holds the payloads of events while they pass through the store tasks.
+
+    Payloads are stored as JSON, compressed with zlib if a
+    ``compression_level`` is configured. Both formats are always understood
+    when reading (zlib streams never start with ``{``), so compression can
+    be switched on and off at any time. It should only be switched on once
+    all workers run a version that uses this cache.
+
+    The size of the payloads and the time spent encoding and decoding them
+    are recorded per ``stage``.
+    """
+
+    def __init__(self, inner, compression_level=0):
+        self.inner = inner
+        self.compression_level = compression_level
+
+    def _encode(self, encoded, stage):
+        stored = encoded
+        if self.compression_level:
+            if not isinstance(encoded, bytes):
+                encoded = encoded.encode('utf-8')
+            with metrics.timer('events.processing_cache.compress', tags={'stage': stage}):
+                stored = zlib.compress(encoded, self.compression_level)
+        metrics.timing('events.processing_cache.size.raw', len(encoded), tags={'stage': stage})
+        metrics.timing('events.processing_cache.size.stored', len(stored), tags={'stage': stage})
+        return stored
+
+    def _decode(self, value, stage):
+        if value is None:
+            return None
+        # Written by a cache backend that keeps objects as they are.
+        if not isinstance(value, (bytes, type(u''))):
+            return value
+        with metrics.timer('events.processing_cache.decode', tags={'stage': stage}):
+            if value[:1] not in (b'{', u'{'):
+                value = zlib.decompress(value)
+            return json.loads(value)
+
+    def set(self, key, data, timeout, stage=None):
+        with metrics.timer('events.processing_cache.encode', tags={'stage': stage}):
+            encoded = json.dumps(data)
+        self.set_encoded(key, encoded, timeout, stage=stage)
+
+    def set_encoded(self, key, encoded, timeout, stage=None):
+        """
+        Stores a payload that is already encoded as JSON.
+        """
+        self.inner.set(key, self._encode(encoded, stage), timeout, raw=True)
+
+    def get(self, key, stage=None):
+        return self._decode(self.inner.get(key, raw=True), stage)
+
+    def get_many(self, keys, stage=None):
+        return {
+            key: self._decode(value, stage)
+            for key, value in self.inner.get_many(keys, raw=True).items()
+        }
+
+    def delete(self, key):
+        self.inner.delete(key)
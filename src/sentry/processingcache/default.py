@@ -0,0 +1,10 @@
+from __future__ import absolute_import
+
+from sentry.cache import default_cache
+
+from .base import BaseProcessingCache
+
+
+class DefaultProcessingCache(BaseProcessingCache):
+    def __init__(self, **options):
+        super(DefaultProcessingCache, self).__init__(default_cache, **options)
@@ -0,0 +1,29 @@
+from __future__ import absolute_import
+
+from django.conf import settings
+
+from sentry.cache.redis import RedisClusterCache, RbCache
+from .base import BaseProcessingCache
+
+
+class RedisClusterProcessingCache(BaseProcessingCache):
+    def __init__(self, **options):
+        compression_level = options.pop('compression_level', 0)
+        cluster_id = options.pop('cluster_id', None)
+        if cluster_id is None:
+            cluster_id = getattr(
+                settings,
+                'SENTRY_PROCESSING_CACHE_REDIS_CLUSTER',
+                'rc-short'
+            )
+        BaseProcessingCache.__init__(self,
+                                     inner=RedisClusterCache(cluster_id, **options),
+                                     compression_level=compression_level)
+
+
+class RbProcessingCache(BaseProcessingCache):
+    def __init__(self, **options):
+        compression_level = options.pop('compression_level', 0)
+        BaseProcessingCache.__init__(self,
+                                     inner=RbCache(**options),
+                                     compression_level=compression_level)
@@ -54,8 +54,11 @@ class ProjectOptionsManager(object):
 
     def set(self, project, key, value):
         from sentry.models import ProjectOption
+        rv = ProjectOption.objects.set_value(project, key, value)
+        # bumped after the change so that nobody caches the old config
+        # under the new revision
         self.update_rev_for_option(project)
-        return ProjectOption.objects.set_value(project, key, value)
+        return rv
 
     def isset(self, project, key):
         return project.get_option(project, key, Ellipsis) is not Ellipsis
@@ -67,17 +70,20 @@ class ProjectOptionsManager(object):
 
     def delete(self, project, key):
         from sentry.models import ProjectOption
+        rv = ProjectOption.objects.unset_value(project, key)
         self.update_rev_for_option(project)
-        return ProjectOption.objects.unset_value(project, key)
+        return rv
 
     def update_rev_for_option(self, project):
         from sentry.models import ProjectOption
+        from sentry.relay import projectconfig_cache
         ProjectOption.objects.set_value(project, 'sentry:relay-rev', uuid.uuid4().hex)
         ProjectOption.objects.set_value(
             project,
             'sentry:relay-rev-lastchange',
             datetime.utcnow().replace(
                 tzinfo=utc))
+        projectconfig_cache.invalidate(project_id=project.id)
 
     def register(
         self,
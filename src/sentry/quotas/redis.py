@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import functools
 import six
+import threading
 
 from time import time
 
@@ -10,6 +11,7 @@ from sentry.quotas.base import NotRateLimited, Quota, RateLimited
 from sentry.utils.redis import get_cluster_from_options, load_script
 
 is_rate_limited = load_script('quotas/is_rate_limited.lua')
+lease = load_script('quotas/lease.lua')
 
 
 class BasicRedisQuota(object):
@@ -33,10 +35,21 @@ class RedisQuota(Quota):
     #: metrics may not be in sync with the computer running this code.
     grace = 60
 
+    #: Number of decisions kept locally before expired ones are pruned.
+    max_local_entries = 1000
+
     def __init__(self, **options):
         self.cluster, options = get_cluster_from_options('SENTRY_QUOTA_OPTIONS', options)
+        #: The maximum number of events reserved in Redis at once by a
+        #: process, see ``is_rate_limited``.
+        self.lease_size = int(options.pop('lease_size', 1))
         super(RedisQuota, self).__init__(**options)
         self.namespace = 'quota'
+        self._lock = threading.Lock()
+        # (keys, limits) -> (valid until, rejections)
+        self._rejections = {}
+        # (keys, limits) -> number of reserved events
+        self._leases = {}
 
     def validate(self):
         try:
@@ -154,11 +167,79 @@ class RedisQuota(Quota):
 
         pipe.execute()
 
+        # Remembered rejections might not hold anymore.
+        with self._lock:
+            self._rejections.clear()
+
     def get_next_period_start(self, interval, shift, timestamp):
         """Return the timestamp when the next rate limit period begins for an interval."""
         return (((timestamp - shift) // interval) + 1) * interval + shift
 
+    def _prune(self, entries, timestamp):
+        if len(entries) > self.max_local_entries:
+            for cache_key, (until, _) in list(six.iteritems(entries)):
+                if until <= timestamp:
+                    del entries[cache_key]
+
+    def _get_rate_limit(self, project, quotas, rejections, timestamp):
+        if any(rejections):
+            enforce = False
+            worst_case = (0, None)
+            for quota, rejected in zip(quotas, rejections):
+                if not rejected:
+                    continue
+                if quota.enforce:
+                    enforce = True
+                    shift = project.organization_id % quota.window
+                    delay = self.get_next_period_start(quota.window, shift, timestamp) - timestamp
+                    if delay > worst_case[0]:
+                        worst_case = (delay, quota.reason_code)
+            if enforce:
+                return RateLimited(
+                    retry_after=worst_case[0],
+                    reason_code=worst_case[1],
+                )
+        return NotRateLimited()
+
+    def _acquire(self, client, cache_key, keys, args, limits, timestamp, until):
+        """
+        Takes an event from the events reserved by this process, reserving
+        more in Redis if needed. Returns the rejections by quota.
+        """
+        with self._lock:
+            leased = self._leases.get(cache_key)
+            if leased is not None and leased[1] > 0:
+                self._leases[cache_key] = (leased[0], leased[1] - 1)
+                return [False] * len(limits)
+
+        # Reserve at most 1% of the smallest limit, so that events reserved
+        # but not used by other processes cannot block a quota noticeably.
+        size = max(1, min(self.lease_size, min(limits) // 100))
+        result = lease(client, keys, list(args) + [size])
+        granted = int(result[0])
+        if granted:
+            with self._lock:
+                self._prune(self._leases, timestamp)
+                leased = self._leases.get(cache_key, (until, 0))
+                self._leases[cache_key] = (until, leased[1] + granted - 1)
+        return result[1:]
+
     def is_rate_limited(self, project, key=None, timestamp=None):
+        """
+        Checks and counts an event against the quotas of the project and key.
+
+        Rejections are remembered in the process until the window of the
+        rejecting quota ends, so events for projects over their quota are
+        rejected without asking Redis. Events refunded in the meantime are
+        only taken into account after that.
+
+        If ``lease_size`` is configured, up to that many events (but at most
+        1% of the quota) are counted in Redis at once and subsequently
+        accepted by the process on its own. As these are counted before they
+        arrive, the usage of a quota can be overestimated and events rejected
+        early by up to ``lease_size - 1`` events per process and project key
+        until the window ends.
+        """
         if timestamp is None:
             timestamp = time()
 
@@ -178,23 +259,32 @@ class RedisQuota(Quota):
             expiry = self.get_next_period_start(quota.window, shift, timestamp) + self.grace
             args.extend((quota.limit, int(expiry)))
 
+        # The keys contain the current windows, so decisions are not reused
+        # once a window is over.
+        limits = tuple(quota.limit for quota in quotas)
+        cache_key = (tuple(keys), limits, tuple(quota.enforce for quota in quotas))
+
+        rejected = self._rejections.get(cache_key)
+        if rejected is not None and rejected[0] > timestamp:
+            return self._get_rate_limit(project, quotas, rejected[1], timestamp)
+
         client = self.cluster.get_local_client_for_key(six.text_type(project.organization_id))
-        rejections = is_rate_limited(client, keys, args)
+        if self.lease_size > 1:
+            until = min(args[1::2]) - self.grace
+            rejections = self._acquire(client, cache_key, keys, args, limits, timestamp, until)
+        else:
+            rejections = is_rate_limited(client, keys, args)
+
         if any(rejections):
-            enforce = False
-            worst_case = (0, None)
-            for quota, rejected in zip(quotas, rejections):
-                if not rejected:
-                    continue
-                if quota.enforce:
-                    enforce = True
-                    shift = project.organization_id % quota.window
-                    delay = self.get_next_period_start(quota.window, shift, timestamp) - timestamp
-                    if delay > worst_case[0]:
-                        worst_case = (delay, quota.reason_code)
-            if enforce:
-                return RateLimited(
-                    retry_after=worst_case[0],
-                    reason_code=worst_case[1],
-                )
-        return NotRateLimited()
+            # No event is let through until one of the rejecting quotas
+            # starts over.
+            until = min(
+                self.get_next_period_start(
+                    quota.window, project.organization_id % quota.window, timestamp)
+                for quota, rejected in zip(quotas, rejections) if rejected
+            )
+            with self._lock:
+                self._prune(self._rejections, timestamp)
+                self._rejections[cache_key] = (until, list(rejections))
+
+        return self._get_rate_limit(project, quotas, rejections, timestamp)
@@ -3,10 +3,46 @@ from __future__ import absolute_import
 from sentry.utils.services import Service
 
 
+class RateLimitResult(object):
+    __slots__ = ['is_limited', 'remaining', 'retry_after', 'reset_time']
+
+    def __init__(self, is_limited, remaining=None, retry_after=None, reset_time=None):
+        self.is_limited = is_limited
+        # number of requests that are still allowed right now
+        self.remaining = remaining
+        # delta of seconds in the future until a request is allowed again
+        self.retry_after = retry_after
+        # timestamp at which all requests of the limit are available again
+        self.reset_time = reset_time
+
+    def __repr__(self):
+        return '<RateLimitResult is_limited=%r remaining=%r retry_after=%r reset_time=%r>' % (
+            self.is_limited, self.remaining, self.retry_after, self.reset_time,
+        )
+
+
 class RateLimiter(Service):
-    __all__ = ('is_limited', 'validate')
+    __all__ = ('is_limited', 'check', 'check_many', 'validate')
 
     window = 60
 
     def is_limited(self, key, limit, project=None, window=None):
         return False
+
+    def check(self, key, limit, project=None, window=None):
+        """
+        Like ``is_limited`` but returns a ``RateLimitResult`` which also
+        describes the remaining allowance if the backend supports it.
+        """
+        return self.check_many([(key, limit, window)], project=project)[0]
+
+    def check_many(self, limits, project=None):
+        """
+        Checks and counts a request against a list of ``(key, limit,
+        window)`` rate limits at once. Every limit is checked (and counted)
+        on its own. Returns a ``RateLimitResult`` for each of them.
+        """
+        return [
+            RateLimitResult(self.is_limited(key, limit, project=project, window=window))
+            for key, limit, window in limits
+        ]
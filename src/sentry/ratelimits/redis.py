@@ -4,10 +4,14 @@ import six
 
 from time import time
 
+from collections import defaultdict
+
 from sentry.exceptions import InvalidConfiguration
-from sentry.ratelimits.base import RateLimiter
+from sentry.ratelimits.base import RateLimiter, RateLimitResult
 from sentry.utils.hashlib import md5_text
-from sentry.utils.redis import get_cluster_from_options
+from sentry.utils.redis import get_cluster_from_options, load_script
+
+gcra = load_script('ratelimits/gcra.lua')
 
 
 class RedisRateLimiter(RateLimiter):
@@ -40,3 +44,60 @@ class RedisRateLimiter(RateLimiter):
             client.expire(key, window)
 
         return result.value > limit
+
+
+class RedisGCRARateLimiter(RedisRateLimiter):
+    """
+    A rate limiter using the generic cell rate algorithm, which spreads the
+    allowed requests evenly over the window instead of resetting a counter
+    at fixed window boundaries. Up to ``limit`` requests are allowed in a
+    burst, after that one more every ``window / limit`` seconds.
+
+    All limits that are stored on the same Redis host are checked with a
+    single script call.
+    """
+
+    def _make_key(self, key, project, window):
+        key_hex = md5_text(key).hexdigest()
+        if project:
+            return 'rlg:%s:%s:%s' % (key_hex, project.id, window)
+        return 'rlg:%s:%s' % (key_hex, window)
+
+    def is_limited(self, key, limit, project=None, window=None):
+        return self.check(key, limit, project=project, window=window).is_limited
+
+    def check_many(self, limits, project=None, timestamp=None):
+        if timestamp is None:
+            timestamp = time()
+
+        now = int(timestamp * 1000)
+        router = self.cluster.get_router()
+        results = [None] * len(limits)
+        checks_by_host = defaultdict(list)
+        for index, (key, limit, window) in enumerate(limits):
+            if window is None:
+                window = self.window
+            if limit <= 0:
+                results[index] = RateLimitResult(True, remaining=0)
+                continue
+            redis_key = self._make_key(key, project, window)
+            checks_by_host[router.get_host_for_key(redis_key)].append(
+                (index, redis_key, limit, window))
+
+        for host_id, checks in six.iteritems(checks_by_host):
+            keys = []
+            args = [now]
+            for _, redis_key, limit, window in checks:
+                keys.append(redis_key)
+                args.extend((window * 1000.0 / limit, window * 1000))
+
+            client = self.cluster.get_local_client(host_id)
+            for (index, _, _, _), (limited, remaining, retry_after, reset_after) \
+                    in zip(checks, gcra(client, keys, args)):
+                results[index] = RateLimitResult(
+                    is_limited=bool(limited),
+                    remaining=int(remaining),
+                    retry_after=retry_after / 1000.0,
+                    reset_time=(now + reset_after) / 1000.0,
+                )
+        return results
@@ -1,8 +1,21 @@
 from __future__ import absolute_import
 
-from sentry import features as feature_flags
+import random
+
+from sentry import features as feature_flags, options
 from sentry.signals import event_processed
 from sentry.similarity import features as similarity_features
+from sentry.similarity.batching import get_batcher
+
+
+def should_record(event):
+    """
+    Busy groups only have a sample of their events recorded, as they would
+    mostly rewrite the same buckets of the index over and over again.
+    """
+    if event.group.times_seen <= options.get('similarity.index-sample-after'):
+        return True
+    return random.random() < options.get('similarity.index-sample-rate')
 
 
 @event_processed.connect(weak=False)
@@ -10,4 +23,11 @@ def record(project, event, **kwargs):
     if not feature_flags.has('projects:similarity-indexing', project):
         return
 
-    similarity_features.record([event])
+    if event.group_id is None or not should_record(event):
+        return
+
+    batcher = get_batcher()
+    if batcher is not None:
+        batcher.add(event)
+    else:
+        similarity_features.record([event])
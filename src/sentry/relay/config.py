@@ -21,6 +21,7 @@ from sentry.utils.data_filters import FilterTypes, FilterStatKeys
 from sentry.utils.http import get_origins
 from sentry.utils.outcomes import track_outcome, Outcome
 from sentry.models.projectkey import ProjectKey
+from sentry.relay import projectconfig_cache
 from sentry.utils.sdk import configure_scope
 
 
@@ -171,6 +172,19 @@ def get_project_config(project_id, full_config=True, for_store=False):
     return ProjectConfig(project, **cfg)
 
 
+def get_cached_project_config(project_id):
+    """
+    Returns the ProjectConfig needed by the store endpoint like
+    ``get_project_config(project_id, for_store=True)``, from the process
+    local cache if possible.
+
+    The returned object (including its project) is shared and must not be
+    modified.
+    """
+    return projectconfig_cache.get_or_create(
+        project_id, lambda: get_project_config(project_id, for_store=True))
+
+
 class _ConfigBase(object):
     """
     Base class for configuration objects
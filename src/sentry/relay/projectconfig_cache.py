@@ -0,0 +1,203 @@
+"""
+sentry.relay.projectconfig_cache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+A process local cache of the ``ProjectConfig`` objects used by the store
+endpoint, so that authenticating and configuring an event of a busy project
+does not need any database or cache round-trips.
+
+Entries expire after ``SENTRY_PROJECT_CONFIG_CACHE_TTL`` seconds and at most
+``SENTRY_PROJECT_CONFIG_CACHE_SIZE`` configs are kept per process. Whenever
+the relay revision of a project is bumped (project options or the project
+itself changed) or an option of its organization changes, an invalidation is
+published through Redis and every process drops its copy. If the connection
+to Redis is lost all entries are dropped since invalidations might have
+been missed.
+
+The cache is disabled unless ``SENTRY_PROJECT_CONFIG_CACHE_REDIS_CLUSTER``
+names a Redis cluster.
+"""
+
+from __future__ import absolute_import
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import six
+from django.conf import settings
+
+from sentry.utils.redis import clusters
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'relay:projectconfig:invalidate'
+
+# Maximum number of configs that are kept per process.
+DEFAULT_SIZE = 1000
+
+# Maximum age of a config, this bounds how long changes that are not
+# published (or whose invalidation got lost) take to become visible.
+DEFAULT_TTL = 60
+
+
+def _get_cluster():
+    cluster_key = getattr(settings, 'SENTRY_PROJECT_CONFIG_CACHE_REDIS_CLUSTER', None)
+    if cluster_key is None:
+        return None
+    return clusters.get(cluster_key)
+
+
+def _get_client():
+    cluster = _get_cluster()
+    if cluster is None:
+        return None
+    # All processes need to talk to the same host for pub/sub.
+    return cluster.get_local_client(0)
+
+
+class ProjectConfigCache(object):
+    """A thread-safe LRU of project configs with a time to live."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._listener_pid = None
+        # Incremented on every invalidation, see ``set``.
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, project_id):
+        key = six.text_type(project_id)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, organization_id, config = entry
+            if expires < time.time():
+                return None
+            self._entries[key] = entry
+        return config
+
+    def set(self, project_id, config, organization_id=None, ttl=DEFAULT_TTL, size=DEFAULT_SIZE,
+            generation=None):
+        """
+        Adds a config. If the ``generation`` the cache had before the config
+        was built is passed, the config is not added if the cache has been
+        invalidated since as it might be outdated.
+        """
+        key = six.text_type(project_id)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, organization_id, config)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def discard(self, project_id=None, organization_id=None):
+        with self._lock:
+            self.generation += 1
+            if project_id is not None:
+                self._entries.pop(six.text_type(project_id), None)
+            if organization_id is not None:
+                for key, entry in list(six.iteritems(self._entries)):
+                    if entry[1] == organization_id:
+                        del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def handle_message(self, message):
+        kind, _, id = message.partition(b':')
+        if kind == b'p':
+            self.discard(project_id=int(id))
+        elif kind == b'o':
+            self.discard(organization_id=int(id))
+
+    def ensure_listening(self, client):
+        """Starts the thread receiving invalidations unless this process
+        already has one (the cache might have been inherited through a
+        fork)."""
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            self._listener_pid = pid
+            self.generation += 1
+            self._entries.clear()
+
+        t = threading.Thread(target=self._listen, args=(client, ))
+        t.setDaemon(True)
+        t.start()
+
+    def _listen(self, client):
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                # Anything cached before subscribing might have missed its
+                # invalidation.
+                self.clear()
+                for message in pubsub.listen():
+                    self.handle_message(message['data'])
+            except Exception:
+                logger.exception('projectconfig_cache.listen.failed')
+            self.clear()
+            time.sleep(1)
+
+
+local_cache = ProjectConfigCache()
+
+
+def get_or_create(project_id, create):
+    """
+    Returns the cached config of the project, calling ``create`` to build it
+    if it is not cached.
+    """
+    client = _get_client()
+    if client is None:
+        return create()
+
+    local_cache.ensure_listening(client)
+    config = local_cache.get(project_id)
+    if config is None:
+        generation = local_cache.generation
+        config = create()
+        local_cache.set(
+            project_id,
+            config,
+            organization_id=config.organization_id,
+            ttl=getattr(settings, 'SENTRY_PROJECT_CONFIG_CACHE_TTL', DEFAULT_TTL),
+            size=getattr(settings, 'SENTRY_PROJECT_CONFIG_CACHE_SIZE', DEFAULT_SIZE),
+            generation=generation,
+        )
+    return config
+
+
+def invalidate(project_id=None, organization_id=None):
+    """
+    Drops the config of a project or of all projects of an organization in
+    all processes.
+    """
+    local_cache.discard(project_id=project_id, organization_id=organization_id)
+
+    client = _get_client()
+    if client is None:
+        return
+
+    try:
+        if project_id is not None:
+            client.publish(CHANNEL, u'p:{}'.format(project_id))
+        if organization_id is not None:
+            client.publish(CHANNEL, u'o:{}'.format(organization_id))
+    except Exception:
+        logger.exception('projectconfig_cache.invalidate.failed')
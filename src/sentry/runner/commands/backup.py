@@ -1,17 +1,97 @@
 from __future__ import absolute_import, print_function
 
+import functools
+import itertools
+import json
+import sys
+
 import click
+import six
 from sentry.runner.decorators import configuration
 
+# Number of chunks per model that are fetched ahead of the writer when
+# exporting with multiple workers.
+PREFETCH_CHUNKS = 2
+
+
+def save_batch(objects):
+    """
+    Saves deserialized objects of one model. Objects which do not exist yet
+    are bulk inserted, existing ones are updated one by one like a regular
+    import does. The ``pre_save`` and ``post_save`` signals are sent for the
+    inserted objects just like ``save`` sends them (with ``raw`` set).
+    """
+    from django.db import router, transaction
+    from django.db.models import signals
+
+    model = type(objects[0].object)
+    using = router.db_for_write(model)
+    existing = set(
+        model._base_manager.filter(
+            pk__in=[obj.object.pk for obj in objects],
+        ).values_list('pk', flat=True)
+    )
+    new_objects = [obj for obj in objects if obj.object.pk not in existing]
+
+    with transaction.atomic(using=using):
+        for obj in new_objects:
+            signals.pre_save.send(
+                sender=model, instance=obj.object, raw=True, using=using, update_fields=None)
+        model._base_manager.bulk_create([obj.object for obj in new_objects])
+        for obj in new_objects:
+            signals.post_save.send(
+                sender=model, instance=obj.object, created=True, raw=True, using=using,
+                update_fields=None)
+            for accessor_name, object_list in six.iteritems(obj.m2m_data or {}):
+                setattr(obj.object, accessor_name, object_list)
+        for obj in objects:
+            if obj.object.pk in existing:
+                obj.save()
+
+
+def import_lines(lines, batch_size):
+    """
+    Imports newline-delimited JSON as written by ``export --format=ndjson``
+    in batches of up to ``batch_size`` objects of the same model.
+    """
+    from django.core import serializers
+
+    objects = serializers.deserialize(
+        "python",
+        (json.loads(line) for line in lines if line.strip()),
+        use_natural_keys=True,
+    )
+
+    batch = []
+    for obj in objects:
+        if batch and (len(batch) >= batch_size or type(obj.object) is not type(batch[0].object)):
+            save_batch(batch)
+            batch = []
+        batch.append(obj)
+
+    if batch:
+        save_batch(batch)
+
 
 @click.command(name='import')
 @click.argument('src', type=click.File('rb'))
+@click.option(
+    '--batch-size', default=1000, show_default=True,
+    help='Number of objects that are inserted at once (newline-delimited exports only).'
+)
 @configuration
-def import_(src):
+def import_(src, batch_size):
     "Imports data from a Sentry export."
 
+    # Newline-delimited exports start with an object, regular ones with a
+    # list.
+    first_line = src.readline()
+    if first_line.lstrip().startswith(b'{'):
+        import_lines(itertools.chain([first_line], src), batch_size)
+        return
+
     from django.core import serializers
-    for obj in serializers.deserialize("json", src, stream=True, use_natural_keys=True):
+    for obj in serializers.deserialize("json", first_line + src.read(), use_natural_keys=True):
         obj.save()
 
 
@@ -96,6 +176,67 @@ def sort_dependencies(app_list):
     return model_list
 
 
+def iter_chunks(model, chunk_size):
+    """
+    Yields all instances of a model ordered by primary key in lists of up to
+    ``chunk_size``. Every chunk is fetched with its own query that continues
+    after the last primary key of the previous one, as ``QuerySet.iterator``
+    still has the database driver fetch the whole table at once.
+    """
+    pk_name = model._meta.pk.name
+    queryset = model._base_manager.order_by(pk_name)
+
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+        chunk = list(queryset.filter(**{pk_name + '__gt': chunk[-1].pk})[:chunk_size])
+
+
+def _fetch_chunks(model, chunk_size, queue):
+    from django.db import connections
+
+    try:
+        for chunk in iter_chunks(model, chunk_size):
+            queue.put((chunk, None))
+        queue.put((None, None))
+    except Exception:
+        queue.put((None, sys.exc_info()))
+    finally:
+        connections.close_all()
+
+
+def iter_chunks_concurrently(models, chunk_size, workers):
+    """
+    Like ``iter_chunks`` for all ``models`` (in order), but the chunks of up
+    to ``workers`` models are fetched concurrently by a thread pool. Each
+    model only gets ``PREFETCH_CHUNKS`` chunks ahead of the consumer, which
+    bounds the memory used.
+    """
+    from six.moves.queue import Queue
+    from sentry.utils.concurrent import ThreadedExecutor
+
+    executor = ThreadedExecutor(worker_count=workers)
+    queues = []
+    for priority, model in enumerate(models):
+        queue = Queue(PREFETCH_CHUNKS)
+        # Models are fetched in order, so the one being consumed always has
+        # a thread.
+        executor.submit(functools.partial(_fetch_chunks, model, chunk_size, queue),
+                        priority=priority)
+        queues.append(queue)
+
+    for queue in queues:
+        while True:
+            chunk, exc_info = queue.get()
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            if chunk is None:
+                break
+            yield chunk
+
+
 @click.command()
 @click.argument('dest', default='-', type=click.File('wb'))
 @click.option('--silent', '-q', default=False, is_flag=True, help='Silence all debug output.')
@@ -103,8 +244,21 @@ def sort_dependencies(app_list):
     '--indent', default=2, help='Number of spaces to indent for the JSON output. (default: 2)'
 )
 @click.option('--exclude', default=None, help='Models to exclude from export.', metavar='MODELS')
+@click.option(
+    '--format', 'format_', type=click.Choice(['json', 'ndjson']), default='json',
+    show_default=True,
+    help='Write a JSON list or one JSON object per line (newline-delimited JSON).'
+)
+@click.option(
+    '--chunk-size', default=1000, show_default=True,
+    help='Number of objects that are fetched at once.'
+)
+@click.option(
+    '--workers', default=1, show_default=True,
+    help='Number of threads that fetch models concurrently.'
+)
 @configuration
-def export(dest, silent, indent, exclude):
+def export(dest, silent, indent, exclude, format_, chunk_size, workers):
     "Exports core metadata for the Sentry installation."
 
     if exclude is None:
@@ -115,26 +269,39 @@ def export(dest, silent, indent, exclude):
     from django.db.models import get_apps
     from django.core import serializers
 
-    def yield_objects():
-        app_list = [(a, None) for a in get_apps()]
+    app_list = [(a, None) for a in get_apps()]
 
-        # Collate the objects to be serialized.
-        for model in sort_dependencies(app_list):
-            if (
-                not getattr(model, '__core__', True) or
-                model.__name__.lower() in exclude or
-                model._meta.proxy
-            ):
-                if not silent:
-                    click.echo(">> Skipping model <%s>" % (model.__name__, ), err=True)
-                continue
+    # Collate the models to be serialized.
+    models = []
+    for model in sort_dependencies(app_list):
+        if (
+            not getattr(model, '__core__', True) or
+            model.__name__.lower() in exclude or
+            model._meta.proxy
+        ):
+            if not silent:
+                click.echo(">> Skipping model <%s>" % (model.__name__, ), err=True)
+            continue
+        models.append(model)
 
-            queryset = model._base_manager.order_by(model._meta.pk.name)
-            for obj in queryset.iterator():
-                yield obj
+    if workers > 1:
+        chunks = iter_chunks_concurrently(models, chunk_size, workers)
+    else:
+        chunks = itertools.chain.from_iterable(
+            iter_chunks(model, chunk_size) for model in models
+        )
 
     if not silent:
         click.echo('>> Beginning export', err=True)
+
+    if format_ == 'ndjson':
+        from django.core.serializers.json import DjangoJSONEncoder
+        for chunk in chunks:
+            for data in serializers.serialize("python", chunk, use_natural_keys=True):
+                dest.write(json.dumps(data, cls=DjangoJSONEncoder) + '\n')
+        return
+
     serializers.serialize(
-        "json", yield_objects(), indent=indent, stream=dest, use_natural_keys=True
+        "json", itertools.chain.from_iterable(chunks), indent=indent, stream=dest,
+        use_natural_keys=True
     )
@@ -38,6 +38,10 @@ def get_project(value):
 # and child proc
 _STOP_WORKER = '91650ec271ae4b3e8a67cdc909d80f8c'
 
+# Tasks of this kind carry a NodeStore cleanup partition rather than a chunk
+# of model instances.
+_NODESTORE_PARTITION = 'nodestore:partition'
+
 API_TOKEN_TTL_IN_DAYS = 30
 
 
@@ -64,6 +68,7 @@ def multiprocess_worker(task_queue):
             from sentry import models
             from sentry import deletions
             from sentry import similarity
+            from sentry.app import nodestore
 
             skip_models = [
                 # Handled by other parts of cleanup
@@ -81,6 +86,16 @@ def multiprocess_worker(task_queue):
             configured = True
 
         model, chunk = j
+
+        if model == _NODESTORE_PARTITION:
+            try:
+                nodestore.cleanup_partition(chunk)
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                task_queue.task_done()
+            continue
+
         model = import_string(model)
 
         try:
@@ -113,6 +128,13 @@ def multiprocess_worker(task_queue):
 @click.option(
     '--silent', '-q', default=False, is_flag=True, help='Run quietly. No output on success.'
 )
+@click.option(
+    '--partition-nodestore',
+    default=False,
+    is_flag=True,
+    help='Delete NodeStore values in partitions that are spread over the worker processes '
+    'and resume where an interrupted cleanup stopped.'
+)
 @click.option('--model', '-m', multiple=True)
 @click.option('--router', '-r', default=None, help='Database router')
 @click.option(
@@ -123,7 +145,7 @@ def multiprocess_worker(task_queue):
     help='Send the duration of this command to internal metrics.'
 )
 @log_options()
-def cleanup(days, project, concurrency, silent, model, router, timed):
+def cleanup(days, project, concurrency, partition_nodestore, silent, model, router, timed):
     """Delete a portion of trailing data based on creation date.
 
     All data that is older than `--days` will be deleted.  The default for
@@ -245,11 +267,26 @@ def cleanup(days, project, concurrency, silent, model, router, timed):
             click.echo("Removing old NodeStore values")
 
         cutoff = timezone.now() - timedelta(days=days)
-        try:
-            nodestore.cleanup(cutoff)
-        except NotImplementedError:
-            click.echo(
-                "NodeStore backend does not support cleanup operation", err=True)
+        partitions = None
+        if partition_nodestore:
+            try:
+                partitions = nodestore.get_cleanup_partitions(cutoff)
+            except NotImplementedError:
+                click.echo(
+                    "NodeStore backend does not support partitioned cleanup", err=True)
+
+        if partitions is not None:
+            if not silent:
+                click.echo(u">> Deleting {} partitions".format(len(partitions)))
+            for partition in partitions:
+                task_queue.put((_NODESTORE_PARTITION, partition))
+            task_queue.join()
+        else:
+            try:
+                nodestore.cleanup(cutoff)
+            except NotImplementedError:
+                click.echo(
+                    "NodeStore backend does not support cleanup operation", err=True)
 
     for bqd in BULK_QUERY_DELETES:
         if len(bqd) == 4:
@@ -0,0 +1,39 @@
+-- Like ``is_rate_limited.lua``, but reserves up to ``n`` items at once so
+-- that a client can accept further items on its own. ``KEYS`` are the same
+-- as for ``is_rate_limited.lua`` and ``ARGV`` has the number of items to
+-- reserve appended, e.g. to reserve up to 10 items of the quotas ``foo``
+-- and ``bar``:
+--
+--   KEYS = {"foo", "subtract_from_foo", "bar", "subtract_from_bar"}
+--   ARGV = {10, 100, 20, 100, 10}
+--
+-- As many items as are available in all quotas (at most ``n``) are
+-- reserved by incrementing all counters by that amount. The result is a
+-- Lua table/array (Redis multi bulk reply) with the number of reserved
+-- items first, followed by whether each quota had no item left, i.e. would
+-- have *rejected* the item.
+assert(#KEYS + 1 == #ARGV, "incorrect number of keys and arguments provided")
+assert(#KEYS % 2 == 0, "there must be an even number of keys")
+
+local granted = tonumber(ARGV[#ARGV])
+local results = {}
+for i=1, #KEYS, 2 do
+    local limit = tonumber(ARGV[i])
+    local available = limit - ((redis.call('GET', KEYS[i]) or 0) - (redis.call('GET', KEYS[i + 1]) or 0))
+    if available < granted then
+        granted = available
+    end
+    results[(i + 1) / 2 + 1] = available < 1
+end
+
+if granted < 1 then
+    granted = 0
+else
+    for i=1, #KEYS, 2 do
+        redis.call('INCRBY', KEYS[i], granted)
+        redis.call('EXPIREAT', KEYS[i], ARGV[i + 1])
+    end
+end
+
+results[1] = granted
+return results
@@ -0,0 +1,41 @@
+-- Checks and counts a request against a collection of rate limits using the
+-- generic cell rate algorithm (GCRA). Every key stores the theoretical
+-- arrival time (TAT) of the next request in milliseconds. ``ARGV`` starts with
+-- the current time in milliseconds, followed by the emission interval (the
+-- window divided by the limit) and the window (both in milliseconds) of each
+-- key, e.g. to check ``foo`` with 10 requests per second and ``bar`` with 60
+-- requests per minute:
+--
+--   KEYS = {"foo", "bar"}
+--   ARGV = {1500000000000, 100, 1000, 1000, 60000}
+--
+-- Keys are checked independently: the request is counted against every key
+-- that did not limit it. The result is a Lua table/array (Redis multi bulk
+-- reply) with an entry per key, each being whether the key limits the
+-- request (0 or 1), the number of requests that are left right now and the
+-- milliseconds until the next request is allowed and until the limit is
+-- fully reset.
+assert(#KEYS * 2 + 1 == #ARGV, "incorrect number of keys and arguments provided")
+
+local now = tonumber(ARGV[1])
+local results = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+
+    local tat = tonumber(redis.call('GET', key) or 0)
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval
+    local allow_at = new_tat - window
+
+    if now < allow_at then
+        results[i] = {1, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+    else
+        redis.call('SET', key, string.format('%.3f', new_tat), 'PX', math.max(1, math.ceil(new_tat - now)))
+        results[i] = {0, math.floor((now - allow_at) / interval), 0, math.ceil(new_tat - now)}
+    end
+end
+
+return results
@@ -606,6 +606,15 @@ end
 
 -- Command Parsing
 
+local function record(configuration, index, key, frequencies)
+    set_frequencies(configuration, index, key, frequencies)
+    for band, buckets in ipairs(frequencies) do
+        for bucket in pairs(buckets) do
+            get_bucket_membership_set(configuration, index, band, bucket):add(key)
+        end
+    end
+end
+
 local commands = {
     RECORD = function (configuration, cursor, arguments)
         local cursor, key, signatures = multiple_argument_parser(
@@ -621,12 +630,24 @@ local commands = {
         return table.imap(
             signatures,
             function (signature)
-                set_frequencies(configuration, signature.index, key, signature.frequencies)
-                for band, buckets in ipairs(signature.frequencies) do
-                    for bucket in pairs(buckets) do
-                        get_bucket_membership_set(configuration, signature.index, band, bucket):add(key)
-                    end
-                end
+                record(configuration, signature.index, key, signature.frequencies)
+            end
+        )
+    end,
+    RECORD_MANY = function (configuration, cursor, arguments)
+        -- Like ``RECORD``, but every signature carries its own key.
+        local cursor, signatures = variadic_argument_parser(
+            object_argument_parser({
+                {"key", argument_parser(validate_value)},
+                {"index", argument_parser(validate_value)},
+                {"frequencies", frequencies_argument_parser(configuration)},
+            })
+        )(cursor, arguments)
+
+        return table.imap(
+            signatures,
+            function (signature)
+                record(configuration, signature.index, signature.key, signature.frequencies)
             end
         )
     end,
@@ -0,0 +1,30 @@
+-- Takes up to ``ARGV[2]`` events queued for ``save_event_batch`` off the
+-- queue of a shard and records them as in progress until ``ARGV[3]``.
+-- Events still in progress after their deadline (because the task saving
+-- them crashed or was killed) are put back at the front of the queue first.
+--
+--   KEYS = {queue, in progress}
+--   ARGV = {now, batch size, deadline}
+--
+-- Returns the taken events and the number of events left in the queue.
+local queue_key = KEYS[1]
+local in_progress_key = KEYS[2]
+local batch_size = tonumber(ARGV[2])
+
+local expired = redis.call('ZRANGEBYSCORE', in_progress_key, '-inf', ARGV[1], 'LIMIT', 0, batch_size)
+if #expired > 0 then
+    redis.call('ZREM', in_progress_key, unpack(expired))
+    for i = #expired, 1, -1 do
+        redis.call('LPUSH', queue_key, expired[i])
+    end
+end
+
+local jobs = redis.call('LRANGE', queue_key, 0, batch_size - 1)
+if #jobs > 0 then
+    redis.call('LTRIM', queue_key, #jobs, -1)
+    for _, job in ipairs(jobs) do
+        redis.call('ZADD', in_progress_key, ARGV[3], job)
+    end
+end
+
+return {jobs, redis.call('LLEN', queue_key)}
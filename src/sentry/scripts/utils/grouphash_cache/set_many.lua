@@ -0,0 +1,34 @@
+-- Adds hashes to the grouphash cache of a project unless the cache has been
+-- invalidated since the caller read the generation its data is based on.
+--
+--   KEYS = {values, recency, generation}
+--   ARGV = {generation, now, ttl, size, hash, value, hash, value, ...}
+--
+-- Returns 1 if the hashes were added and 0 if the generation is outdated.
+local values_key = KEYS[1]
+local recency_key = KEYS[2]
+local generation_key = KEYS[3]
+
+if (redis.call('GET', generation_key) or '0') ~= ARGV[1] then
+    return 0
+end
+
+local now = ARGV[2]
+local ttl = tonumber(ARGV[3])
+local size = tonumber(ARGV[4])
+
+for i = 5, #ARGV, 2 do
+    redis.call('HSET', values_key, ARGV[i], ARGV[i + 1])
+    redis.call('ZADD', recency_key, now, ARGV[i])
+end
+redis.call('EXPIRE', values_key, ttl)
+redis.call('EXPIRE', recency_key, ttl)
+
+local count = redis.call('ZCARD', recency_key)
+if count > size then
+    local evicted = redis.call('ZRANGE', recency_key, 0, count - size - 1)
+    redis.call('HDEL', values_key, unpack(evicted))
+    redis.call('ZREM', recency_key, unpack(evicted))
+end
+
+return 1
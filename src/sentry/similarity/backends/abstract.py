@@ -19,6 +19,15 @@ class AbstractIndexBackend(object):
     def record(self, scope, key, items, timestamp=None):
         pass
 
+    def record_many(self, records):
+        """
+        Records a sequence of ``(scope, key, items, timestamp)`` tuples, where
+        ``items`` and ``timestamp`` are the same as for ``record``.  Backends
+        can override this to write them with fewer round trips.
+        """
+        for scope, key, items, timestamp in records:
+            self.record(scope, key, items, timestamp=timestamp)
+
     @abstractmethod
     def merge(self, scope, destination, items, timestamp=None):
         pass
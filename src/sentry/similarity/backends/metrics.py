@@ -20,6 +20,11 @@ class MetricsWrapper(AbstractIndexBackend):
     def record(self, *args, **kwargs):
         return self.__instrumented_method_call('record', *args, **kwargs)
 
+    def record_many(self, *args, **kwargs):
+        # Records might span several scopes, so they are not tagged.
+        with timer(self.template.format('record_many')):
+            return self.backend.record_many(*args, **kwargs)
+
     def classify(self, *args, **kwargs):
         return self.__instrumented_method_call('classify', *args, **kwargs)
 
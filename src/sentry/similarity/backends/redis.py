@@ -151,6 +151,41 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
 
         return self.__index(scope, arguments)
 
+    def record_many(self, records):
+        now = int(time.time())
+
+        # All keys of a scope share a hash tag, so that the records of each
+        # scope can be written with a single script call (the keys of
+        # different scopes might live on different cluster nodes.) Records
+        # are also grouped by the interval their timestamp falls into, which
+        # determines the buckets they are written to.
+        records_by_bucket = {}
+        for scope, key, items, timestamp in records:
+            if timestamp is None:
+                timestamp = now
+            bucket = records_by_bucket.setdefault((scope, timestamp // self.interval), [0, []])
+            bucket[0] = max(bucket[0], timestamp)
+            for idx, features in items:
+                bucket[1].append((key, idx, features))
+
+        for (scope, _), (timestamp, items) in records_by_bucket.items():
+            arguments = [
+                'RECORD_MANY',
+                timestamp,
+                self.namespace,
+                self.bands,
+                self.interval,
+                self.retention,
+                self.candidate_set_limit,
+                scope,
+            ]
+
+            for key, idx, features in items:
+                arguments.extend([key, idx])
+                arguments.extend(self._build_signature_arguments(features))
+
+            self.__index(scope, arguments)
+
     def merge(self, scope, destination, items, timestamp=None):
         if timestamp is None:
             timestamp = int(time.time())
@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from sentry.similarity import features
+
+logger = logging.getLogger('sentry.similarity')
+
+
+class RecordBatcher(object):
+    """
+    Collects events that are to be recorded in a ``FeatureSet`` and records
+    them every ``flush_interval`` seconds from a background thread, or as
+    soon as ``max_size`` events are pending.  Features are extracted and
+    signatures built while flushing, and the index is written with one
+    script call per project (see ``FeatureSet.record_many``.)
+    """
+
+    def __init__(self, features, flush_interval, max_size=1000):
+        self.features = features
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pending = []
+        self._flusher_pid = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, event):
+        with self._lock:
+            self._pending.append(event)
+            full = len(self._pending) >= self.max_size
+        self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def _ensure_flusher(self):
+        # Also restarts the thread in processes that inherited the batcher
+        # through a fork.
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+
+        t = threading.Thread(target=self._run)
+        t.setDaemon(True)
+        t.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('similarity.batch.flush.failed')
+            finally:
+                # Flushing loads projects and groups, don't keep the
+                # connections of this thread open between flushes.
+                connections.close_all()
+
+    def flush(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+        if events:
+            self.features.record_many(events)
+
+
+_batcher = None
+
+
+def get_batcher():
+    """
+    Returns the batcher of this process or ``None`` if events are recorded
+    immediately (``SENTRY_SIMILARITY_INDEX_FLUSH_INTERVAL`` is not set).
+    """
+    global _batcher
+    if _batcher is None:
+        flush_interval = getattr(settings, 'SENTRY_SIMILARITY_INDEX_FLUSH_INTERVAL', None)
+        if not flush_interval:
+            return None
+        _batcher = RecordBatcher(features, flush_interval)
+        atexit.register(_batcher.flush)
+    return _batcher
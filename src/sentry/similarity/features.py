@@ -93,6 +93,31 @@ class FeatureSet(object):
                 )
         return results
 
+    def encode(self, event):
+        """
+        Returns the encoded features of an event as ``(alias, features)``
+        pairs as they are passed to the index.
+        """
+        items = []
+        for label, features in self.extract(event).items():
+            try:
+                features = map(self.encoder.dumps, features)
+            except Exception as error:
+                log = (
+                    logger.debug if isinstance(error, self.expected_encoding_errors) else
+                    functools.partial(logger.warning, exc_info=True)
+                )
+                log(
+                    'Could not encode features from %r for %r due to error: %r',
+                    event,
+                    label,
+                    error,
+                )
+            else:
+                if features:
+                    items.append((self.aliases[label], features, ))
+        return items
+
     def record(self, events):
         if not events:
             return []
@@ -104,37 +129,22 @@ class FeatureSet(object):
         for event in events:
             if not event.group_id:
                 continue
-            for label, features in self.extract(event).items():
-                if scope is None:
-                    scope = self.__get_scope(event.project)
-                else:
-                    assert self.__get_scope(
-                        event.project
-                    ) == scope, 'all events must be associated with the same project'
 
-                if key is None:
-                    key = self.__get_key(event.group)
-                else:
-                    assert self.__get_key(
-                        event.group
-                    ) == key, 'all events must be associated with the same group'
+            if scope is None:
+                scope = self.__get_scope(event.project)
+            else:
+                assert self.__get_scope(
+                    event.project
+                ) == scope, 'all events must be associated with the same project'
 
-                try:
-                    features = map(self.encoder.dumps, features)
-                except Exception as error:
-                    log = (
-                        logger.debug if isinstance(error, self.expected_encoding_errors) else
-                        functools.partial(logger.warning, exc_info=True)
-                    )
-                    log(
-                        'Could not encode features from %r for %r due to error: %r',
-                        event,
-                        label,
-                        error,
-                    )
-                else:
-                    if features:
-                        items.append((self.aliases[label], features, ))
+            if key is None:
+                key = self.__get_key(event.group)
+            else:
+                assert self.__get_key(
+                    event.group
+                ) == key, 'all events must be associated with the same group'
+
+            items.extend(self.encode(event))
 
         return self.index.record(
             scope,
@@ -143,6 +153,28 @@ class FeatureSet(object):
             timestamp=int(to_timestamp(event.datetime)),
         )
 
+    def record_many(self, events):
+        """
+        Records events of any number of projects and groups, every event for
+        its own group.  The index is written with as few calls as possible.
+        """
+        records = []
+        for event in events:
+            if not event.group_id:
+                continue
+
+            items = self.encode(event)
+            if items:
+                records.append((
+                    self.__get_scope(event.project),
+                    self.__get_key(event.group),
+                    items,
+                    int(to_timestamp(event.datetime)),
+                ))
+
+        if records:
+            self.index.record_many(records)
+
     def classify(self, events, limit=None, thresholds=None):
         if not events:
             return []
@@ -4,20 +4,33 @@ import mmh3
 
 
 class MinHashSignatureBuilder(object):
-    def __init__(self, columns, rows):
+    """
+    Builds MinHash signatures of ``columns`` values between 0 and ``rows``.
+    Column ``i`` of a signature is the smallest ``mmh3.hash(feature, i) %
+    rows`` of all features.
+
+    The hashes of a feature are computed for all columns at once and kept
+    for up to ``cache_size`` features, as the events of a group mostly share
+    the same features.  The signature is then the element-wise minimum of
+    the hashes of all distinct features.
+    """
+
+    def __init__(self, columns, rows, cache_size=10000):
         self.columns = columns
         self.rows = rows
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def get_hashes(self, feature):
+        hashes = self._cache.get(feature)
+        if hashes is None:
+            rows = self.rows
+            hashes = tuple([mmh3.hash(feature, column) % rows for column in range(self.columns)])
+            if len(self._cache) >= self.cache_size:
+                # Cheaper than tracking which features are used the least.
+                self._cache.clear()
+            self._cache[feature] = hashes
+        return hashes
 
     def __call__(self, features):
-        return map(
-            lambda column: min(
-                map(
-                    lambda feature: mmh3.hash(
-                        feature,
-                        column,
-                    ) % self.rows,
-                    features,
-                ),
-            ),
-            range(self.columns),
-        )
+        return map(min, zip(*map(self.get_hashes, set(features))))
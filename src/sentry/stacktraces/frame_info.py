@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+
+from sentry.stacktraces.functions import get_function_name_for_frame, trim_function_name
+from sentry.stacktraces.platform import get_behavior_family_for_platform
+
+
+_missing = object()
+
+
+class FrameInfo(object):
+    """Attributes derived from a raw frame that are needed repeatedly while
+    an event is grouped (by the enhancer and by every grouping variant).
+    They are computed on first access only.
+
+    The in-app flag is deliberately not part of this as enhancement rules
+    change it while frames are processed.
+    """
+    __slots__ = ('frame', 'platform', 'glob_matches', '_behavior_family',
+                 '_function_name', '_trimmed_functions')
+
+    def __init__(self, frame, platform=None):
+        self.frame = frame
+        self.platform = platform
+        # Used by the enhancer to remember which patterns match the frame.
+        self.glob_matches = {}
+        self._behavior_family = None
+        self._function_name = _missing
+        self._trimmed_functions = None
+
+    @property
+    def frame_platform(self):
+        return self.frame.get('platform') or self.platform
+
+    @property
+    def behavior_family(self):
+        if self._behavior_family is None:
+            self._behavior_family = get_behavior_family_for_platform(self.frame_platform)
+        return self._behavior_family
+
+    @property
+    def function_name(self):
+        """The trimmed function name as returned by
+        ``get_function_name_for_frame``."""
+        if self._function_name is _missing:
+            self._function_name = get_function_name_for_frame(self.frame, self.platform)
+        return self._function_name
+
+    def trim_function_name(self, function, normalize_lambdas=True):
+        """Like ``trim_function_name`` for the platform of the frame."""
+        if self._trimmed_functions is None:
+            self._trimmed_functions = {}
+        key = (function, normalize_lambdas)
+        rv = self._trimmed_functions.get(key)
+        if rv is None:
+            rv = self._trimmed_functions[key] = trim_function_name(
+                function, self.frame_platform, normalize_lambdas=normalize_lambdas)
+        return rv
+
+
+class FrameInfoCache(object):
+    """Hands out one ``FrameInfo`` per raw frame.  Frames are keyed by
+    identity, so a cache must only be used for the frames of one event while
+    they are not modified other than their in-app flag.
+    """
+
+    def __init__(self):
+        self._infos = {}
+
+    def get(self, frame, platform=None):
+        rv = self._infos.get(id(frame))
+        # The info keeps a reference to its frame, so the id cannot have
+        # been reused while it is cached.
+        if rv is None or rv.frame is not frame or rv.platform != platform:
+            rv = self._infos[id(frame)] = FrameInfo(frame, platform)
+        return rv
@@ -268,7 +268,9 @@ def normalize_stacktraces_for_grouping(data, grouping_config=None):
                 frame['raw_function'] = raw_func
                 frame['function'] = function_name
 
-    # If a grouping config is available, run grouping enhancers
+    # If a grouping config is available, run grouping enhancers.  The frame
+    # infos of the config are not used since the strategies see different
+    # frame dicts (those of the interfaces).
     if grouping_config is not None:
         for frames in stacktraces:
             grouping_config.enhancements.apply_modifications_to_frame(frames, platform)
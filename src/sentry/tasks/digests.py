@@ -1,12 +1,16 @@
 from __future__ import absolute_import
 
 import logging
+import sys
 import time
+from collections import defaultdict
 
+from sentry import options
 from sentry.digests import get_option_key
 from sentry.digests.backends.base import InvalidState
 from sentry.digests.notifications import (
     build_digest,
+    fetch_states,
     split_key,
 )
 from sentry.models import (
@@ -14,7 +18,8 @@ from sentry.models import (
     ProjectOption,
 )
 from sentry.tasks.base import instrumented_task
-from sentry.utils import snuba
+from sentry.utils import metrics, snuba
+from sentry.utils.iterators import chunked
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +41,14 @@ def schedule_digests():
     timeout = 300
     digests.maintenance(deadline - timeout)
 
-    for entry in digests.schedule(deadline):
-        deliver_digest.delay(entry.key, entry.timestamp)
+    batch_size = options.get('digests.delivery-batch-size')
+    if batch_size < 2:
+        for entry in digests.schedule(deadline):
+            deliver_digest.delay(entry.key, entry.timestamp)
+        return
+
+    for entries in chunked(digests.schedule(deadline), batch_size):
+        deliver_digests.delay([(entry.key, entry.timestamp) for entry in entries])
 
 
 @instrumented_task(name='sentry.tasks.digests.deliver_digest', queue='digests.delivery')
@@ -65,3 +76,141 @@ def deliver_digest(key, schedule_timestamp=None):
 
         if digest:
             plugin.notify_digest(project, digest)
+
+
+# Number of timelines that ``deliver_digests`` keeps open at the same time.
+# Their locks expire after 30 seconds, which must be enough to fetch and
+# build the digests of all of them.
+DELIVERY_CHUNK_SIZE = 20
+
+
+def _get_timelines(keys):
+    """
+    Returns ``(key, plugin, project)`` for the keys of timelines, loading all
+    projects at once. Timelines of projects that no longer exist are deleted.
+    """
+    from sentry import digests
+    from sentry.plugins import plugins
+
+    parsed = []
+    for key in keys:
+        plugin_slug, _, project_id = key.split(':', 2)
+        parsed.append((key, plugin_slug, int(project_id)))
+
+    projects = Project.objects.in_bulk(set(project_id for _, _, project_id in parsed))
+
+    timelines = []
+    for key, plugin_slug, project_id in parsed:
+        project = projects.get(project_id)
+        if project is None:
+            logger.info('Cannot deliver digest %r due to error: project does not exist', key)
+            digests.delete(key)
+            continue
+        try:
+            plugin = plugins.get(plugin_slug)
+        except KeyError:
+            logger.exception('Cannot deliver digest %r due to error: plugin does not exist', key)
+            continue
+        timelines.append((key, plugin, project))
+    return timelines
+
+
+def _open_digests(timelines):
+    """
+    Opens the timelines, returning ``(plugin, project, context, records)``
+    for every timeline that could be opened. Failures of single timelines
+    are logged and skipped.
+    """
+    from sentry import digests
+
+    opened = []
+    for key, plugin, project in timelines:
+        try:
+            minimum_delay = ProjectOption.objects.get_value(
+                project, get_option_key(plugin.get_conf_key(), 'minimum_delay')
+            )
+            context = digests.digest(key, minimum_delay=minimum_delay)
+            records = context.__enter__()
+        except InvalidState as error:
+            logger.info('Skipped digest delivery: %s', error, exc_info=True)
+            continue
+        except Exception:
+            logger.exception('Failed to open digest %r', key)
+            continue
+        opened.append((plugin, project, context, records))
+    return opened
+
+
+def _build_digests(timelines, timer):
+    """
+    Opens, fetches and builds the digests of the timelines, returning
+    ``(plugin, project, digest)`` for the digests that are to be sent. The
+    records of a timeline are only removed if its digest was built.
+    """
+    with timer('open'):
+        opened = _open_digests(timelines)
+
+    ready = []
+    # Timelines stay locked (and their records are kept) until their
+    # context managers exit, which they have to on any error.
+    pending = [context for _, _, context, _ in opened]
+    try:
+        with timer('fetch'):
+            states = fetch_states([(project, records) for _, project, _, records in opened])
+
+        with timer('build'):
+            for (plugin, project, context, records), state in zip(opened, states):
+                pending.remove(context)
+                try:
+                    digest = build_digest(project, records, state=state) if state else None
+                except Exception:
+                    logger.exception('Failed to build digest for %r', project)
+                    # The records are kept for the next delivery.
+                    context.__exit__(*sys.exc_info())
+                    continue
+                context.__exit__(None, None, None)
+                if digest:
+                    ready.append((plugin, project, digest))
+    except Exception:
+        logger.exception('Failed to fetch digests')
+        exc_info = sys.exc_info()
+        for context in pending:
+            try:
+                context.__exit__(*exc_info)
+            except Exception:
+                logger.exception('Failed to close digest')
+
+    return ready
+
+
+@instrumented_task(name='sentry.tasks.digests.deliver_digests', queue='digests.delivery')
+def deliver_digests(entries):
+    """
+    Delivers the digests of many ready timelines, given as ``(key,
+    schedule_timestamp)`` pairs. The timelines are opened in chunks and the
+    records of a chunk are read first, so that the groups, rules and counts
+    they refer to can be loaded in bulk (see ``fetch_states``). Digests are
+    only sent once all timelines of their chunk were closed.
+    """
+    def timer(stage):
+        return metrics.timer('digests.delivery', tags={'stage': stage})
+
+    with timer('load'):
+        timelines = _get_timelines([key for key, _ in entries])
+
+    delivered = defaultdict(int)
+    with snuba.options_override({'consistent': True}):
+        for chunk in chunked(timelines, DELIVERY_CHUNK_SIZE):
+            ready = _build_digests(chunk, timer)
+
+            with timer('notify'):
+                for plugin, project, digest in ready:
+                    try:
+                        plugin.notify_digest(project, digest)
+                    except Exception:
+                        logger.exception('Failed to deliver digest for %r', project)
+                    else:
+                        delivered[plugin.slug] += 1
+
+    for plugin_slug, count in delivered.items():
+        metrics.incr('digests.delivered', amount=count, tags={'plugin': plugin_slug})
@@ -9,6 +9,7 @@ from sentry import eventstream
 from sentry.app import tsdb
 from sentry.similarity import features
 from sentry.tasks.base import instrumented_task
+from sentry.utils import grouphash_cache
 
 logger = logging.getLogger('sentry.merge')
 delete_logger = logging.getLogger('sentry.deletions.async')
@@ -108,6 +109,7 @@ def merge_groups(
             logger=logger,
             transaction_id=transaction_id,
         )
+        grouphash_cache.invalidate(group.project_id)
 
         if not has_more:
             # There are no more objects to merge for *this* "from" group, remove it
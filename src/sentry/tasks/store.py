@@ -5,16 +5,17 @@ from datetime import datetime
 import six
 
 from time import time
+from django.conf import settings
 from django.utils import timezone
 
 from semaphore.processing import StoreNormalizer
 
-from sentry import features, reprocessing
+from sentry import features, options, reprocessing
 from sentry.constants import DEFAULT_STORE_NORMALIZER_ARGS
 from sentry.attachments import attachment_cache
-from sentry.cache import default_cache
+from sentry.processingcache import processing_cache
 from sentry.tasks.base import instrumented_task
-from sentry.utils import metrics
+from sentry.utils import json, metrics, redis
 from sentry.utils.safe import safe_execute
 from sentry.stacktraces.processing import process_stacktraces, \
     should_process_for_stacktraces
@@ -33,6 +34,16 @@ REPROCESSING_DEFAULT = False
 # Attachment file types that are considered a crash report (PII relevant)
 CRASH_REPORT_TYPES = ('event.minidump', )
 
+# Events waiting to be saved by ``save_event_batch`` are spread over this
+# many shards (by project) with their own Redis keys and tasks.
+SAVE_EVENT_BATCH_SHARDS = 16
+
+# Hard time limit of ``save_event_batch``. Events taken by a task are put
+# back into the queue if they are still in progress after it.
+SAVE_EVENT_BATCH_TIME_LIMIT = 300
+
+take_save_event_batch = redis.load_script('store/take_save_event_batch.lua')
+
 
 class RetryProcessing(Exception):
     pass
@@ -66,6 +77,13 @@ def should_process(data):
     return False
 
 
+def should_save_inline(data):
+    """Checks if an event that needs no processing is saved in the
+    preprocessing task right away (``store.inline-save-platforms``)."""
+    platforms = options.get('store.inline-save-platforms')
+    return bool(platforms) and ('*' in platforms or data.get('platform') in platforms)
+
+
 def submit_process(project, from_reprocessing, cache_key, event_id, start_time, data):
     task = process_event_from_reprocessing if from_reprocessing else process_event
     task.delay(cache_key=cache_key, start_time=start_time, event_id=event_id)
@@ -75,6 +93,10 @@ def submit_save_event(project, cache_key, event_id, start_time, data):
     if cache_key:
         data = None
 
+        if options.get('store.save-event-batch-size') > 1:
+            enqueue_save_event(project.id, cache_key, event_id, start_time)
+            return
+
     save_event.delay(
         cache_key=cache_key, data=data, start_time=start_time, event_id=event_id,
         project_id=project.id
@@ -83,7 +105,7 @@ def submit_save_event(project, cache_key, event_id, start_time, data):
 
 def _do_preprocess_event(cache_key, data, start_time, event_id, process_task):
     if cache_key and data is None:
-        data = default_cache.get(cache_key)
+        data = processing_cache.get(cache_key, stage='preprocess')
 
     if data is None:
         metrics.incr('events.failed', tags={'reason': 'cache', 'stage': 'pre'}, skip_internal=False)
@@ -102,9 +124,18 @@ def _do_preprocess_event(cache_key, data, start_time, event_id, process_task):
     if should_process(data):
         from_reprocessing = process_task is process_event_from_reprocessing
         submit_process(project, from_reprocessing, cache_key, event_id, start_time, original_data)
+        metrics.incr('events.preprocess.dispatch', tags={'next': 'process'}, skip_internal=False)
+        return
+
+    if should_save_inline(data):
+        # The payload is already at hand, so save_event does not need to
+        # read it from the cache again.
+        metrics.incr('events.preprocess.dispatch', tags={'next': 'inline'}, skip_internal=False)
+        _do_save_event(cache_key, original_data, start_time, event_id, project.id)
         return
 
     submit_save_event(project, cache_key, event_id, start_time, original_data)
+    metrics.incr('events.preprocess.dispatch', tags={'next': 'save'}, skip_internal=False)
 
 
 @instrumented_task(
@@ -160,7 +191,7 @@ def _do_process_event(cache_key, start_time, event_id, process_task,
     from sentry.plugins import plugins
 
     if data is None:
-        data = default_cache.get(cache_key)
+        data = processing_cache.get(cache_key, stage='process')
 
     if data is None:
         metrics.incr(
@@ -267,7 +298,7 @@ def _do_process_event(cache_key, start_time, event_id, process_task,
                                event_id=event_id)
             return
 
-        default_cache.set(cache_key, data, 3600)
+        processing_cache.set(cache_key, data, 3600, stage='process')
 
     submit_save_event(project, cache_key, event_id, start_time, data)
 
@@ -363,7 +394,7 @@ def create_failed_event(cache_key, project_id, issues, event_id, start_time=None
     # from the last processing step because we do not want any
     # modifications to take place.
     delete_raw_event(project_id, event_id)
-    data = default_cache.get(cache_key)
+    data = processing_cache.get(cache_key, stage='raw')
     if data is None:
         metrics.incr('events.failed', tags={'reason': 'cache', 'stage': 'raw'}, skip_internal=False)
         error_logger.error('process.failed_raw.empty', extra={'cache_key': cache_key})
@@ -387,7 +418,7 @@ def create_failed_event(cache_key, project_id, issues, event_id, start_time=None
             data=issue['data'],
         )
 
-    default_cache.delete(cache_key)
+    processing_cache.delete(cache_key)
 
     return True
 
@@ -421,7 +452,7 @@ def save_attachment(event, attachment):
 
 
 def _do_save_event(cache_key=None, data=None, start_time=None, event_id=None,
-                   project_id=None, **kwargs):
+                   project_id=None, batch_cache=None, **kwargs):
     """
     Saves an event to the database.
     """
@@ -431,7 +462,7 @@ def _do_save_event(cache_key=None, data=None, start_time=None, event_id=None,
     from sentry.utils.outcomes import Outcome, track_outcome
 
     if cache_key and data is None:
-        data = default_cache.get(cache_key)
+        data = processing_cache.get(cache_key, stage='save')
 
     if data is not None:
         data = CanonicalKeyDict(data)
@@ -476,7 +507,7 @@ def _do_save_event(cache_key=None, data=None, start_time=None, event_id=None,
     event = None
     try:
         manager = EventManager(data)
-        event = manager.save(project_id, assume_normalized=True)
+        event = manager.save(project_id, assume_normalized=True, batch_cache=batch_cache)
 
         # Always load attachments from the cache so we can later prune them.
         # Only save them if the event-attachments feature is active, though.
@@ -519,7 +550,7 @@ def _do_save_event(cache_key=None, data=None, start_time=None, event_id=None,
 
     finally:
         if cache_key:
-            default_cache.delete(cache_key)
+            processing_cache.delete(cache_key)
 
             # For the unlikely case that we did not manage to persist the
             # event we also delete the key always.
@@ -538,3 +569,120 @@ def _do_save_event(cache_key=None, data=None, start_time=None, event_id=None,
 def save_event(cache_key=None, data=None, start_time=None, event_id=None,
                project_id=None, **kwargs):
     _do_save_event(cache_key, data, start_time, event_id, project_id, **kwargs)
+
+
+def get_save_event_batch_shard(project_id):
+    return project_id % getattr(settings, 'SENTRY_SAVE_EVENT_BATCH_SHARDS', SAVE_EVENT_BATCH_SHARDS)
+
+
+def _get_save_event_batch_keys(shard):
+    # The shard is a hash tag so that all keys of a shard map to the same
+    # slot of a Redis Cluster.
+    return (
+        u'store:save-event-batch:{%s}' % (shard, ),
+        u'store:save-event-batch:{%s}:p' % (shard, ),
+        u'store:save-event-batch:{%s}:s' % (shard, ),
+    )
+
+
+def _get_save_event_batch_client(shard):
+    cluster_key = getattr(settings, 'SENTRY_SAVE_EVENT_BATCH_REDIS_CLUSTER', 'default')
+    return redis.clusters.get(cluster_key).get_local_client_for_key(
+        _get_save_event_batch_keys(shard)[0])
+
+
+def enqueue_save_event(project_id, cache_key, event_id, start_time):
+    """
+    Queues an event (which must be in the processing cache) to be saved by
+    ``save_event_batch``. A batch task is scheduled as soon as a full batch
+    is pending, and after a short delay if no task is scheduled for the
+    shard of the project yet.
+    """
+    batch_size = options.get('store.save-event-batch-size')
+    delay = options.get('store.save-event-batch-delay')
+    shard = get_save_event_batch_shard(project_id)
+    queue_key, _, scheduled_key = _get_save_event_batch_keys(shard)
+    client = _get_save_event_batch_client(shard)
+
+    with client.pipeline(transaction=False) as pipe:
+        pipe.rpush(queue_key, json.dumps({
+            'cache_key': cache_key,
+            'event_id': event_id,
+            'start_time': start_time,
+            'project_id': project_id,
+        }))
+        # The marker expires in case the task gets lost.
+        pipe.set(scheduled_key, '1', nx=True, ex=delay + 60)
+        pending, scheduled = pipe.execute()
+
+    if pending % batch_size == 0:
+        save_event_batch.delay(shard=shard)
+    elif scheduled:
+        save_event_batch.apply_async(kwargs={'shard': shard}, countdown=delay)
+
+
+def _do_save_event_batch(jobs):
+    """
+    Saves a batch of events queued by ``enqueue_save_event``. Their payloads
+    are fetched from the processing cache at once, and events of the same
+    project are saved back to back sharing project, release, dist and
+    environment lookups.
+    """
+    from sentry.event_manager import SaveBatchCache
+
+    data_by_cache_key = processing_cache.get_many(
+        [job['cache_key'] for job in jobs], stage='save')
+    batch_cache = SaveBatchCache()
+
+    for job in sorted(jobs, key=lambda job: job['project_id']):
+        try:
+            _do_save_event(
+                cache_key=job['cache_key'],
+                data=data_by_cache_key.get(job['cache_key']),
+                start_time=job['start_time'],
+                event_id=job['event_id'],
+                project_id=job['project_id'],
+                batch_cache=batch_cache,
+            )
+        except Exception:
+            # A single broken event must not prevent the rest of the batch
+            # from being saved.
+            error_logger.exception('save_event_batch.failed', extra={
+                'cache_key': job['cache_key'],
+                'project_id': job['project_id'],
+            })
+
+    metrics.timing('events.save_event_batch.size', len(jobs))
+
+
+@instrumented_task(
+    name='sentry.tasks.store.save_event_batch',
+    queue='events.save_event',
+    time_limit=SAVE_EVENT_BATCH_TIME_LIMIT,
+    soft_time_limit=SAVE_EVENT_BATCH_TIME_LIMIT - 5,
+)
+def save_event_batch(shard=0, **kwargs):
+    batch_size = max(options.get('store.save-event-batch-size'), 1)
+    queue_key, in_progress_key, scheduled_key = _get_save_event_batch_keys(shard)
+    client = _get_save_event_batch_client(shard)
+
+    # Events queued from now on need another task.
+    client.delete(scheduled_key)
+
+    now = time()
+    jobs, remaining = take_save_event_batch(
+        client,
+        [queue_key, in_progress_key],
+        [now, batch_size, now + SAVE_EVENT_BATCH_TIME_LIMIT + 10],
+    )
+
+    if jobs:
+        _do_save_event_batch([json.loads(job) for job in jobs])
+        client.zrem(in_progress_key, *jobs)
+
+    # Make sure that events which did not make it into this batch do not
+    # wait for another event to be queued. Full batches have been
+    # scheduled when they were queued.
+    delay = options.get('store.save-event-batch-delay')
+    if remaining and client.set(scheduled_key, '1', nx=True, ex=delay + 60):
+        save_event_batch.apply_async(kwargs={'shard': shard}, countdown=delay)
@@ -15,6 +15,7 @@ from sentry.models import (
 )
 from sentry.similarity import features
 from sentry.tasks.base import instrumented_task
+from sentry.utils import grouphash_cache
 from six.moves import reduce
 
 
@@ -195,6 +196,7 @@ def migrate_events(caches, project, source_id, destination_id,
             project_id=project.id,
             hash__in=fingerprints,
         ).update(group=destination_id)
+        grouphash_cache.invalidate(project.id)
 
         # Create activity records for the source and destination group.
         Activity.objects.create(
@@ -534,6 +536,8 @@ def lock_hashes(project_id, source_id, fingerprints):
             id__in=[h.id for h in eligible_hashes],
         ).update(state=GroupHash.State.LOCKED_IN_MIGRATION)
 
+    grouphash_cache.invalidate(project_id)
+
     return [h.hash for h in eligible_hashes]
 
 
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import collections
 import six
 
+from array import array
 from collections import OrderedDict
 from datetime import timedelta
 from django.conf import settings
@@ -93,9 +94,84 @@ class TSDBModel(Enum):
     servicehook_fired = 700
 
 
+class SeriesMatrix(object):
+    """
+    Dense representation of the time series of many keys sharing the same
+    timestamps, as returned by ``get_range_matrix``.
+
+    ``timestamps`` is a vector of epochs, ``keys`` lists the keys in row
+    order and ``counts`` holds one array of counts (aligned with
+    ``timestamps``) per key.
+    """
+    __slots__ = ('timestamps', 'keys', 'counts', '_index')
+
+    def __init__(self, timestamps, keys, counts=None):
+        self.timestamps = array('l', timestamps)
+        self.keys = list(keys)
+        if counts is None:
+            zeros = array('l', [0]) * len(self.timestamps)
+            counts = [array('l', zeros) for _ in self.keys]
+        self.counts = counts
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_range(cls, values, keys, timestamps):
+        """
+        Builds a matrix from the ``{key: [(timestamp, count), ...]}`` mapping
+        returned by ``get_range``.
+        """
+        matrix = cls(timestamps, keys)
+        positions = {ts: i for i, ts in enumerate(matrix.timestamps)}
+        for key, points in six.iteritems(values):
+            row = matrix.row(key)
+            for ts, count in points:
+                position = positions.get(ts)
+                if position is not None:
+                    row[position] = count
+        return matrix
+
+    def row(self, key):
+        return self.counts[self._index[key]]
+
+    def rollup(self, rollup):
+        """
+        Rolls all series up to ``rollup`` seconds. As all rows share the same
+        timestamps, the bucket boundaries are only computed once.
+        """
+        timestamps = []
+        boundaries = []
+        for i, ts in enumerate(self.timestamps):
+            ts = ts - (ts % rollup)
+            if not timestamps or timestamps[-1] != ts:
+                timestamps.append(ts)
+                boundaries.append(i)
+        boundaries.append(len(self.timestamps))
+        buckets = list(zip(boundaries, boundaries[1:]))
+
+        counts = [
+            array('l', [sum(row[lower:upper]) for lower, upper in buckets])
+            for row in self.counts
+        ]
+        return type(self)(timestamps, self.keys, counts)
+
+    def sums(self):
+        """
+        Returns a mapping of key to the total of its series.
+        """
+        return {key: sum(row) for key, row in zip(self.keys, self.counts)}
+
+    def series(self, key):
+        """
+        Returns the series of ``key`` as the ``[(timestamp, count), ...]``
+        list also returned by ``get_range``.
+        """
+        return list(zip(self.timestamps, self.row(key)))
+
+
 class BaseTSDB(Service):
     __read_methods__ = frozenset([
         'get_range',
+        'get_range_matrix',
         'get_sums',
         'get_distinct_counts_series',
         'get_distinct_counts_totals',
@@ -118,6 +194,7 @@ class BaseTSDB(Service):
         'record_frequency_multi',
         'merge_frequencies',
         'delete_frequencies',
+        'write_multi',
         'flush',
     ])
 
@@ -331,6 +408,18 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def get_range_matrix(self, model, keys, start, end, rollup=None, environment_ids=None):
+        """
+        Like ``get_range``, but returns a ``SeriesMatrix`` which stores the
+        series of all keys densely and supports rolling them up or summing
+        them without materializing per point tuples.
+        """
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        values = self.get_range(
+            model, keys, start, end, rollup, environment_ids=environment_ids,
+        )
+        return SeriesMatrix.from_range(values, keys, series)
+
     def get_sums(self, model, keys, start, end, rollup=None, environment_id=None):
         range_set = self.get_range(
             model, keys, start, end, rollup,
@@ -419,6 +508,26 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def write_multi(self, counters=(), distinct_counts=(), frequencies=(),
+                    timestamp=None, count=1, environment_id=None):
+        """
+        Record all of the TSDB data for a single event at once.
+
+        ``counters`` are ``(model, key)`` pairs as accepted by
+        ``incr_multi``, ``distinct_counts`` are ``(model, key, values)``
+        triples as accepted by ``record_multi`` and ``frequencies`` are
+        ``(model, {key: {item: score, ...}, ...})`` pairs as accepted by
+        ``record_frequency_multi``. The ``environment_id`` only applies to
+        counters and distinct counters, frequency tables are always recorded
+        without an environment.
+        """
+        if counters:
+            self.incr_multi(counters, timestamp, count, environment_id=environment_id)
+        if distinct_counts:
+            self.record_multi(distinct_counts, timestamp, environment_id=environment_id)
+        if frequencies:
+            self.record_frequency_multi(frequencies, timestamp)
+
     def get_most_frequent(self, model, keys, start, end=None,
                           rollup=None, limit=None, environment_id=None):
         """
@@ -14,7 +14,7 @@ from django.utils import timezone
 from pkg_resources import resource_string
 from redis.client import Script
 
-from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.base import BaseTSDB, SeriesMatrix
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import check_cluster_versions, get_cluster_from_options
 from sentry.utils.versioning import Version
@@ -174,6 +174,20 @@ class RedisTSDB(BaseTSDB):
 
         Returns a 2-tuple that contains the hash key and the hash field.
         """
+        model_key, vnode = self.get_counter_shard(key)
+
+        return u'{prefix}{model}:{epoch}:{vnode}'.format(
+            prefix=self.prefix,
+            model=model.value,
+            epoch=self.normalize_to_rollup(timestamp, rollup),
+            vnode=vnode,
+        ), self.add_environment_parameter(model_key, environment_id)
+
+    def get_counter_shard(self, key):
+        """
+        Returns a 2-tuple of the model key (the hash field) and the virtual
+        node that the counter for ``key`` is stored in.
+        """
         model_key = self.get_model_key(key)
 
         if isinstance(model_key, six.integer_types):
@@ -183,12 +197,7 @@ class RedisTSDB(BaseTSDB):
                 model_key = model_key.encode('utf-8')
             vnode = crc32(model_key) % self.vnodes
 
-        return u'{prefix}{model}:{epoch}:{vnode}'.format(
-            prefix=self.prefix,
-            model=model.value,
-            epoch=self.normalize_to_rollup(timestamp, rollup),
-            vnode=vnode,
-        ), self.add_environment_parameter(model_key, environment_id)
+        return model_key, vnode
 
     def get_model_key(self, key):
         # We specialize integers so that a pure int-map can be optimized by
@@ -273,6 +282,55 @@ class RedisTSDB(BaseTSDB):
             results_by_key[key] = sorted(points.items())
         return dict(results_by_key)
 
+    def get_range_matrix(self, model, keys, start, end, rollup=None, environment_ids=None):
+        # redis backend doesn't support multiple envs
+        if environment_ids is not None and len(environment_ids) > 1:
+            raise NotImplementedError
+        environment_id = environment_ids[0] if environment_ids else None
+
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        matrix = SeriesMatrix(series, keys)
+
+        # Counters of keys sharing a virtual node are fields of the same hash,
+        # so each hash is read with a single HMGET instead of one HGET per key.
+        rows_by_vnode = defaultdict(list)
+        fields_by_vnode = defaultdict(list)
+        for row, key in zip(matrix.counts, matrix.keys):
+            model_key, vnode = self.get_counter_shard(key)
+            rows_by_vnode[vnode].append(row)
+            fields_by_vnode[vnode].append(
+                self.add_environment_parameter(model_key, environment_id))
+
+        results = []
+        cluster, _ = self.get_cluster(environment_id)
+        with cluster.map() as client:
+            for position, epoch in enumerate(series):
+                for vnode, fields in six.iteritems(fields_by_vnode):
+                    hash_key = u'{prefix}{model}:{epoch}:{vnode}'.format(
+                        prefix=self.prefix,
+                        model=model.value,
+                        epoch=self.normalize_ts_to_rollup(epoch, rollup),
+                        vnode=vnode,
+                    )
+                    results.append(
+                        (rows_by_vnode[vnode], position, client.hmget(hash_key, fields)))
+
+        for rows, position, counts in results:
+            for row, count in zip(rows, counts.value):
+                if count:
+                    row[position] = int(count)
+
+        return matrix
+
+    def get_sums(self, model, keys, start, end, rollup=None, environment_id=None):
+        return self.get_range_matrix(
+            model, keys, start, end, rollup,
+            environment_ids=[environment_id] if environment_id is not None else None,
+        ).sums()
+
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (
             set(environment_ids) if environment_ids is not None else set()).union(
@@ -714,6 +772,116 @@ class RedisTSDB(BaseTSDB):
                 if durable:
                     raise
 
+    def write_multi(self, counters=(), distinct_counts=(), frequencies=(),
+                    timestamp=None, count=1, environment_id=None):
+        """
+        Apply all of the writes for a single event with one request per
+        cluster, which is pipelined to each host by ``execute_commands``.
+
+        Rollup epochs, expirations and counter shards are computed once for
+        the whole batch rather than for every model, rollup and environment.
+        Counter increments are coalesced by hash (model, epoch and vnode),
+        so every hash is incremented once per field and expired once.
+        """
+        self.validate_arguments(
+            [model for model, key in counters] +
+            [model for model, key, values in distinct_counts],
+            [environment_id],
+        )
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        if not self.enable_frequency_sketches:
+            frequencies = ()
+
+        ts = int(to_timestamp(timestamp))  # ``timestamp`` is not actually a timestamp :(
+
+        rollups = [
+            (
+                self.normalize_ts_to_rollup(ts, rollup),
+                self.calculate_expiry(rollup, max_values, timestamp),
+            ) for rollup, max_values in six.iteritems(self.rollups)
+        ]
+
+        counters = [(model, self.get_counter_shard(key)) for model, key in counters]
+
+        for (cluster, durable), environment_ids in self.get_cluster_groups(
+                set([None, environment_id])):
+            commands = defaultdict(list)
+
+            increments = defaultdict(lambda: defaultdict(int))
+            expirations = {}
+            for epoch, expiry in rollups:
+                for model, (model_key, vnode) in counters:
+                    hash_key = u'{prefix}{model}:{epoch}:{vnode}'.format(
+                        prefix=self.prefix,
+                        model=model.value,
+                        epoch=epoch,
+                        vnode=vnode,
+                    )
+                    expirations[hash_key] = expiry
+                    fields = increments[hash_key]
+                    for environment_id in environment_ids:
+                        fields[self.add_environment_parameter(model_key, environment_id)] += count
+
+            for hash_key, fields in six.iteritems(increments):
+                cmds = commands[hash_key]
+                for field, value in six.iteritems(fields):
+                    cmds.append(('HINCRBY', hash_key, field, value))
+                cmds.append(('EXPIREAT', hash_key, expirations[hash_key]))
+
+            for model, key, values in distinct_counts:
+                model_key = self.get_model_key(key)
+                cmds = commands[key]
+                for epoch, expiry in rollups:
+                    prefix = u'{prefix}{model}:{epoch}:{key}'.format(
+                        prefix=self.prefix,
+                        model=model.value,
+                        epoch=epoch,
+                        key=model_key,
+                    )
+                    for environment_id in environment_ids:
+                        k = self.add_environment_parameter(prefix, environment_id)
+                        cmds.append(('PFADD', k) + tuple(values))
+                        cmds.append(('EXPIREAT', k, expiry))
+
+            # Frequency tables are only recorded for the aggregate
+            # environment, since none of their models support environments.
+            if None in environment_ids:
+                for model, request in frequencies:
+                    for key, items in six.iteritems(request):
+                        model_key = self.get_model_key(key)
+                        keys = []
+                        expirations = []
+                        for epoch, expiry in rollups:
+                            prefix = u'{prefix}{model}:{epoch}:{key}'.format(
+                                prefix=self.prefix,
+                                model=model.value,
+                                epoch=epoch,
+                                key=model_key,
+                            )
+                            for k in (u'{}:i'.format(prefix), u'{}:e'.format(prefix)):
+                                keys.append(k)
+                                expirations.append(('EXPIREAT', k, expiry))
+
+                        arguments = ['INCR'] + list(self.DEFAULT_SKETCH_PARAMETERS)
+                        for member, score in items.items():
+                            arguments.extend((score, member))
+
+                        cmds = commands[key]
+                        cmds.append((CountMinScript, keys, arguments))
+                        cmds.extend(expirations)
+
+            if not commands:
+                continue
+
+            try:
+                cluster.execute_commands(commands)
+            except Exception:
+                if durable:
+                    raise
+
     def get_most_frequent(self, model, keys, start, end=None,
                           rollup=None, limit=None, environment_id=None):
         self.validate_arguments([model], [environment_id])
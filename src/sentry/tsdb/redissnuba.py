@@ -3,6 +3,8 @@ from __future__ import absolute_import
 import inspect
 import six
 
+from collections import defaultdict
+
 from sentry.tsdb.base import BaseTSDB
 from sentry.tsdb.dummy import DummyTSDB
 from sentry.tsdb.redis import RedisTSDB
@@ -28,6 +30,7 @@ def dont_do_this(callargs):
 method_specifications = {
     # method: (type, function(callargs) -> set[model])
     'get_range': (READ, single_model_argument),
+    'get_range_matrix': (READ, single_model_argument),
     'get_sums': (READ, single_model_argument),
     'get_distinct_counts_series': (READ, single_model_argument),
     'get_distinct_counts_totals': (READ, single_model_argument),
@@ -47,6 +50,11 @@ method_specifications = {
     'record_frequency_multi': (WRITE, lambda callargs: {model for model, data in callargs['requests']}),
     'merge_frequencies': (WRITE, single_model_argument),
     'delete_frequencies': (WRITE, multiple_model_argument),
+    'write_multi': (WRITE, lambda callargs: (
+        {model for model, key in callargs['counters']} |
+        {model for model, key, values in callargs['distinct_counts']} |
+        {model for model, data in callargs['frequencies']}
+    )),
     'flush': (WRITE, dont_do_this),
 }
 
@@ -86,7 +94,10 @@ def make_method(key):
 class RedisSnubaTSDBMeta(type):
     def __new__(cls, name, bases, attrs):
         for key in method_specifications.keys():
-            attrs[key] = make_method(key)
+            # methods that are defined on the class itself take care of
+            # routing on their own
+            if key not in attrs:
+                attrs[key] = make_method(key)
         return type.__new__(cls, name, bases, attrs)
 
 
@@ -99,3 +110,22 @@ class RedisSnubaTSDB(BaseTSDB):
             'snuba': SnubaTSDB(**options.pop('snuba', {})),
         }
         super(RedisSnubaTSDB, self).__init__(**options)
+
+    def write_multi(self, counters=(), distinct_counts=(), frequencies=(),
+                    timestamp=None, count=1, environment_id=None):
+        # The writes of an event usually span models that are handled by
+        # different backends, so they are partitioned rather than selected.
+        def backend(model):
+            return model_backends[model][WRITE]
+
+        requests = defaultdict(lambda: ([], [], []))
+        for item in counters:
+            requests[backend(item[0])][0].append(item)
+        for item in distinct_counts:
+            requests[backend(item[0])][1].append(item)
+        for item in frequencies:
+            requests[backend(item[0])][2].append(item)
+
+        for name, (c, d, f) in requests.items():
+            self.backends[name].write_multi(
+                c, d, f, timestamp=timestamp, count=count, environment_id=environment_id)
@@ -65,6 +65,8 @@ class SensitiveDataFilter(object):
             fields += DEFAULT_SCRUBBED_FIELDS
         self.exclude_fields = {f.lower() for f in exclude_fields}
         self.fields = set(fields)
+        # Set once ``apply`` changed any value of the data.
+        self.modified = False
 
     def apply(self, data):
         # TODO(dcramer): move this into each interface
@@ -100,6 +102,12 @@ class SensitiveDataFilter(object):
                     data['contexts'][key] = varmap(self.sanitize, value)
 
     def sanitize(self, key, value):
+        rv = self._sanitize(key, value)
+        if rv != value:
+            self.modified = True
+        return rv
+
+    def _sanitize(self, key, value):
         if value is None or value == '':
             return value
 
@@ -194,3 +202,5 @@ class SensitiveDataFilter(object):
                     querybits.append(chunk)
             query = '&'.join('='.join(k) for k in querybits)
             data[key] = urlunsplit((scheme, netloc, path, query, fragment))
+            if data[key] != value:
+                self.modified = True
@@ -4,8 +4,10 @@ import re
 from functools32 import lru_cache
 
 
-@lru_cache(maxsize=500)
-def _translate(pat, doublestar=False):
+def translate(pat, doublestar=False):
+    """Translates a glob pattern into the source of a regular expression
+    that needs to be compiled with the ``(?ms)`` flags.  The sources of
+    several patterns can be joined into one expression."""
     i, n = 0, len(pat)
     res = []
     while i < n:
@@ -42,8 +44,13 @@ def _translate(pat, doublestar=False):
                 res.append('[%s]' % stuff)
         else:
             res.append(re.escape(c))
-    res.append('\Z(?ms)')
-    return re.compile(''.join(res))
+    res.append('\Z')
+    return ''.join(res)
+
+
+@lru_cache(maxsize=500)
+def _translate(pat, doublestar=False):
+    return re.compile('(?ms)' + translate(pat, doublestar=doublestar))
 
 
 def glob_match(value, pat, doublestar=False, ignorecase=False, path_normalize=False):
@@ -0,0 +1,170 @@
+"""
+sentry.utils.grouphash_cache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+A small per-project LRU of recently resolved ``GroupHash`` rows, kept in
+Redis in front of the database lookup done while saving events.
+
+Each project owns three keys which are always accessed through the client of
+the first one (so they live on the same host): a hash mapping
+``hash -> "<grouphash_id>:<group_id>:<timestamp>"``, a sorted set recording
+when each hash was last used and a generation counter. Only hashes that are
+bound to a group (not tombstoned or locked for a migration) are cached.
+
+Every invalidation bumps the generation. Hashes are only added if the
+generation did not change since it was read before loading the hashes from
+the database, so a lookup racing with a merge, unmerge or tombstone cannot
+cache the binding from before it. Reads do not extend the lifetime of an
+entry, a binding is used for at most ``SENTRY_GROUPHASH_CACHE_TTL`` seconds
+after it was read from the database.
+
+The cache is disabled unless ``SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER`` names a
+Redis cluster.
+"""
+
+from __future__ import absolute_import
+
+import logging
+import time
+
+from django.conf import settings
+
+from sentry.utils.redis import clusters, load_script
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of hashes that are remembered per project.
+DEFAULT_SIZE = 256
+
+# Expiration of the whole per-project cache when it is not touched.
+DEFAULT_TTL = 60 * 60
+
+# Expiration of the generation counter. It only needs to outlive lookups that
+# are in progress while the cache is invalidated.
+GENERATION_TTL = 24 * 60 * 60
+
+set_many_script = load_script('utils/grouphash_cache/set_many.lua')
+
+
+def _get_client(project_id):
+    cluster_key = getattr(settings, 'SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER', None)
+    if cluster_key is None:
+        return None
+    values_key = _make_keys(project_id)[0]
+    return clusters.get(cluster_key).get_local_client_for_key(values_key)
+
+
+def _get_size():
+    return getattr(settings, 'SENTRY_GROUPHASH_CACHE_SIZE', DEFAULT_SIZE)
+
+
+def _get_ttl():
+    return getattr(settings, 'SENTRY_GROUPHASH_CACHE_TTL', DEFAULT_TTL)
+
+
+def _make_keys(project_id):
+    # The project id is a hash tag so that all keys of a project map to the
+    # same slot of a Redis Cluster.
+    return (
+        u'gh:2:{%s}:v' % (project_id, ),
+        u'gh:2:{%s}:r' % (project_id, ),
+        u'gh:2:{%s}:g' % (project_id, ),
+    )
+
+
+def is_cacheable(grouphash):
+    from sentry.models import GroupHash
+
+    return (
+        grouphash.id is not None and grouphash.group_id is not None and
+        grouphash.group_tombstone_id is None and
+        grouphash.state == GroupHash.State.UNLOCKED
+    )
+
+
+def get_many(project_id, hashes):
+    """
+    Returns a mapping of ``hash -> (grouphash_id, group_id)`` for all
+    ``hashes`` that are present in the cache, refreshing their recency, and
+    the generation of the cache that needs to be passed to ``set_many``.
+    """
+    client = _get_client(project_id)
+    if client is None or not hashes:
+        return {}, None
+
+    values_key, recency_key, generation_key = _make_keys(project_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.get(generation_key)
+        pipe.hmget(values_key, *hashes)
+        generation, results = pipe.execute()
+    except Exception:
+        logger.exception('grouphash_cache.get.failed')
+        return {}, None
+
+    cached = {}
+    expired = time.time() - _get_ttl()
+    for hash, value in zip(hashes, results):
+        if value is None:
+            continue
+        grouphash_id, group_id, timestamp = value.split(b':', 2)
+        if float(timestamp) < expired:
+            continue
+        cached[hash] = (int(grouphash_id), int(group_id))
+
+    if cached:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.zadd(recency_key, **{hash: time.time() for hash in cached})
+            pipe.expire(recency_key, _get_ttl())
+            pipe.execute()
+        except Exception:
+            logger.exception('grouphash_cache.touch.failed')
+
+    return cached, generation or b'0'
+
+
+def set_many(project_id, grouphashes, generation):
+    """
+    Remembers the group binding of all cacheable ``grouphashes``, evicting
+    the least recently used hashes of the project if it grows too large.
+    Nothing is remembered if the cache has been invalidated since
+    ``generation`` was returned by ``get_many``.
+    """
+    client = _get_client(project_id)
+    if client is None or generation is None:
+        return
+
+    now = time.time()
+    args = [generation, now, _get_ttl(), _get_size()]
+    for h in grouphashes:
+        if is_cacheable(h):
+            args.extend((h.hash, u'{}:{}:{}'.format(h.id, h.group_id, now)))
+    if len(args) == 4:
+        return
+
+    try:
+        set_many_script(client, _make_keys(project_id), args)
+    except Exception:
+        logger.exception('grouphash_cache.set.failed')
+
+
+def invalidate(project_id):
+    """
+    Forgets all cached hashes of a project. This needs to be called whenever
+    hashes of the project are moved between groups, tombstoned, locked or
+    deleted.
+    """
+    client = _get_client(project_id)
+    if client is None:
+        return
+
+    values_key, recency_key, generation_key = _make_keys(project_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.incr(generation_key)
+        pipe.expire(generation_key, GENERATION_TTL)
+        pipe.delete(values_key, recency_key)
+        pipe.execute()
+    except Exception:
+        logger.exception('grouphash_cache.invalidate.failed')
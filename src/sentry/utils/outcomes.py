@@ -1,16 +1,21 @@
 from __future__ import absolute_import
 
+from collections import defaultdict
 from datetime import datetime
 from django.conf import settings
 from enum import IntEnum
+import atexit
+import logging
+import os
 import random
 import six
+import threading
 import time
 
 from sentry import tsdb, options
 from sentry.utils import json, metrics
 from sentry.utils.data_filters import FILTER_STAT_KEYS_TO_VALUES
-from sentry.utils.dates import to_datetime
+from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.pubsub import QueuedPublisherService, KafkaPublisher
 
 # valid values for outcome
@@ -28,17 +33,10 @@ outcomes = settings.KAFKA_TOPICS[settings.KAFKA_OUTCOMES]
 outcomes_publisher = None
 
 
-def track_outcome(org_id, project_id, key_id, outcome, reason=None, timestamp=None, event_id=None):
-    """
-    This is a central point to track org/project counters per incoming event.
-    NB: This should only ever be called once per incoming event, which means
-    it should only be called at the point we know the final outcome for the
-    event (invalid, rate_limited, accepted, discarded, etc.)
+logger = logging.getLogger(__name__)
 
-    This increments all the relevant legacy RedisTSDB counters, as well as
-    sending a single metric event to Kafka which can be used to reconstruct the
-    counters with SnubaTSDB.
-    """
+
+def _get_publisher():
     global outcomes_publisher
     if outcomes_publisher is None:
         outcomes_publisher = QueuedPublisherService(
@@ -46,14 +44,14 @@ def track_outcome(org_id, project_id, key_id, outcome, reason=None, timestamp=No
                 settings.KAFKA_CLUSTERS[outcomes['cluster']]
             )
         )
+    return outcomes_publisher
 
-    assert isinstance(org_id, six.integer_types)
-    assert isinstance(project_id, six.integer_types)
-    assert isinstance(key_id, (type(None), six.integer_types))
-    assert isinstance(outcome, Outcome)
-    assert isinstance(timestamp, (type(None), datetime))
 
-    timestamp = timestamp or to_datetime(time.time())
+def get_tsdb_increments(org_id, project_id, key_id, outcome, reason=None):
+    """
+    Returns the ``(model, key)`` pairs of the legacy TSDB counters that
+    are incremented for an outcome.
+    """
     increment_list = []
     if outcome != Outcome.INVALID:
         # This simply preserves old behavior. We never counted invalid events
@@ -80,24 +78,175 @@ def track_outcome(org_id, project_id, key_id, outcome, reason=None, timestamp=No
     if reason in FILTER_STAT_KEYS_TO_VALUES:
         increment_list.append((FILTER_STAT_KEYS_TO_VALUES[reason], project_id))
 
-    increment_list = [(model, key) for model, key in increment_list if key is not None]
+    return [(model, key) for model, key in increment_list if key is not None]
+
+
+def _publish(timestamp, org_id, project_id, key_id, outcome, reason, event_id=None,
+             quantity=None):
+    payload = {
+        'timestamp': timestamp,
+        'org_id': org_id,
+        'project_id': project_id,
+        'key_id': key_id,
+        'outcome': outcome.value,
+        'reason': reason,
+        'event_id': event_id,
+    }
+    if quantity is not None:
+        payload['quantity'] = quantity
+    _get_publisher().publish(outcomes['topic'], json.dumps(payload))
+
+
+class OutcomeAggregator(object):
+    """
+    Sums up outcomes in process and writes them out every
+    ``flush_interval`` seconds from a background thread.
+
+    Outcomes are counted per time bucket of ``bucket_size`` seconds which
+    should be the smallest TSDB rollup, so that the counters end up exactly
+    as if every event had been recorded on its own. A flush increments all
+    counters with as few TSDB writes as possible and sends one outcome
+    message to Kafka per bucket and distinct outcome carrying the number of
+    events as ``quantity``. Accepted events are still sent to Kafka one by
+    one (see ``track_outcome``) as their event ids are needed.
+    """
+
+    def __init__(self, flush_interval, bucket_size):
+        self.flush_interval = flush_interval
+        self.bucket_size = bucket_size
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._flusher_pid = None
+
+    def add(self, org_id, project_id, key_id, outcome, reason, timestamp):
+        ts = int(to_timestamp(timestamp))
+        bucket = ts - ts % self.bucket_size
+        with self._lock:
+            self._counts[(bucket, org_id, project_id, key_id, outcome, reason)] += 1
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        # Also restarts the thread in processes that inherited the
+        # aggregator through a fork.
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+
+        t = threading.Thread(target=self._run)
+        t.setDaemon(True)
+        t.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('outcomes.flush.failed')
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        if not counts:
+            return
+
+        increments = defaultdict(int)
+        metric_counts = defaultdict(int)
+        sample_rate = options.get('snuba.track-outcomes-sample-rate')
+
+        for (bucket, org_id, project_id, key_id, outcome, reason), count \
+                in six.iteritems(counts):
+            for model, key in get_tsdb_increments(org_id, project_id, key_id, outcome, reason):
+                increments[(bucket, model, key)] += count
+            metric_counts[(outcome, reason)] += count
+
+            if outcome != Outcome.ACCEPTED and random.random() <= sample_rate:
+                _publish(to_datetime(bucket), org_id, project_id, key_id, outcome, reason,
+                         quantity=count)
+
+        # ``incr_multi`` takes a single count, so one write per distinct
+        # bucket and count is needed.
+        batches = defaultdict(list)
+        for (bucket, model, key), count in six.iteritems(increments):
+            batches[(bucket, count)].append((model, key))
+        for (bucket, count), items in six.iteritems(batches):
+            tsdb.incr_multi(items, timestamp=to_datetime(bucket), count=count)
+
+        for (outcome, reason), count in six.iteritems(metric_counts):
+            metrics.incr(
+                'events.outcomes',
+                amount=count,
+                skip_internal=True,
+                tags={
+                    'outcome': outcome.name.lower(),
+                    'reason': reason,
+                },
+            )
+
+
+_aggregator = None
+
+
+def get_aggregator():
+    """
+    Returns the aggregator of this process or ``None`` if outcomes are
+    tracked immediately (``SENTRY_OUTCOMES_FLUSH_INTERVAL`` is not set).
+    """
+    global _aggregator
+    if _aggregator is None:
+        flush_interval = getattr(settings, 'SENTRY_OUTCOMES_FLUSH_INTERVAL', None)
+        if not flush_interval:
+            return None
+        _aggregator = OutcomeAggregator(
+            flush_interval=flush_interval,
+            bucket_size=min(tsdb.get_rollups()),
+        )
+        atexit.register(_aggregator.flush)
+    return _aggregator
+
+
+def track_outcome(org_id, project_id, key_id, outcome, reason=None, timestamp=None, event_id=None):
+    """
+    This is a central point to track org/project counters per incoming event.
+    NB: This should only ever be called once per incoming event, which means
+    it should only be called at the point we know the final outcome for the
+    event (invalid, rate_limited, accepted, discarded, etc.)
+
+    This increments all the relevant legacy RedisTSDB counters, as well as
+    sending a single metric event to Kafka which can be used to reconstruct the
+    counters with SnubaTSDB.
+
+    If ``SENTRY_OUTCOMES_FLUSH_INTERVAL`` is set, the counters are aggregated
+    in process and written out periodically instead (see
+    ``OutcomeAggregator``).
+    """
+    assert isinstance(org_id, six.integer_types)
+    assert isinstance(project_id, six.integer_types)
+    assert isinstance(key_id, (type(None), six.integer_types))
+    assert isinstance(outcome, Outcome)
+    assert isinstance(timestamp, (type(None), datetime))
+
+    timestamp = timestamp or to_datetime(time.time())
+
+    aggregator = get_aggregator()
+    if aggregator is not None:
+        aggregator.add(org_id, project_id, key_id, outcome, reason, timestamp)
+        if outcome == Outcome.ACCEPTED and \
+                random.random() <= options.get('snuba.track-outcomes-sample-rate'):
+            _publish(timestamp, org_id, project_id, key_id, outcome, reason, event_id=event_id)
+        return
+
+    increment_list = get_tsdb_increments(org_id, project_id, key_id, outcome, reason)
     if increment_list:
         tsdb.incr_multi(increment_list, timestamp=timestamp)
 
     # Send a snuba metrics payload.
     if random.random() <= options.get('snuba.track-outcomes-sample-rate'):
-        outcomes_publisher.publish(
-            outcomes['topic'],
-            json.dumps({
-                'timestamp': timestamp,
-                'org_id': org_id,
-                'project_id': project_id,
-                'key_id': key_id,
-                'outcome': outcome.value,
-                'reason': reason,
-                'event_id': event_id,
-            })
-        )
+        _publish(timestamp, org_id, project_id, key_id, outcome, reason, event_id=event_id)
 
     metrics.incr(
         'events.outcomes',
@@ -67,7 +67,7 @@ from sentry.utils.safe import safe_execute
 from sentry.utils.sdk import configure_scope
 from sentry.web.helpers import render_to_response
 from sentry.web.client_config import get_client_config
-from sentry.relay.config import get_project_config
+from sentry.relay.config import get_cached_project_config
 
 logger = logging.getLogger('sentry')
 minidumps_logger = logging.getLogger('sentry.minidumps')
@@ -179,7 +179,8 @@ def _get_project_id_from_request(project_id, request, auth_helper_cls, helper):
         return helper.project_id_from_auth(auth)
 
 
-def process_event(event_manager, project, key, remote_addr, helper, attachments, project_config):
+def process_event(event_manager, project, key, remote_addr, helper, attachments, project_config,
+                  data_json=None):
     event_received.send_robust(ip=remote_addr, project=project, sender=process_event)
 
     start_time = time()
@@ -268,6 +269,8 @@ def process_event(event_manager, project, key, remote_addr, helper, attachments,
 
     scrub_data = config.get('scrub_data')
 
+    scrubbed = False
+
     if scrub_data:
         # We filter data immediately before it ever gets into the queue
         sensitive_fields = config.get('sensitive_fields')
@@ -276,18 +279,26 @@ def process_event(event_manager, project, key, remote_addr, helper, attachments,
 
         scrub_defaults = config.get('scrub_defaults')
 
-        SensitiveDataFilter(
+        data_filter = SensitiveDataFilter(
             fields=sensitive_fields,
             include_defaults=scrub_defaults,
             exclude_fields=exclude_fields,
-        ).apply(data)
+        )
+        data_filter.apply(data)
+        scrubbed = data_filter.modified
 
     if scrub_ip_address:
         # We filter data immediately before it ever gets into the queue
-        helper.ensure_does_not_have_ip(data)
+        if helper.ensure_does_not_have_ip(data):
+            scrubbed = True
+
+    # The event encoded by the store endpoint can only be reused if the
+    # filters above did not change anything.
+    if scrubbed:
+        data_json = None
 
-    # mutates data (strips a lot of context if not queued)
-    helper.insert_data_to_database(data, start_time=start_time, attachments=attachments)
+    helper.insert_data_to_database(data, start_time=start_time, attachments=attachments,
+                                   encoded_data=data_json)
 
     cache.set(cache_key, '', 60 * 60)  # Cache for 1 hour
 
@@ -404,7 +415,7 @@ class APIView(BaseView):
             project_id = _get_project_id_from_request(
                 project_id, request, self.auth_helper_cls, helper)
 
-            project_config = get_project_config(project_id, for_store=True)
+            project_config = get_cached_project_config(project_id)
 
             helper.context.bind_project(project_config.project)
 
@@ -613,8 +624,10 @@ class StoreView(APIView):
         event_manager.normalize()
 
         data = event_manager.get_data()
-        dict_data = dict(data)
-        data_size = len(json.dumps(dict_data))
+        # The encoded event is handed on to be stored in the processing cache
+        # so that it does not have to be encoded again.
+        data_json = json.dumps(dict(data))
+        data_size = len(data_json)
 
         if data_size > 10000000:
             metrics.timing('events.size.rejected', data_size)
@@ -624,7 +637,7 @@ class StoreView(APIView):
                 key.id,
                 Outcome.INVALID,
                 'too_large',
-                event_id=dict_data.get('event_id')
+                event_id=data.get('event_id')
             )
             raise APIForbidden("Event size exceeded 10MB after normalization.")
 
@@ -635,7 +648,8 @@ class StoreView(APIView):
         )
 
         return process_event(event_manager, project,
-                             key, remote_addr, helper, attachments, project_config)
+                             key, remote_addr, helper, attachments, project_config,
+                             data_json=data_json)
 
 
 class EventAttachmentStoreView(StoreView):
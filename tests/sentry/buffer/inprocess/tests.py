@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from sentry.buffer.inprocess import AggregatingBuffer
+from sentry.models import Group, Project
+from sentry.testutils import TestCase
+
+
+class AggregatingBufferTest(TestCase):
+    def setUp(self):
+        self.buf = AggregatingBuffer(backend='sentry.buffer.base.Buffer', max_pending=2)
+        self.buf.backend = mock.Mock()
+
+    @mock.patch('sentry.buffer.inprocess.AggregatingBuffer._ensure_flusher', mock.Mock())
+    def test_incr_merges_pending_increments(self):
+        self.buf.incr(Group, {'times_seen': 1}, {'id': 1}, {'message': 'foo'})
+        self.buf.incr(Group, {'times_seen': 2}, {'id': 1}, {'message': 'bar', 'level': 40})
+        assert not self.buf.backend.incr.called
+
+        self.buf.flush()
+        self.buf.backend.incr.assert_called_once_with(
+            Group, {'times_seen': 3}, {'id': 1}, {'message': 'bar', 'level': 40},
+        )
+
+        self.buf.backend.incr.reset_mock()
+        self.buf.flush()
+        assert not self.buf.backend.incr.called
+
+    @mock.patch('sentry.buffer.inprocess.AggregatingBuffer._ensure_flusher', mock.Mock())
+    def test_incr_coerces_model_filters(self):
+        self.buf.incr(Group, {'times_seen': 1}, {'project': Project(id=1)})
+        self.buf.incr(Group, {'times_seen': 1}, {'project': 1})
+        self.buf.flush()
+        assert self.buf.backend.incr.call_count == 1
+
+    @mock.patch('sentry.buffer.inprocess.AggregatingBuffer._ensure_flusher', mock.Mock())
+    def test_incr_flushes_when_full(self):
+        self.buf.incr(Group, {'times_seen': 1}, {'id': 1})
+        assert not self.buf.backend.incr.called
+        self.buf.incr(Group, {'times_seen': 1}, {'id': 2})
+        assert self.buf.backend.incr.call_count == 2
+        self.buf.backend.incr.assert_any_call(Group, {'times_seen': 1}, {'id': 1}, None)
+        self.buf.backend.incr.assert_any_call(Group, {'times_seen': 1}, {'id': 2}, None)
+
+    def test_process_delegates_to_backend(self):
+        self.buf.process(batch_keys=['foo'])
+        self.buf.backend.process.assert_called_once_with(batch_keys=['foo'])
+
+        self.buf.process_pending(partition=1)
+        self.buf.backend.process_pending.assert_called_once_with(partition=1)
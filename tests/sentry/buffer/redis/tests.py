@@ -2,13 +2,16 @@
 
 from __future__ import absolute_import
 
-import pytest
+import math
 import mock
 
 from datetime import datetime
 from django.utils import timezone
 from sentry.buffer.redis import RedisBuffer
-from sentry.models import Group, Project
+from sentry.event_manager import ScoreClause
+from sentry.models import Group, Project, ReleaseProject
+from sentry.utils import json
+from sentry.utils.dates import to_timestamp
 from sentry.testutils import TestCase
 
 
@@ -93,8 +96,6 @@ class RedisBufferTest(TestCase):
         self.buf.process('foo')
         process.assert_called_once_with(Group, columns, filters, extra)
 
-    # this test should be passing once we no longer serialize using pickle
-    @pytest.mark.xfail
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.redis.process_incr', mock.Mock())
     def test_incr_saves_to_redis(self):
@@ -104,12 +105,21 @@ class RedisBufferTest(TestCase):
         model.__name__ = 'Mock'
         columns = {'times_seen': 1}
         filters = {'pk': 1, 'datetime': now}
-        self.buf.incr(model, columns, filters, extra={'foo': 'bar', 'datetime': now})
+        self.buf.incr(model, columns, filters, extra={
+            'foo': 'bar',
+            'datetime': now,
+            'data': {'type': 'default'},
+            'score': ScoreClause(None),
+        })
         result = client.hgetall('foo')
+        assert json.loads(result.pop('f')) == {
+            'pk': ['i', '1'],
+            'datetime': ['d', '1493791566.000000'],
+        }
         assert result == {
             'e+foo': '["s","bar"]',
             'e+datetime': '["d","1493791566.000000"]',
-            'f': '{"pk":["i","1"],"datetime":["d","1493791566.000000"]}',
+            'e+data': '["j","{\\"type\\":\\"default\\"}"]',
             'i+times_seen': '1',
             'm': 'mock.mock.Mock',
         }
@@ -117,16 +127,75 @@ class RedisBufferTest(TestCase):
         assert pending == ['foo']
         self.buf.incr(model, columns, filters, extra={'foo': 'baz'})
         result = client.hgetall('foo')
-        assert result == {
-            'e+foo': '["s","baz"]',
-            'e+datetime': '["d","1493791566.000000"]',
-            'f': '{"pk":["i","1"],"datetime":["d","1493791566.000000"]}',
-            'i+times_seen': '2',
-            'm': 'mock.mock.Mock',
-        }
+        assert result['e+foo'] == '["s","baz"]'
+        assert result['i+times_seen'] == '2'
         pending = client.zrange('b:p', 0, -1)
         assert pending == ['foo']
 
+    def test_dump_and_load_value_roundtrip(self):
+        for value in (None, True, 42, 1.5, u'foo', {'a': [1, 2]}):
+            assert self.buf._load_value(self.buf._dump_value(value)) == value
+
+    @mock.patch('sentry.buffer.redis.process_incr', mock.Mock())
+    def test_process_batch_coalesces_group_updates(self):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        group1 = self.create_group(times_seen=1)
+        group2 = self.create_group(times_seen=5)
+        release = self.create_release(project=self.project)
+
+        for group, count in ((group1, 2), (group2, 1)):
+            for _ in range(count):
+                self.buf.incr(Group, {'times_seen': 1}, {'id': group.id}, {
+                    'last_seen': now,
+                    'data': {'type': 'error'},
+                    'score': ScoreClause(group),
+                })
+        self.buf.incr(ReleaseProject, {'new_groups': 1}, {
+            'release_id': release.id,
+            'project_id': self.project.id,
+        })
+
+        client = self.buf.cluster.get_routing_client()
+        keys = client.zrange('b:p', 0, -1)
+        assert len(keys) == 3
+
+        self.buf.process(batch_keys=keys)
+
+        group1 = Group.objects.get(id=group1.id)
+        assert group1.times_seen == 3
+        assert group1.last_seen == now
+        assert group1.data == {'type': 'error'}
+        # see ``ScoreClause``
+        assert abs(group1.score - (math.log10(3) * 600 + to_timestamp(now))) <= 1
+
+        group2 = Group.objects.get(id=group2.id)
+        assert group2.times_seen == 6
+
+        assert ReleaseProject.objects.get(
+            release=release, project=self.project).new_groups == 1
+        assert client.zrange('b:p', 0, -1) == []
+
+    @mock.patch('sentry.buffer.base._bulk_update_groups', mock.Mock(side_effect=Exception))
+    def test_process_batch_isolates_failures(self):
+        group1 = self.create_group(times_seen=1)
+        group2 = self.create_group(times_seen=5)
+        release = self.create_release(project=self.project)
+
+        with mock.patch.object(ReleaseProject.objects, 'create_or_update',
+                               side_effect=Exception):
+            self.buf.process_batch([
+                (Group, {'times_seen': 1}, {'id': group1.id}, {}),
+                (ReleaseProject, {'new_groups': 1}, {
+                    'release_id': release.id,
+                    'project_id': self.project.id,
+                }, {}),
+                (Group, {'times_seen': 2}, {'id': group2.id}, {}),
+            ])
+
+        # the failed coalesced update falls back to updating group by group
+        assert Group.objects.get(id=group1.id).times_seen == 2
+        assert Group.objects.get(id=group2.id).times_seen == 7
+
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.redis.process_incr')
     @mock.patch('sentry.buffer.redis.process_pending')
@@ -11,6 +11,8 @@ from sentry.digests import Record
 from sentry.digests.notifications import (
     Notification,
     event_to_record,
+    fetch_state,
+    fetch_states,
     rewrite_record,
     group_records,
     sort_group_contents,
@@ -141,3 +143,31 @@ class SortRecordsTestCase(TestCase):
                 (rules[0], OrderedDict(((groups[0], []), ))),
             )
         )
+
+
+class FetchStatesTestCase(TestCase):
+    def test_success(self):
+        other_project = self.create_project()
+        other_group = self.create_group(project=other_project)
+
+        rule = self.project.rule_set.all()[0]
+        other_rule = other_project.rule_set.all()[0]
+
+        records = [
+            event_to_record(self.create_event(group=self.group), (rule, )),
+            event_to_record(self.create_event(group=self.group), (rule, )),
+        ]
+        other_records = [event_to_record(self.create_event(group=other_group), (other_rule, ))]
+
+        digests = [(self.project, records), (other_project, other_records), (self.project, [])]
+        with self.assertNumQueries(2):
+            states = fetch_states(digests)
+
+        assert len(states) == 3
+        for (project, records), state in zip(digests[:2], states):
+            expected = fetch_state(project, records)
+            assert state == expected
+            # the groups are copies of their own
+            for id, group in state['groups'].items():
+                assert group is not expected['groups'][id]
+        assert states[2] is None
@@ -1279,6 +1279,41 @@ class EventManagerTest(TestCase):
         hashes = [gh.hash for gh in GroupHash.objects.filter(group=event.group)]
         assert sorted(hashes) == sorted([hash_from_values(checksum), checksum])
 
+    def test_find_hashes_creates_missing_hashes_in_bulk(self):
+        existing = GroupHash.objects.create(project=self.project, hash='a' * 32)
+
+        manager = EventManager(make_event())
+        grouphashes = manager._find_hashes(self.project, ['b' * 32, 'a' * 32, 'c' * 32])
+
+        assert [h.hash for h in grouphashes] == ['b' * 32, 'a' * 32, 'c' * 32]
+        assert grouphashes[1].id == existing.id
+        assert all(h.id is not None for h in grouphashes)
+        assert GroupHash.objects.filter(project=self.project).count() == 3
+
+    def test_find_hashes_uses_cache(self):
+        with self.settings(SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER='default'):
+            manager = EventManager(make_event(fingerprint=['a' * 32]))
+            manager.normalize()
+            event = manager.save(self.project.id)
+
+            # The first lookup of the now bound hash fills the cache.
+            manager._find_hashes(self.project, event.data['hashes'])
+
+            with self.assertNumQueries(0):
+                grouphashes = manager._find_hashes(self.project, event.data['hashes'])
+
+            assert [h.group_id for h in grouphashes] == [event.group_id]
+
+            # A stale cached binding to a deleted group is resolved again.
+            GroupHash.objects.filter(group_id=event.group_id).update(group=None)
+            event.group.delete()
+
+            manager = EventManager(make_event(event_id='b' * 32, fingerprint=['a' * 32]))
+            manager.normalize()
+            event2 = manager.save(self.project.id)
+
+            assert event2.group_id != event.group_id
+
     @mock.patch('sentry.event_manager.is_valid_error_message')
     def test_should_filter_message(self, mock_is_valid_error_message):
         TestItem = namedtuple('TestItem', 'value formatted result')
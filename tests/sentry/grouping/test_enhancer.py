@@ -170,3 +170,50 @@ def test_package_matching():
     assert not bool(bundled_rule.get_matching_frame_actions({
         'package': '/usr/lib/linux-gate.so',
     }, 'native'))
+
+
+def test_compiled_matching():
+    enhancement = Enhancements.from_config_string('''
+        family:native function:std::*                  -app
+        family:native package:**/libfoo.so             +app
+        family:javascript path:**/test.js app:no       -group
+        module:core::*                                 -app
+        app:maybe                                      -app
+    ''')
+
+    frames = [
+        {'function': 'std::whatever', 'package': '/usr/lib/libfoo.so'},
+        {'function': 'main', 'package': 'C:\\Lib\\LIBFOO.so', 'platform': 'native'},
+        {'abs_path': 'http://example.com/foo/TEST.js', 'in_app': False},
+        {'filename': 'test.js', 'in_app': True, 'platform': 'javascript'},
+        {'module': 'core::fmt', 'platform': 'rust'},
+        {},
+    ]
+
+    compiled = enhancement.get_compiled()
+    for platform in ('native', 'javascript'):
+        for matcher in compiled.get_frame_matchers(frames, platform):
+            for rule in compiled.rules:
+                assert matcher.matches(rule) == bool(
+                    rule.rule.get_matching_frame_actions(matcher.frame, platform))
+
+
+def test_modifications_apply_to_later_rules():
+    enhancement = Enhancements.from_config_string('''
+        function:foo                 -app
+        function:* app:no            +app
+    ''')
+
+    frames = [{'function': 'foo'}, {'function': 'bar', 'in_app': True}]
+    enhancement.apply_modifications_to_frame(frames, 'native')
+    assert [frame['in_app'] for frame in frames] == [True, True]
+
+
+def test_loads_is_shared():
+    dumped = Enhancements.from_config_string('''
+        function:foo                 -app
+    ''', bases=['common:v1']).dumps()
+
+    enhancement = Enhancements.loads(dumped)
+    assert Enhancements.loads(dumped) is enhancement
+    assert enhancement.get_compiled() is enhancement.get_compiled()
@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from sentry.lang.javascript.cache import SourceCache
+from sentry.lang.javascript.cache import ParsedFileCache, SourceCache
 from unittest import TestCase
 
 
@@ -38,3 +38,35 @@ class BasicCacheTest(TestCase):
         # fall back to utf-8
         cache.add(url, 'foobar'.encode('utf-32'), encoding='utf-32')
         assert cache.get(url)[0] == u'foobar'
+
+
+class ParsedFileCacheTest(TestCase):
+    def test_lru(self):
+        cache = ParsedFileCache(max_size=10)
+
+        cache.add('a', 'A', 4)
+        cache.add('b', 'B', 4)
+        assert cache.get('a') == 'A'
+
+        # ``b`` is the least recently used entry now
+        cache.add('c', 'C', 4)
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A'
+        assert cache.get('c') == 'C'
+        assert cache.size == 8
+
+    def test_too_large(self):
+        cache = ParsedFileCache(max_size=10)
+
+        cache.add('a', 'A', 11)
+        assert cache.get('a') is None
+        assert cache.size == 0
+
+    def test_replace(self):
+        cache = ParsedFileCache(max_size=10)
+
+        cache.add('a', 'A', 4)
+        cache.add('a', 'AA', 6)
+        assert cache.get('a') == 'AA'
+        assert cache.size == 6
+        assert len(cache) == 1
@@ -20,6 +20,7 @@ from sentry.lang.javascript.processor import (
     generate_module,
     trim_line,
     fetch_release_file,
+    get_release_file_candidates,
     UnparseableSourcemap,
     get_max_age,
     CACHE_CONTROL_MAX,
@@ -56,6 +57,33 @@ class JavaScriptStacktraceProcessorTest(TestCase):
         r = JavaScriptStacktraceProcessor({}, None, project)
         assert not r.allow_scraping
 
+    @patch('sentry.lang.javascript.processor.fetch_file')
+    def test_populate_source_cache_threaded(self, mock_fetch_file):
+        def fetch_file(url, **kwargs):
+            if url == 'http://example.com/missing.js':
+                raise http.CannotFetch({'type': EventError.JS_MISSING_SOURCE, 'url': url})
+            return http.UrlResult(url, {}, b'console.log("hello");', 200, None)
+
+        mock_fetch_file.side_effect = fetch_file
+
+        r = JavaScriptStacktraceProcessor({}, None, self.project)
+        with self.settings(SENTRY_SOURCE_FETCH_WORKERS=4):
+            r.populate_source_cache([
+                {'abs_path': 'http://example.com/%d.js' % i} for i in range(10)
+            ] + [
+                {'abs_path': 'http://example.com/missing.js'},
+                {'abs_path': '<anonymous>'},
+            ])
+
+        assert mock_fetch_file.call_count == 11
+        for i in range(10):
+            assert r.cache.get('http://example.com/%d.js' % i) is not None
+        assert r.cache.get('http://example.com/missing.js') is None
+        assert r.cache.get_errors('http://example.com/missing.js') == [{
+            'type': EventError.JS_MISSING_SOURCE,
+            'url': 'http://example.com/missing.js',
+        }]
+
 
 class FetchReleaseFileTest(TestCase):
     def test_unicode(self):
@@ -189,6 +217,87 @@ class FetchReleaseFileTest(TestCase):
             'utf-8',
         )
 
+    def test_caches_absence(self):
+        project = self.project
+        release = Release.objects.create(
+            organization_id=project.organization_id,
+            version='abc',
+        )
+        release.add_project(project)
+
+        assert fetch_release_file('file.min.js', release) is None
+        with self.assertNumQueries(0):
+            assert fetch_release_file('file.min.js', release) is None
+
+        file = File.objects.create(
+            name='file.min.js',
+            type='release.file',
+            headers={'Content-Type': 'application/json; charset=utf-8'},
+        )
+        binary_body = unicode_body.encode('utf-8')
+        file.putfile(six.BytesIO(binary_body))
+
+        # uploading a file invalidates the cached absence
+        ReleaseFile.objects.create(
+            name='file.min.js',
+            release=release,
+            organization_id=project.organization_id,
+            file=file,
+        )
+
+        result = fetch_release_file('file.min.js', release)
+        assert result.body == binary_body
+
+    def test_candidates(self):
+        project = self.project
+        release = Release.objects.create(
+            organization_id=project.organization_id,
+            version='abc',
+        )
+        release.add_project(project)
+
+        binary_body = unicode_body.encode('utf-8')
+        for name in ('~/file.min.js', 'http://example.com/file.min.js', '~/other.min.js'):
+            file = File.objects.create(
+                name=name,
+                type='release.file',
+                headers={'Content-Type': 'application/json; charset=utf-8'},
+            )
+            file.putfile(six.BytesIO(binary_body))
+            ReleaseFile.objects.create(
+                name=name,
+                release=release,
+                organization_id=project.organization_id,
+                file=file,
+            )
+
+        filenames = [
+            'http://example.com/file.min.js',
+            'http://example.com/other.min.js',
+            'http://example.com/missing.min.js',
+        ]
+        with self.assertNumQueries(1):
+            candidates = get_release_file_candidates(filenames, release)
+
+        assert [rf.name for rf in candidates['http://example.com/file.min.js']] == [
+            'http://example.com/file.min.js', '~/file.min.js']
+        assert [rf.name for rf in candidates['http://example.com/other.min.js']] == [
+            '~/other.min.js']
+        assert candidates['http://example.com/missing.min.js'] == []
+
+        result = fetch_release_file(
+            'http://example.com/other.min.js', release,
+            candidates=candidates['http://example.com/other.min.js'])
+        assert result.body == binary_body
+        assert fetch_release_file(
+            'http://example.com/missing.min.js', release,
+            candidates=candidates['http://example.com/missing.min.js']) is None
+
+        # cached files are not looked up again
+        assert set(get_release_file_candidates(filenames, release)) == set([
+            'http://example.com/file.min.js',
+        ])
+
 
 class FetchFileTest(TestCase):
     @responses.activate
@@ -512,6 +621,14 @@ class FetchSourcemapTest(TestCase):
         with pytest.raises(UnparseableSourcemap):
             fetch_sourcemap('http://example.com')
 
+    def test_parsed_cache(self):
+        with self.settings(SENTRY_SOURCE_PARSED_CACHE_SIZE=1024 * 1024):
+            smap_view = fetch_sourcemap(base64_sourcemap)
+            assert fetch_sourcemap(base64_sourcemap) is smap_view
+
+        with self.settings(SENTRY_SOURCE_PARSED_CACHE_SIZE=0):
+            assert fetch_sourcemap(base64_sourcemap) is not smap_view
+
 
 class TrimLineTest(unittest.TestCase):
     long_line = 'The public is more familiar with bad design than good design. It is, in effect, conditioned to prefer bad design, because that is what it lives with. The new becomes threatening, the old reassuring.'
@@ -8,6 +8,8 @@ from django.utils import timezone
 from sentry.nodestore.django.models import Node
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.testutils import TestCase
+from sentry.utils.dates import to_datetime, to_timestamp
+from sentry.utils.redis import clusters
 
 
 class DjangoNodeStorageTest(TestCase):
@@ -113,3 +115,47 @@ class DjangoNodeStorageTest(TestCase):
 
         assert Node.objects.filter(id=node.id).exists()
         assert not Node.objects.filter(id=node2.id).exists()
+
+    def test_cleanup_partitions(self):
+        now = timezone.now()
+        cutoff = now - timedelta(days=1)
+
+        node = Node.objects.create(
+            id='d2502ebbd7df41ceba8d3275595cac33', timestamp=now, data={
+                'foo': 'bar',
+            }
+        )
+        old_nodes = [
+            Node.objects.create(
+                id='d2502ebbd7df41ceba8d3275595cac3%d' % i,
+                timestamp=cutoff - timedelta(hours=i),
+                data={'foo': 'bar'},
+            ) for i in range(4, 8)
+        ]
+
+        partitions = self.ns.get_cleanup_partitions(cutoff)
+        assert len(partitions) in (7, 8)
+        assert partitions[0][0] <= to_timestamp(old_nodes[-1].timestamp)
+        assert partitions[-1][1] == int(to_timestamp(cutoff))
+
+        for partition in partitions:
+            self.ns.cleanup_partition(partition, chunk_size=1)
+
+        assert Node.objects.filter(id=node.id).exists()
+        assert not Node.objects.filter(id__in=[n.id for n in old_nodes]).exists()
+        assert self.ns.get_cleanup_partitions(cutoff) == []
+
+    def test_cleanup_partition_resumes(self):
+        start = int(to_timestamp(timezone.now() - timedelta(days=2))) // 3600 * 3600
+        node = Node.objects.create(
+            id='d2502ebbd7df41ceba8d3275595cac33', timestamp=to_datetime(start + 10), data={
+                'foo': 'bar',
+            }
+        )
+
+        # everything before the checkpoint has been deleted already
+        client = clusters.get('default').get_local_client_for_key('nodestore:cleanup:%s' % start)
+        client.set('nodestore:cleanup:%s' % start, start + 20)
+        self.ns.cleanup_partition((start, start + 3600))
+        assert Node.objects.filter(id=node.id).exists()
+        assert int(client.get('nodestore:cleanup:%s' % start)) == start + 3600
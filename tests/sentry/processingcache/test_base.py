@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import zlib
+
+from sentry.cache.redis import RbCache
+from sentry.processingcache.base import BaseProcessingCache
+from sentry.processingcache.redis import RbProcessingCache
+from sentry.testutils import TestCase
+
+
+class ProcessingCacheTest(TestCase):
+    def test_uncompressed(self):
+        cache = RbProcessingCache()
+        cache.set('e:1', {'message': u'héllo'}, 60)
+        assert cache.inner.get('e:1', raw=True) == b'{"message":"h\\u00e9llo"}'
+        assert cache.get('e:1') == {'message': u'héllo'}
+
+        cache.delete('e:1')
+        assert cache.get('e:1') is None
+
+    def test_compressed(self):
+        cache = RbProcessingCache(compression_level=6)
+        cache.set('e:1', {'message': u'héllo'}, 60)
+        cache.set_encoded('e:2', '{"foo":"bar"}', 60)
+
+        assert zlib.decompress(cache.inner.get('e:1', raw=True)) == \
+            b'{"message":"h\\u00e9llo"}'
+        assert cache.get_many(['e:1', 'e:2', 'e:3']) == {
+            'e:1': {'message': u'héllo'},
+            'e:2': {'foo': 'bar'},
+        }
+
+        # payloads written without compression can still be read
+        uncompressed = BaseProcessingCache(cache.inner)
+        assert uncompressed.get('e:1') == {'message': u'héllo'}
+
+    def test_legacy_payload(self):
+        inner = RbCache()
+        inner.set('e:1', {'foo': 'bar'}, 60)
+        assert BaseProcessingCache(inner, compression_level=6).get('e:1') == {'foo': 'bar'}
@@ -10,6 +10,7 @@ from exam import fixture, patcher
 
 from sentry.quotas.redis import (
     is_rate_limited,
+    lease,
     BasicRedisQuota,
     RedisQuota,
 )
@@ -68,6 +69,27 @@ def test_is_rate_limited_script():
     ))) == [False, ]
 
 
+def test_lease_script():
+    now = int(time.time())
+
+    cluster = clusters.get('default')
+    client = cluster.get_local_client(six.next(iter(cluster.hosts)))
+
+    # Only as many items as the smallest quota has left are reserved.
+    result = lease(client, ('lf', 'r:lf', 'lb', 'r:lb'), (3, now + 60, 10, now + 120, 5))
+    assert int(result[0]) == 3
+    assert list(map(bool, result[1:])) == [False, False]
+
+    assert client.get('lf') == '3'
+    assert client.get('lb') == '3'
+    assert 119 <= client.ttl('lb') <= 120
+
+    result = lease(client, ('lf', 'r:lf', 'lb', 'r:lb'), (3, now + 60, 10, now + 120, 5))
+    assert int(result[0]) == 0
+    assert list(map(bool, result[1:])) == [True, False]
+    assert client.get('lb') == '3'
+
+
 class RedisQuotaTest(TestCase):
     quota = fixture(RedisQuota)
 
@@ -113,6 +135,50 @@ class RedisQuotaTest(TestCase):
         self.get_project_quota.return_value = (200, 60)
         assert self.quota.is_rate_limited(self.project).is_limited
 
+    @mock.patch('sentry.quotas.redis.is_rate_limited', return_value=(True, False))
+    def test_remembers_rejections(self, is_rate_limited):
+        self.get_organization_quota.return_value = (100, 60)
+        self.get_project_quota.return_value = (200, 60)
+        timestamp = time.time()
+        assert self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        assert self.quota.is_rate_limited(self.project, timestamp=timestamp + 1).is_limited
+        assert is_rate_limited.call_count == 1
+
+        # a changed limit needs to be checked again
+        self.get_organization_quota.return_value = (1000, 60)
+        assert self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        assert is_rate_limited.call_count == 2
+
+    def test_lease(self):
+        quota = RedisQuota(lease_size=10)
+        timestamp = time.time()
+
+        self.get_project_quota.return_value = (2000, 60)
+        self.get_organization_quota.return_value = (3000, 60)
+
+        for _ in xrange(11):
+            assert not quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+
+        # two leases of 10 events each have been taken
+        assert quota.get_usage(
+            self.project.organization_id,
+            quota.get_quotas(self.project),
+            timestamp=timestamp,
+        ) == [20, 20]
+
+    def test_lease_rejects(self):
+        quota = RedisQuota(lease_size=10)
+        timestamp = time.time()
+
+        self.get_project_quota.return_value = (0, 60)
+        self.get_organization_quota.return_value = (2, 60)
+
+        assert not quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        assert not quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        result = quota.is_rate_limited(self.project, timestamp=timestamp)
+        assert result.is_limited
+        assert result.reason_code == 'org_quota'
+
     @mock.patch.object(RedisQuota, 'get_quotas')
     @mock.patch('sentry.quotas.redis.is_rate_limited', return_value=(True, False))
     def test_not_limited_without_enforce(self, mock_is_rate_limited, mock_get_quotas):
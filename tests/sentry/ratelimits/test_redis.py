@@ -2,7 +2,9 @@
 
 from __future__ import absolute_import
 
-from sentry.ratelimits.redis import RedisRateLimiter
+import time
+
+from sentry.ratelimits.redis import RedisGCRARateLimiter, RedisRateLimiter
 from sentry.testutils import TestCase
 
 
@@ -17,3 +19,44 @@ class RedisRateLimiterTest(TestCase):
     def test_simple_key(self):
         assert not self.backend.is_limited('foo', 1)
         assert self.backend.is_limited('foo', 1)
+
+
+class RedisGCRARateLimiterTest(TestCase):
+    def setUp(self):
+        self.backend = RedisGCRARateLimiter()
+
+    def test_project_key(self):
+        assert not self.backend.is_limited('foo', 1, self.project)
+        assert self.backend.is_limited('foo', 1, self.project)
+
+    def test_simple_key(self):
+        assert not self.backend.is_limited('foo', 1)
+        assert self.backend.is_limited('foo', 1)
+
+    def test_spreads_requests(self):
+        timestamp = float(int(time.time()))
+
+        result = self.backend.check_many([('foo', 2, 10)], timestamp=timestamp)[0]
+        assert not result.is_limited
+        assert result.remaining == 1
+        assert not self.backend.check_many([('foo', 2, 10)], timestamp=timestamp)[0].is_limited
+
+        result = self.backend.check_many([('foo', 2, 10)], timestamp=timestamp)[0]
+        assert result.is_limited
+        assert result.remaining == 0
+        assert 4.9 <= result.retry_after <= 5.0
+        assert timestamp + 9.9 <= result.reset_time <= timestamp + 10.1
+
+        # one request is allowed again after half the window
+        result = self.backend.check_many([('foo', 2, 10)], timestamp=timestamp + 5)[0]
+        assert not result.is_limited
+        assert result.remaining == 0
+        assert self.backend.check_many([('foo', 2, 10)], timestamp=timestamp + 5)[0].is_limited
+
+    def test_check_many(self):
+        results = self.backend.check_many([('foo', 1, None), ('bar', 2, None), ('baz', 0, None)])
+        assert [r.is_limited for r in results] == [False, False, True]
+
+        results = self.backend.check_many([('foo', 1, None), ('bar', 2, None)])
+        assert [r.is_limited for r in results] == [True, False]
+        assert [r.remaining for r in results] == [0, 0]
@@ -0,0 +1,31 @@
+from __future__ import absolute_import
+
+from mock import patch
+
+from sentry.receivers.similarity import record
+from sentry.testutils import TestCase
+
+
+@patch('sentry.receivers.similarity.similarity_features')
+@patch('sentry.receivers.similarity.random.random', return_value=0.5)
+class RecordTest(TestCase):
+    def record(self, times_seen, sample_rate):
+        group = self.create_group(times_seen=times_seen)
+        event = self.create_event(group=group)
+        with self.feature('projects:similarity-indexing'), self.options({
+            'similarity.index-sample-after': 100,
+            'similarity.index-sample-rate': sample_rate,
+        }):
+            record(project=self.project, event=event)
+        return event
+
+    def test_records_events_of_quiet_groups(self, mock_random, mock_features):
+        event = self.record(times_seen=100, sample_rate=0.1)
+        mock_features.record.assert_called_once_with([event])
+
+    def test_samples_events_of_busy_groups(self, mock_random, mock_features):
+        self.record(times_seen=101, sample_rate=0.1)
+        assert mock_features.record.call_count == 0
+
+        event = self.record(times_seen=101, sample_rate=0.9)
+        mock_features.record.assert_called_once_with([event])
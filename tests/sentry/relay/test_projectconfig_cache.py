@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+
+import mock
+
+from sentry.relay import projectconfig_cache
+from sentry.relay.config import ProjectConfig, get_cached_project_config
+from sentry.relay.projectconfig_cache import ProjectConfigCache
+from sentry.testutils import TestCase
+
+
+class ProjectConfigCacheTest(TestCase):
+    def make_config(self, organization_id=1):
+        return ProjectConfig(None, organization_id=organization_id)
+
+    def test_get_and_set(self):
+        cache = ProjectConfigCache()
+        config = self.make_config()
+        cache.set(1, config)
+        assert cache.get(1) is config
+        assert cache.get('1') is config
+        assert cache.get(2) is None
+
+    def test_expires(self):
+        cache = ProjectConfigCache()
+        cache.set(1, self.make_config(), ttl=-1)
+        assert cache.get(1) is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = ProjectConfigCache()
+        cache.set(1, self.make_config(), size=2)
+        cache.set(2, self.make_config(), size=2)
+        cache.get(1)
+        cache.set(3, self.make_config(), size=2)
+        assert cache.get(1) is not None
+        assert cache.get(2) is None
+        assert cache.get(3) is not None
+
+    def test_handle_message(self):
+        cache = ProjectConfigCache()
+        cache.set(1, self.make_config(), organization_id=1)
+        cache.set(2, self.make_config(), organization_id=1)
+        cache.set(3, self.make_config(), organization_id=2)
+
+        cache.handle_message(b'p:3')
+        assert cache.get(3) is None
+        assert cache.get(1) is not None
+
+        cache.handle_message(b'o:1')
+        assert len(cache) == 0
+
+    def test_skips_outdated(self):
+        cache = ProjectConfigCache()
+        generation = cache.generation
+        cache.discard(project_id=1)
+        cache.set(1, self.make_config(), generation=generation)
+        assert cache.get(1) is None
+
+
+class GetCachedProjectConfigTest(TestCase):
+    def setUp(self):
+        projectconfig_cache.local_cache.clear()
+
+    def test_disabled(self):
+        first = get_cached_project_config(self.project.id)
+        assert get_cached_project_config(self.project.id) is not first
+        assert first.project_id == self.project.id
+
+    @mock.patch.object(ProjectConfigCache, 'ensure_listening')
+    def test_invalidation(self, mock_ensure_listening):
+        with self.settings(SENTRY_PROJECT_CONFIG_CACHE_REDIS_CLUSTER='default'):
+            first = get_cached_project_config(self.project.id)
+            assert get_cached_project_config(self.project.id) is first
+            assert mock_ensure_listening.called
+
+            self.project.update_option('sentry:scrub_data', False)
+            second = get_cached_project_config(self.project.id)
+            assert second is not first
+            assert second.config['scrub_data'] is False
+            assert get_cached_project_config(str(self.project.id)) is second
+
+            self.organization.update_option('sentry:require_scrub_data', True)
+            third = get_cached_project_config(self.project.id)
+            assert third is not second
+            assert third.config['scrub_data'] is True
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import json
+
+import pytest
+from mock import patch
+
+from sentry.models import User
+from sentry.runner.commands.backup import export, import_, iter_chunks_concurrently
+from sentry.testutils import CliTestCase, TestCase
+
+
+class ExportImportTest(CliTestCase):
+    command = export
+
+    def test_ndjson_roundtrip(self):
+        users = [self.create_user('foo%d@example.com' % i) for i in range(3)]
+
+        with self.runner.isolated_filesystem():
+            rv = self.invoke('--silent', '--format=ndjson', '--chunk-size=1', 'export.jsonl')
+            assert rv.exit_code == 0, rv.output
+
+            with open('export.jsonl') as f:
+                exported = [json.loads(line) for line in f]
+            exported_users = sorted(d['pk'] for d in exported if d['model'] == 'sentry.user')
+            assert exported_users == sorted(u.id for u in users)
+
+            name = users[0].name
+            users[0].update(name='changed')
+            users[1].delete()
+
+            rv = self.runner.invoke(import_, ['--batch-size=2', 'export.jsonl'], obj={})
+            assert rv.exit_code == 0, rv.output
+
+        assert User.objects.get(id=users[0].id).name == name
+        assert User.objects.get(id=users[1].id).email == users[1].email
+        assert User.objects.filter(id__in=[u.id for u in users]).count() == 3
+
+
+class IterChunksConcurrentlyTest(TestCase):
+    def iter_chunks(self, model, chunk_size):
+        if model == 'broken':
+            yield ['%s:0' % model]
+            raise ValueError(model)
+        for i in range(3):
+            yield ['%s:%s' % (model, i)] * chunk_size
+
+    def test_order(self):
+        with patch('sentry.runner.commands.backup.iter_chunks', side_effect=self.iter_chunks):
+            chunks = list(iter_chunks_concurrently(['a', 'b', 'c', 'd'], 2, 3))
+
+        assert chunks == [
+            ['%s:%s' % (model, i)] * 2 for model in 'abcd' for i in range(3)
+        ]
+
+    def test_error(self):
+        with patch('sentry.runner.commands.backup.iter_chunks', side_effect=self.iter_chunks):
+            chunks = iter_chunks_concurrently(['a', 'broken', 'c'], 1, 2)
+            for _ in range(3):
+                next(chunks)
+            assert next(chunks) == ['broken:0']
+            with pytest.raises(ValueError):
+                next(chunks)
@@ -49,3 +49,25 @@ class RedisScriptMinHashIndexBackendTestCase(MinHashIndexBackendTestMixin, TestC
 
         result = self.index.export('example', [('index', 2)], timestamp=timestamp)
         assert len(result) == 1
+
+    def test_record_many(self):
+        timestamp = int(time.time())
+        self.index.record('example', '1', [('index', 'hello world')], timestamp=timestamp)
+        self.index.record_many([
+            ('example', '2', [('index', 'hello world')], timestamp),
+            ('example', '3', [('index', 'hello world'), ('index', 'jello world')], timestamp),
+            ('other', '1', [('index', 'hello world')], timestamp),
+            # written to an older (but retained) bucket
+            ('example', '4', [('index', 'hello world')], timestamp - self.index.interval * 2),
+        ])
+
+        def export(scope, key):
+            return msgpack.unpackb(
+                self.index.export(scope, [('index', key)], timestamp=timestamp)[0])[0]
+
+        assert export('example', 1) == export('example', 2)
+        assert export('other', 1) == export('example', 1)
+
+        results = self.index.compare('example', '1', [('index', 0)])
+        assert set(key for key, _ in results[:3]) == set(['1', '2', '4'])
+        assert results[3][0] == '3'
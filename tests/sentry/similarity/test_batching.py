@@ -0,0 +1,38 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from sentry.similarity.batching import RecordBatcher
+from sentry.testutils import TestCase
+
+
+class RecordBatcherTest(TestCase):
+    def test_flush(self):
+        features = Mock()
+        batcher = RecordBatcher(features, flush_interval=60, max_size=3)
+
+        first = self.create_event(event_id='a' * 32)
+        second = self.create_event(event_id='b' * 32)
+        batcher.add(first)
+        batcher.add(second)
+        assert len(batcher) == 2
+        assert features.record_many.call_count == 0
+
+        batcher.flush()
+        features.record_many.assert_called_once_with([first, second])
+        assert len(batcher) == 0
+
+        # nothing to write
+        batcher.flush()
+        assert features.record_many.call_count == 1
+
+    def test_flush_when_full(self):
+        features = Mock()
+        batcher = RecordBatcher(features, flush_interval=60, max_size=2)
+
+        events = [self.create_event(event_id=c * 32) for c in 'ab']
+        for event in events:
+            batcher.add(event)
+
+        features.record_many.assert_called_once_with(events)
+        assert len(batcher) == 0
@@ -38,3 +38,19 @@ class MinHashSignatureBuilderTestCase(TestCase):
             estimation,
             delta=0.1,  # totally made up constant, seems reasonable
         )
+
+    def test_matches_reference(self):
+        import mmh3
+
+        columns, rows = 16, 0xFFFF
+        get_signature = MinHashSignatureBuilder(columns, rows, cache_size=4)
+
+        features = ['feature-%d' % i for i in range(10)]
+        for subset in (features, features[:3], features[5:] + features[5:], features[:1]):
+            expected = [
+                min(mmh3.hash(feature, column) % rows for feature in subset)
+                for column in range(columns)
+            ]
+            # twice, to also get the signature from cached hashes
+            assert list(get_signature(subset)) == expected
+            assert list(get_signature(subset)) == expected
@@ -0,0 +1,34 @@
+from __future__ import absolute_import
+
+from sentry.stacktraces.frame_info import FrameInfo, FrameInfoCache
+
+
+def test_frame_info():
+    info = FrameInfo({
+        'function': 'std::vector<int>::push_back(int const&)',
+        'platform': 'native',
+    }, 'python')
+
+    assert info.frame_platform == 'native'
+    assert info.behavior_family == 'native'
+    assert info.function_name == 'std::vector<int>::push_back'
+    assert info.trim_function_name('main(int, char**)') == 'main'
+
+
+def test_frame_info_raw_function():
+    info = FrameInfo({
+        'function': 'push_back',
+        'raw_function': 'std::vector<int>::push_back(int const&)',
+    }, 'native')
+
+    assert info.function_name == 'push_back'
+
+
+def test_frame_info_cache():
+    frame = {'function': 'foo'}
+    cache = FrameInfoCache()
+
+    info = cache.get(frame, 'javascript')
+    assert cache.get(frame, 'javascript') is info
+    assert cache.get(dict(frame), 'javascript') is not info
+    assert cache.get(frame, 'native') is not info
@@ -0,0 +1,88 @@
+from __future__ import absolute_import
+
+from contextlib import contextmanager
+
+from mock import patch
+
+from sentry.digests.notifications import build_digest, event_to_record
+from sentry.plugins.sentry_mail.models import MailPlugin
+from sentry.tasks.digests import deliver_digests
+from sentry.testutils import TestCase
+
+
+@patch.object(MailPlugin, 'notify_digest')
+class DeliverDigestsTest(TestCase):
+    def setUp(self):
+        self.other_project = self.create_project()
+        self.records = {}
+        self.exits = {}
+        for project in (self.project, self.other_project):
+            group = self.create_group(project=project)
+            rule = project.rule_set.all()[0]
+            self.records[self.get_key(project)] = [
+                event_to_record(self.create_event(group=group), (rule, )),
+            ]
+
+        patcher = patch('sentry.digests.digest', side_effect=self.digest)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_key(self, project):
+        return 'mail:p:%s' % project.id
+
+    @contextmanager
+    def digest(self, key, minimum_delay=None):
+        records = self.records[key]
+        if isinstance(records, Exception):
+            raise records
+        try:
+            yield records
+        except Exception:
+            self.exits[key] = 'kept'
+            raise
+        self.exits[key] = 'closed'
+
+    def deliver(self):
+        deliver_digests([(self.get_key(p), 0) for p in (self.project, self.other_project)])
+
+    def test_success(self, notify_digest):
+        self.deliver()
+
+        assert notify_digest.call_count == 2
+        assert self.exits == {
+            self.get_key(self.project): 'closed',
+            self.get_key(self.other_project): 'closed',
+        }
+
+    def test_failed_build_keeps_records(self, notify_digest):
+        def build(project, records, state=None):
+            if project == self.project:
+                raise Exception('boom')
+            return build_digest(project, records, state=state)
+
+        with patch('sentry.tasks.digests.build_digest', side_effect=build):
+            self.deliver()
+
+        assert [c[0][0] for c in notify_digest.call_args_list] == [self.other_project]
+        assert self.exits == {
+            self.get_key(self.project): 'kept',
+            self.get_key(self.other_project): 'closed',
+        }
+
+    def test_failed_open(self, notify_digest):
+        self.records[self.get_key(self.project)] = Exception('boom')
+
+        self.deliver()
+
+        assert [c[0][0] for c in notify_digest.call_args_list] == [self.other_project]
+        assert self.exits == {self.get_key(self.other_project): 'closed'}
+
+    def test_failed_fetch_keeps_records(self, notify_digest):
+        with patch('sentry.tasks.digests.fetch_states', side_effect=Exception('boom')):
+            self.deliver()
+
+        assert notify_digest.call_count == 0
+        assert self.exits == {
+            self.get_key(self.project): 'kept',
+            self.get_key(self.other_project): 'kept',
+        }
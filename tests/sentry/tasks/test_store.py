@@ -6,8 +6,14 @@ from time import time
 
 from sentry import quotas, tsdb
 from sentry.event_manager import EventManager, HashDiscarded
+from sentry.models import Event, Release
 from sentry.plugins import Plugin2
-from sentry.tasks.store import preprocess_event, process_event, save_event
+from sentry.processingcache import processing_cache
+from sentry.tasks.store import (
+    enqueue_save_event, get_save_event_batch_shard, preprocess_event, process_event, save_event,
+    save_event_batch, take_save_event_batch, _get_save_event_batch_client,
+    _get_save_event_batch_keys
+)
 from sentry.testutils import PluginTestCase
 from sentry.utils.dates import to_datetime
 
@@ -82,9 +88,44 @@ class StoreTasksTest(PluginTestCase):
         assert mock_process_event.delay.call_count == 0
         assert mock_save_event.delay.call_count == 1
 
+    @mock.patch('sentry.tasks.store._do_save_event')
     @mock.patch('sentry.tasks.store.save_event')
-    @mock.patch('sentry.tasks.store.default_cache')
-    def test_process_event_mutate_and_save(self, mock_default_cache, mock_save_event):
+    @mock.patch('sentry.tasks.store.process_event')
+    def test_save_event_inline(self, mock_process_event, mock_save_event, mock_do_save_event):
+        project = self.create_project()
+
+        data = {
+            'project': project.id,
+            'platform': 'NOTMATTLANG',
+            'logentry': {
+                'formatted': 'test',
+            },
+        }
+
+        with self.options({'store.inline-save-platforms': ['NOTMATTLANG']}):
+            preprocess_event(cache_key='e:1', data=data, start_time=1)
+
+        assert mock_process_event.delay.call_count == 0
+        assert mock_save_event.delay.call_count == 0
+        (_, (cache_key, saved_data, start_time, _, project_id), _), = \
+            mock_do_save_event.mock_calls
+        assert cache_key == 'e:1'
+        assert saved_data is data
+        assert start_time == 1
+        assert project_id == project.id
+
+        # events that need processing are not saved inline
+        data['platform'] = 'mattlang'
+        mock_do_save_event.reset_mock()
+        with self.options({'store.inline-save-platforms': ['*']}):
+            preprocess_event(cache_key='e:1', data=data, start_time=1)
+
+        assert mock_process_event.delay.call_count == 1
+        assert mock_do_save_event.call_count == 0
+
+    @mock.patch('sentry.tasks.store.save_event')
+    @mock.patch('sentry.tasks.store.processing_cache')
+    def test_process_event_mutate_and_save(self, mock_processing_cache, mock_save_event):
         project = self.create_project()
 
         data = {
@@ -98,12 +139,12 @@ class StoreTasksTest(PluginTestCase):
             },
         }
 
-        mock_default_cache.get.return_value = data
+        mock_processing_cache.get.return_value = data
 
         process_event(cache_key='e:1', start_time=1)
 
         # The event mutated, so make sure we save it back
-        (_, (key, event, duration), _), = mock_default_cache.set.mock_calls
+        (_, (key, event, duration), _), = mock_processing_cache.set.mock_calls
 
         assert key == 'e:1'
         assert 'extra' not in event
@@ -115,8 +156,8 @@ class StoreTasksTest(PluginTestCase):
         )
 
     @mock.patch('sentry.tasks.store.save_event')
-    @mock.patch('sentry.tasks.store.default_cache')
-    def test_process_event_no_mutate_and_save(self, mock_default_cache, mock_save_event):
+    @mock.patch('sentry.tasks.store.processing_cache')
+    def test_process_event_no_mutate_and_save(self, mock_processing_cache, mock_save_event):
         project = self.create_project()
 
         data = {
@@ -130,12 +171,12 @@ class StoreTasksTest(PluginTestCase):
             },
         }
 
-        mock_default_cache.get.return_value = data
+        mock_processing_cache.get.return_value = data
 
         process_event(cache_key='e:1', start_time=1)
 
         # The event did not mutate, so we shouldn't reset it in cache
-        assert mock_default_cache.set.call_count == 0
+        assert mock_processing_cache.set.call_count == 0
 
         mock_save_event.delay.assert_called_once_with(
             cache_key='e:1', data=None, start_time=1, event_id=None,
@@ -143,8 +184,8 @@ class StoreTasksTest(PluginTestCase):
         )
 
     @mock.patch('sentry.tasks.store.save_event')
-    @mock.patch('sentry.tasks.store.default_cache')
-    def test_process_event_unprocessed(self, mock_default_cache, mock_save_event):
+    @mock.patch('sentry.tasks.store.processing_cache')
+    def test_process_event_unprocessed(self, mock_processing_cache, mock_save_event):
         project = self.create_project()
 
         data = {
@@ -158,11 +199,11 @@ class StoreTasksTest(PluginTestCase):
             },
         }
 
-        mock_default_cache.get.return_value = data
+        mock_processing_cache.get.return_value = data
 
         process_event(cache_key='e:1', start_time=1)
 
-        (_, (key, event, duration), _), = mock_default_cache.set.mock_calls
+        (_, (key, event, duration), _), = mock_processing_cache.set.mock_calls
         assert key == 'e:1'
         assert event['unprocessed'] is True
         assert duration == 3600
@@ -203,3 +244,90 @@ class StoreTasksTest(PluginTestCase):
             ],
                 timestamp=to_datetime(now),
             )
+
+    @mock.patch('sentry.tasks.store.save_event')
+    @mock.patch('sentry.tasks.store.save_event_batch')
+    @mock.patch('sentry.tasks.store.processing_cache')
+    def test_process_event_enqueues_save_event_batch(
+            self, mock_processing_cache, mock_save_event_batch, mock_save_event):
+        project = self.create_project()
+
+        data = {
+            'project': project.id,
+            'platform': 'noop',
+            'logentry': {
+                'formatted': 'test',
+            },
+        }
+
+        mock_processing_cache.get.return_value = data
+
+        with self.options({'store.save-event-batch-size': 2}):
+            process_event(cache_key='e:1', start_time=1)
+            assert mock_save_event_batch.apply_async.call_count == 1
+            assert mock_save_event_batch.delay.call_count == 0
+
+            process_event(cache_key='e:2', start_time=1)
+            assert mock_save_event_batch.delay.call_count == 1
+
+        assert mock_save_event.delay.call_count == 0
+
+    @mock.patch('sentry.tasks.store.save_event_batch.delay')
+    @mock.patch('sentry.tasks.store.save_event_batch.apply_async')
+    def test_save_event_batch(self, mock_apply_async, mock_delay):
+        project = self.create_project()
+
+        with self.options({'store.save-event-batch-size': 2}):
+            for i in range(3):
+                manager = EventManager({
+                    'platform': 'python',
+                    'logentry': {
+                        'formatted': 'test',
+                    },
+                    'release': 'abc',
+                })
+                manager.normalize()
+                data = dict(manager.get_data())
+                data['project'] = project.id
+                processing_cache.set('e:%s' % i, data, 3600)
+                enqueue_save_event(project.id, 'e:%s' % i, data['event_id'], time())
+
+            # only one delayed task is scheduled per shard
+            shard = get_save_event_batch_shard(project.id)
+            mock_apply_async.assert_called_once_with(kwargs={'shard': shard}, countdown=1)
+            mock_delay.assert_called_once_with(shard=shard)
+
+            mock_apply_async.reset_mock()
+            save_event_batch(shard=shard)
+
+            assert Event.objects.filter(project_id=project.id).count() == 2
+            # the remaining event is picked up after a delay
+            assert mock_apply_async.call_count == 1
+
+            save_event_batch(shard=shard)
+
+        assert Event.objects.filter(project_id=project.id).count() == 3
+        assert Release.objects.filter(version='abc').count() == 1
+        for i in range(3):
+            assert processing_cache.get('e:%s' % i) is None
+
+    def test_save_event_batch_requeues_lost_events(self):
+        shard = 3
+        queue_key, in_progress_key, _ = _get_save_event_batch_keys(shard)
+        client = _get_save_event_batch_client(shard)
+        client.rpush(queue_key, 'a', 'b', 'c')
+
+        # A task takes two events and dies before saving them.
+        jobs, remaining = take_save_event_batch(client, [queue_key, in_progress_key], [10, 2, 20])
+        assert jobs == [b'a', b'b']
+        assert remaining == 1
+
+        # They are not handed out again before their deadline...
+        jobs, remaining = take_save_event_batch(client, [queue_key, in_progress_key], [15, 2, 25])
+        assert jobs == [b'c']
+        assert remaining == 0
+
+        # ...but after it.
+        jobs, remaining = take_save_event_batch(client, [queue_key, in_progress_key], [21, 2, 31])
+        assert jobs == [b'a', b'b']
+        assert client.zrange(in_progress_key, 0, -1) == [b'c', b'a', b'b']
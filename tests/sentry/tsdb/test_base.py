@@ -7,7 +7,7 @@ import pytz
 from datetime import datetime, timedelta
 
 from unittest import TestCase
-from sentry.tsdb.base import BaseTSDB, ONE_MINUTE, ONE_HOUR, ONE_DAY
+from sentry.tsdb.base import BaseTSDB, SeriesMatrix, ONE_MINUTE, ONE_HOUR, ONE_DAY
 from sentry.utils.dates import to_timestamp
 from six.moves import xrange
 
@@ -45,6 +45,26 @@ class BaseTSDBTest(TestCase):
         assert len(post_results) == 1
         assert post_results[1] == [[1368889200, 15], [1368892800, 7]]
 
+    def test_series_matrix(self):
+        matrix = SeriesMatrix.from_range(
+            {
+                1: [(1368889980, 5), (1368890040, 10), (1368893640, 7)],
+                2: [(1368890040, 1)],
+            },
+            keys=[1, 2, 3],
+            timestamps=[1368889980, 1368890040, 1368893640],
+        )
+        assert matrix.series(1) == [(1368889980, 5), (1368890040, 10), (1368893640, 7)]
+        assert matrix.series(2) == [(1368889980, 0), (1368890040, 1), (1368893640, 0)]
+        assert matrix.series(3) == [(1368889980, 0), (1368890040, 0), (1368893640, 0)]
+        assert matrix.sums() == {1: 22, 2: 1, 3: 0}
+
+        rolled_up = matrix.rollup(3600)
+        assert list(rolled_up.timestamps) == [1368889200, 1368892800]
+        assert rolled_up.series(1) == [(1368889200, 15), (1368892800, 7)]
+        assert rolled_up.series(2) == [(1368889200, 1), (1368892800, 0)]
+        assert rolled_up.series(3) == [(1368889200, 0), (1368892800, 0)]
+
     def test_calculate_expiry(self):
         timestamp = datetime(2013, 5, 18, 15, 13, 58, 132928, tzinfo=pytz.UTC)
         result = self.tsdb.calculate_expiry(10, 30, timestamp)
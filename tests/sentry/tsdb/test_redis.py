@@ -136,6 +136,14 @@ class RedisTSDBTest(TestCase):
             ],
         }
 
+        results = self.db.get_range_matrix(
+            TSDBModel.project, [1, 2], dts[0], dts[-1], environment_ids=[1])
+        assert list(results.timestamps) == [timestamp(dt) for dt in dts]
+        expected = self.db.get_range(
+            TSDBModel.project, [1, 2], dts[0], dts[-1], environment_ids=[1])
+        assert results.series(1) == expected[1]
+        assert results.series(2) == expected[2]
+
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1])
         assert results == {
             1: 9,
@@ -384,6 +392,54 @@ class RedisTSDBTest(TestCase):
             2: 0,
         }
 
+    def test_write_multi(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=1)
+        rollup = 3600
+
+        for _ in range(2):
+            self.db.write_multi(
+                counters=[
+                    (TSDBModel.project, 1),
+                    (TSDBModel.group, 'foo'),
+                ],
+                distinct_counts=[
+                    (TSDBModel.users_affected_by_project, 1, ('a', 'b')),
+                ],
+                frequencies=[
+                    (TSDBModel.frequent_environments_by_group, {
+                        'foo': {'production': 1},
+                    }),
+                ],
+                timestamp=now,
+                environment_id=1,
+            )
+
+        assert self.db.get_sums(TSDBModel.project, [1], now, now, rollup=rollup) == {1: 2}
+        assert self.db.get_sums(
+            TSDBModel.project, [1], now, now, rollup=rollup, environment_id=1) == {1: 2}
+        assert self.db.get_sums(TSDBModel.group, ['foo'], now, now, rollup=rollup) == {'foo': 2}
+
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_project, [1], now, now, rollup=rollup) == {1: 2}
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_project, [1], now, now, rollup=rollup,
+            environment_id=1) == {1: 2}
+
+        assert self.db.get_most_frequent(
+            TSDBModel.frequent_environments_by_group, ['foo'], now, now, rollup=rollup,
+        ) == {'foo': [('production', 2.0)]}
+
+        # every counter hash is expired along with the rest of its rollup
+        hash_key, _ = self.db.make_counter_key(TSDBModel.project, rollup, now, 1, None)
+        assert self.db.cluster.get_local_client_for_key(hash_key).ttl(hash_key) > 0
+
+    def test_write_multi_environment_validation(self):
+        with pytest.raises(ValueError):
+            self.db.write_multi(
+                counters=[(TSDBModel.project_total_received, 1)],
+                environment_id=1,
+            )
+
     def test_frequency_tables(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC)
         model = TSDBModel.frequent_projects_by_organization
@@ -504,3 +504,11 @@ class SensitiveDataFilterTest(TestCase):
         proc.apply(data)
 
         assert data['breadcrumbs']['values'][0]['message'] == FILTER_MASK
+
+    def test_modified(self):
+        proc = SensitiveDataFilter()
+        proc.apply({'extra': {'foo': 'bar'}})
+        assert not proc.modified
+
+        proc.apply({'extra': {'password': 'hello'}})
+        assert proc.modified
@@ -0,0 +1,81 @@
+from __future__ import absolute_import
+
+import mock
+
+from sentry.models import GroupHash
+from sentry.testutils import TestCase
+from sentry.utils import grouphash_cache
+
+
+class GroupHashCacheTest(TestCase):
+    def make_grouphash(self, hash, **kwargs):
+        return GroupHash.objects.create(project=self.project, hash=hash, **kwargs)
+
+    def get_many(self, hashes):
+        return grouphash_cache.get_many(self.project.id, hashes)[0]
+
+    def set_many(self, grouphashes):
+        _, generation = grouphash_cache.get_many(self.project.id, [h.hash for h in grouphashes])
+        grouphash_cache.set_many(self.project.id, grouphashes, generation)
+
+    def test_disabled(self):
+        grouphash = self.make_grouphash('a' * 32, group=self.group)
+        self.set_many([grouphash])
+        assert grouphash_cache.get_many(self.project.id, ['a' * 32]) == ({}, None)
+
+    def test_get_and_set(self):
+        with self.settings(SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER='default'):
+            bound = self.make_grouphash('a' * 32, group=self.group)
+            unbound = self.make_grouphash('b' * 32)
+            self.set_many([bound, unbound])
+
+            assert self.get_many(['a' * 32, 'b' * 32]) == {
+                'a' * 32: (bound.id, self.group.id),
+            }
+
+            grouphash_cache.invalidate(self.project.id)
+            assert self.get_many(['a' * 32]) == {}
+
+    def test_set_after_invalidate(self):
+        with self.settings(SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER='default'):
+            grouphash = self.make_grouphash('a' * 32, group=self.group)
+
+            # A lookup reads the binding before it is moved to another group
+            # but only caches it after the move invalidated the cache.
+            _, generation = grouphash_cache.get_many(self.project.id, ['a' * 32])
+            grouphash_cache.invalidate(self.project.id)
+            grouphash_cache.set_many(self.project.id, [grouphash], generation)
+            assert self.get_many(['a' * 32]) == {}
+
+            self.set_many([grouphash])
+            assert self.get_many(['a' * 32]) == {'a' * 32: (grouphash.id, self.group.id)}
+
+    def test_reads_do_not_extend_lifetime(self):
+        with self.settings(
+            SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER='default',
+            SENTRY_GROUPHASH_CACHE_TTL=60,
+        ):
+            grouphash = self.make_grouphash('a' * 32, group=self.group)
+            with mock.patch('time.time', return_value=1000):
+                self.set_many([grouphash])
+            with mock.patch('time.time', return_value=1050):
+                assert self.get_many(['a' * 32]) == {'a' * 32: (grouphash.id, self.group.id)}
+            with mock.patch('time.time', return_value=1061):
+                assert self.get_many(['a' * 32]) == {}
+
+    def test_evicts_least_recently_used(self):
+        with self.settings(
+            SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER='default',
+            SENTRY_GROUPHASH_CACHE_SIZE=2,
+        ):
+            a = self.make_grouphash('a' * 32, group=self.group)
+            b = self.make_grouphash('b' * 32, group=self.group)
+            c = self.make_grouphash('c' * 32, group=self.group)
+
+            self.set_many([a])
+            self.set_many([b])
+            # touch ``a`` so that ``b`` becomes the oldest entry
+            self.get_many(['a' * 32])
+            self.set_many([c])
+
+            assert set(self.get_many(['a' * 32, 'b' * 32, 'c' * 32])) == set(['a' * 32, 'c' * 32])
@@ -0,0 +1,56 @@
+from __future__ import absolute_import
+
+import mock
+from datetime import datetime
+from pytz import utc
+
+from sentry import tsdb
+from sentry.testutils import TestCase
+from sentry.utils.outcomes import Outcome, OutcomeAggregator
+
+
+class OutcomeAggregatorTest(TestCase):
+    @mock.patch('sentry.utils.outcomes.metrics.incr')
+    @mock.patch('sentry.utils.outcomes.tsdb.incr_multi')
+    def test_flush(self, mock_incr_multi, mock_metrics_incr):
+        aggregator = OutcomeAggregator(flush_interval=10, bucket_size=10)
+        aggregator._flusher_pid = mock.sentinel.pid
+
+        timestamp = datetime(2019, 1, 1, 0, 0, 3, tzinfo=utc)
+        for _ in range(2):
+            aggregator.add(1, 2, 3, Outcome.RATE_LIMITED, None, timestamp)
+        aggregator.add(1, 4, None, Outcome.RATE_LIMITED, None, timestamp)
+
+        aggregator.flush()
+
+        calls = {
+            (call[1]['count'], call[1]['timestamp']): set(call[0][0])
+            for call in mock_incr_multi.call_args_list
+        }
+        bucket = datetime(2019, 1, 1, 0, 0, 0, tzinfo=utc)
+        assert calls == {
+            (1, bucket): set([
+                (tsdb.models.project_total_received, 4),
+                (tsdb.models.project_total_rejected, 4),
+            ]),
+            (2, bucket): set([
+                (tsdb.models.project_total_received, 2),
+                (tsdb.models.key_total_received, 3),
+                (tsdb.models.project_total_rejected, 2),
+                (tsdb.models.key_total_rejected, 3),
+            ]),
+            (3, bucket): set([
+                (tsdb.models.organization_total_received, 1),
+                (tsdb.models.organization_total_rejected, 1),
+            ]),
+        }
+        mock_metrics_incr.assert_called_once_with(
+            'events.outcomes',
+            amount=3,
+            skip_internal=True,
+            tags={'outcome': 'rate_limited', 'reason': None},
+        )
+
+        mock_incr_multi.reset_mock()
+        aggregator.flush()
+        assert not mock_incr_multi.called
@@ -416,6 +416,29 @@ class StoreViewTest(TestCase):
         assert not call_data['request']['env'].get('REMOTE_ADDR')
         assert not call_data['sdk'].get('client_ip')
 
+    @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
+    def test_passes_encoded_data(self, mock_insert_data_to_database):
+        self.project.update_option('sentry:scrub_ip_address', True)
+        resp = self._postWithHeader({"message": "foo bar"})
+        assert resp.status_code == 200, (resp.status_code, resp.content)
+
+        call_data = mock_insert_data_to_database.call_args[0][0]
+        encoded_data = mock_insert_data_to_database.call_args[1]['encoded_data']
+        assert json.loads(encoded_data) == dict(call_data)
+
+    @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
+    def test_does_not_pass_encoded_data_if_scrubbed(self, mock_insert_data_to_database):
+        self.project.update_option('sentry:scrub_ip_address', True)
+        resp = self._postWithHeader({
+            "message": "foo bar",
+            "user": {
+                "ip_address": "127.0.0.1"
+            },
+        })
+        assert resp.status_code == 200, (resp.status_code, resp.content)
+
+        assert mock_insert_data_to_database.call_args[1]['encoded_data'] is None
+
     @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
     def test_scrubs_org_ip_address_override(self, mock_insert_data_to_database):
         self.organization.update_option('sentry:require_scrub_ip_address', True)